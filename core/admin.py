@@ -1,9 +1,57 @@
 from django.contrib import admin
-from .models import GalleryItem
+from django.http import FileResponse, Http404
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html
+
+from . import profiling
+from .models import GalleryItem, ProfileCapture, State
 
 @admin.register(GalleryItem)
 class GalleryItemAdmin(admin.ModelAdmin):
     list_display = ("id", "category", "created_at")
     list_filter = ("category",)
 
+
+@admin.register(State)
+class StateAdmin(admin.ModelAdmin):
+    list_display = ("name", "aliases", "latitude", "longitude")
+    search_fields = ("name",)
+
+
+@admin.register(ProfileCapture)
+class ProfileCaptureAdmin(admin.ModelAdmin):
+    """Read-only list of core.profiling captures, newest first, with file downloads."""
+    list_display = ("created_at", "method", "path", "view_name", "status_code", "duration_ms", "trigger", "kind", "download")
+    list_filter = ("trigger", "kind", "view_name")
+    search_fields = ("path",)
+    readonly_fields = [f.name for f in ProfileCapture._meta.fields] + ["download"]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.display(description="Profile")
+    def download(self, obj):
+        url = reverse("admin:core_profilecapture_download", args=[obj.pk])
+        return format_html('<a href="{}">{}</a>', url, obj.file_name)
+
+    def get_urls(self):
+        return [
+            path("<int:pk>/download/", self.admin_site.admin_view(self.download_view), name="core_profilecapture_download"),
+            *super().get_urls(),
+        ]
+
+    def download_view(self, request, pk):
+        capture = get_object_or_404(ProfileCapture, pk=pk)
+        if not self.has_view_permission(request, capture):
+            raise Http404
+        try:
+            handle = profiling.profile_path(capture).open("rb")
+        except FileNotFoundError:
+            raise Http404("The profile file is gone.")
+        return FileResponse(handle, as_attachment=True, filename=capture.file_name)
+
 # Register your models here.
@@ -1,13 +1,23 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import RegionViewSet, UserRegistrationView, CroppingStatViewSet, IrrigationAreaViewSet
+from .async_views import AsyncListView, AsyncRegionSummaryView
+from .views import RegionViewSet, UserRegistrationView, CroppingStatViewSet, IrrigationAreaViewSet, CacheStatsView, PageBundleView, StateViewSet
 
 router = DefaultRouter()
 router.register('regions', RegionViewSet, basename='region')
 router.register('register', UserRegistrationView, basename='register')
 router.register('cropping-stats', CroppingStatViewSet, basename='croppingstat')
 router.register('irrigation-areas', IrrigationAreaViewSet, basename='irrigationarea')
+router.register('cache-stats', CacheStatsView, basename='cachestats')
+router.register('bundle', PageBundleView, basename='bundle')
+router.register('states', StateViewSet, basename='state')
 
 urlpatterns = [
     path('', include(router.urls)),
+
+    # Async read path for ASGI servers (core.async_views)
+    path('async/regions/', AsyncListView.as_view(viewset_class=RegionViewSet, basename='region'), name='async-region-list'),
+    path('async/regions/summary/', AsyncRegionSummaryView.as_view(viewset_class=RegionViewSet, basename='region'), name='async-region-summary'),
+    path('async/cropping-stats/', AsyncListView.as_view(viewset_class=CroppingStatViewSet, basename='croppingstat'), name='async-croppingstat-list'),
+    path('async/irrigation-areas/', AsyncListView.as_view(viewset_class=IrrigationAreaViewSet, basename='irrigationarea'), name='async-irrigationarea-list'),
 ]
@@ -0,0 +1,196 @@
+"""
+Async read path for the list and summary APIs, for ASGI servers running
+land_insights.asgi (uvicorn, daphne).
+
+/api/async/regions/, /api/async/cropping-stats/, /api/async/irrigation-areas/
+and /api/async/regions/summary/ take the same query parameters as their DRF
+counterparts and answer with the same bytes, sharing their response cache
+entries and ETags (core.caching). Each request does its synchronous work
+(content negotiation, filters, the data version lookup) in one sync_to_async
+call. Rows are then read with the async ORM (aiterator, aaggregate) and
+encoded to JSON a batch at a time on a bounded thread pool
+(settings.ASYNC_SERIALIZE_WORKERS), so the event loop never blocks on
+encoding and concurrent large lists cannot take more threads than that.
+
+Requests the fast path does not cover (paginated pages, other renderers,
+serializers with computed fields, summaries answered from the rollup or the
+column snapshot) run the DRF action itself inside that same call.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterable, AsyncIterator, List, Optional, Sequence, Tuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+from django.http.response import HttpResponseBase
+from django.views import View
+from rest_framework.renderers import JSONRenderer
+
+from . import caching, columnar
+from . import summary as region_summary
+from .renderers import BATCH_SIZE, encode_items, make_encoder
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.ASYNC_SERIALIZE_WORKERS, thread_name_prefix="serialize"
+            )
+        return _executor
+
+
+async def in_executor(fn, *args):
+    """Run fn(*args) on the serialization pool without blocking the event loop."""
+    return await asyncio.get_running_loop().run_in_executor(_get_executor(), fn, *args)
+
+
+def _encode_rows(rows: Sequence[dict], columns: Sequence[Tuple[str, str]], encoder) -> str:
+    return encode_items([tuple(row[c] for _, c in columns) for row in rows], [k for k, _ in columns], encoder)
+
+
+async def aiter_json_array(rows: AsyncIterable[dict], columns: Sequence[Tuple[str, str]], encoder,
+                           batch_size: int = BATCH_SIZE) -> AsyncIterator[bytes]:
+    """
+    renderers.iter_json_array() over async .values() rows, with `columns` as
+    FastListMixin's (key, column) pairs; each batch is encoded on the
+    serialization pool.
+    """
+    item_sep = encoder.item_separator
+    yield b"["
+    first = True
+    batch: List[dict] = []
+    async for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            body = await in_executor(_encode_rows, batch, columns, encoder)
+            yield (body if first else item_sep + body).encode()
+            first = False
+            batch = []
+    if batch:
+        body = await in_executor(_encode_rows, batch, columns, encoder)
+        yield (body if first else item_sep + body).encode()
+    yield b"]"
+
+
+def _paginated(view, request) -> bool:
+    paginator = view.paginator
+    if paginator is None:
+        return False
+    params = request.query_params
+    return any(
+        getattr(paginator, name, None) in params
+        for name in ("cursor_query_param", "page_size_query_param", "page_query_param")
+    )
+
+
+class AsyncReadView(View):
+    """
+    Async GET for one read action of a DRF viewset. plan() runs in a thread
+    and returns either a finished response or what respond() needs to
+    build one on the event loop.
+    """
+    viewset_class = None
+    basename: Optional[str] = None
+    action = "list"
+
+    async def get(self, request, *args, **kwargs):
+        view, drf_request, plan = await sync_to_async(self.prepare)(request)
+        if isinstance(plan, HttpResponseBase):
+            response = plan
+        else:
+            try:
+                response = await self.respond(view, drf_request, plan)
+            except Exception as exc:
+                response = view.handle_exception(exc)
+        return view.finalize_response(drf_request, response)
+
+    def prepare(self, request):
+        # What APIView.dispatch() does up to the handler
+        view = self.viewset_class(basename=self.basename)
+        view.action_map = {"get": self.action}
+        view.get = getattr(view, self.action)
+        view.args, view.kwargs = (), {}
+        drf_request = view.initialize_request(request)
+        view.request = drf_request
+        view.headers = view.default_response_headers
+        try:
+            view.initial(drf_request)
+            plan = self.plan(view, drf_request)
+        except Exception as exc:
+            plan = view.handle_exception(exc)
+        return view, drf_request, plan
+
+    def plan(self, view, request):
+        raise NotImplementedError
+
+    async def respond(self, view, request, plan) -> HttpResponseBase:
+        raise NotImplementedError
+
+
+class AsyncListView(AsyncReadView):
+    """Unpaginated JSON lists streamed from .values_list(...).aiterator() (see FastListMixin)."""
+
+    def plan(self, view, request):
+        if _paginated(view, request):
+            # Page links carry this path, so pages are cached apart from the sync view's
+            view.basename = f"{view.basename}:async"
+            return view.list(request)
+        if not view.can_fast_list(request):
+            return view.list(request)
+        columns = view.get_fast_list_columns()
+        if columns is None:
+            return view.list(request)
+        return view.serve_cached(lambda req: self.stream(view, req, columns), request)
+
+    @staticmethod
+    def stream(view, request, columns) -> StreamingHttpResponse:
+        renderer = request.accepted_renderer
+        chunk_size = view.fast_list_chunk_size
+        # .values() rather than .values_list(): the latter's aiterator() runs its query on the event loop
+        rows = (
+            view.filter_queryset(view.get_queryset())
+            .values(*{c for _, c in columns})
+            .aiterator(chunk_size=chunk_size)
+        )
+        return StreamingHttpResponse(
+            aiter_json_array(rows, columns, make_encoder(renderer), batch_size=chunk_size),
+            content_type=renderer.media_type,
+        )
+
+
+class AsyncRegionSummaryView(AsyncReadView):
+    """Live Region summaries through aaggregate(); rollup and snapshot answers stay in plan()."""
+    action = "summary"
+
+    def plan(self, view, request):
+        params = request.query_params
+        live = any(params.get(p) for p in view.LIVE_SUMMARY_PARAMS)
+        if (
+            not live
+            or (view.columnar_summary and columnar.available())
+            or not isinstance(request.accepted_renderer, JSONRenderer)
+        ):
+            return view.summary(request)
+        response, key, validators = view.lookup_cached(request)
+        if response is not None:
+            return response
+        return view.get_queryset(), key, validators
+
+    async def respond(self, view, request, plan) -> HttpResponseBase:
+        qs, key, validators = plan
+        data = await region_summary.asummarize_queryset(qs)
+        renderer = request.accepted_renderer
+        content = await in_executor(
+            renderer.render, data, request.accepted_media_type, view.get_renderer_context()
+        )
+        response = view._add_validators(HttpResponse(content, content_type=renderer.media_type), validators)
+        if key is not None and view.cache_responses:
+            await caching.astore(key, response["Content-Type"], content)
+        return response
@@ -0,0 +1,139 @@
+"""
+Page bundles: everything one dashboard page renders, in one response.
+
+GET /api/bundle/<page>/ (holding, irrigation, cropping) returns the summary
+cards, the top-N chart series, the map legend breaks and the trend inputs of
+that page, computed in SQL with one aggregate query and a few ordered ones
+instead of the browser downloading the whole table for each widget. Bundles
+are served through ResponseCacheMixin, so they are cached and revalidated
+(ETag) per data version like the other read APIs.
+
+The map markers themselves stay on <resource>/tiles/ because they depend on
+the viewport and zoom level.
+"""
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce
+
+from . import states
+from .mixins import quantile_breaks
+from .models import CroppingStat, IrrigationArea, Region
+
+TOP_N = 15
+LEGEND_QUANTILES = (0.25, 0.5, 0.75)
+
+
+def _top(qs, label: str, column: str, limit: int = TOP_N) -> List[dict]:
+    rows = qs.filter(**{f"{column}__isnull": False}).order_by(F(column).desc(), "pk").values_list(label, column)
+    return [{"label": l, "value": v} for l, v in rows[:limit]]
+
+
+def _mean(total: Optional[float], count: int) -> Optional[float]:
+    # The pages count missing values as zero, so divide by every row
+    return (total or 0.0) / count if count else None
+
+
+def holding(qs) -> dict:
+    qs = qs.annotate(effective_land_holding=Coalesce(F("land_holding"), F("average_land_holding")))
+    totals = qs.aggregate(
+        count=Count("pk"),
+        states=Count("state", distinct=True),
+        land_holding=Sum("effective_land_holding"),
+        yield_per_hectare=Sum("yield_per_hectare"),
+        rainfall=Sum("rainfall"),
+        irrigated=Count("pk", filter=Q(irrigation_area__gt=0)),
+    )
+    count = totals["count"]
+    return {
+        "cards": {
+            "count": count,
+            "states": totals["states"],
+            "total_land_holding": totals["land_holding"] or 0.0,
+            "avg_land_holding": _mean(totals["land_holding"], count),
+            "avg_yield_per_hectare": _mean(totals["yield_per_hectare"], count),
+            "avg_rainfall": _mean(totals["rainfall"], count),
+            "irrigation_coverage": totals["irrigated"] / count * 100 if count else None,
+        },
+        "top": _top(qs, "name", "effective_land_holding"),
+        "map": {
+            "metric": "land_holding",
+            "quantiles": quantile_breaks(qs, "effective_land_holding", count, LEGEND_QUANTILES),
+        },
+    }
+
+
+IRRIGATION_AREAS = ("total_area", "kharif_area", "rabi_area", "perennial_area", "others_area")
+
+
+def irrigation(qs) -> dict:
+    totals = qs.aggregate(
+        count=Count("pk"),
+        states=Count("state", distinct=True),
+        **{f: Sum(f) for f in IRRIGATION_AREAS},
+    )
+    return {
+        "cards": {
+            "count": totals["count"],
+            "states": totals["states"],
+            **{f: totals[f] or 0.0 for f in IRRIGATION_AREAS},
+        },
+        "top": _top(qs, "state", "total_area"),
+    }
+
+
+CROPPING_CARDS = ("total_geographical_area", "net_area_sown", "forests", "not_available_for_cultivation", "current_fallows")
+CROPPING_TABLE = ("state", "category", "total_geographical_area", "net_area_sown", "forests", "current_fallows", "culturable_wasteland")
+
+
+def cropping(qs) -> dict:
+    totals = qs.aggregate(
+        count=Count("pk"),
+        states=Count("state", distinct=True),
+        **{f: Sum(f) for f in CROPPING_CARDS},
+    )
+    count = totals["count"]
+    return {
+        "cards": {
+            "count": count,
+            "states": totals["states"],
+            **{f: totals[f] or 0.0 for f in CROPPING_CARDS},
+        },
+        "top": _top(qs, "state", "net_area_sown"),
+        "trends": {
+            "avg_net_area_sown": _mean(totals["net_area_sown"], count),
+            "avg_forests": _mean(totals["forests"], count),
+        },
+        # Land-use table rows as arrays; `columns` names the positions
+        "table": {
+            "columns": list(CROPPING_TABLE),
+            "rows": [list(r) for r in qs.order_by("state", "pk").values_list(*CROPPING_TABLE)],
+        },
+    }
+
+
+class Page(NamedTuple):
+    model: type
+    build: Callable[..., dict]
+    # Filters applied unless the request overrides them
+    defaults: Dict[str, str] = {}
+
+
+PAGES: Dict[str, Page] = {
+    "holding": Page(Region, holding),
+    "irrigation": Page(IrrigationArea, irrigation),
+    "cropping": Page(CroppingStat, cropping, {"category": "Area"}),
+}
+
+
+def build(page: str, params) -> dict:
+    """Bundle for `page`, narrowed by ?state= (and ?category= on cropping)."""
+    spec = PAGES[page]
+    qs = spec.model.objects.all()
+    state = params.get("state")
+    if state:
+        qs = states.filter_state(qs, state)
+    category = params.get("category", spec.defaults.get("category"))
+    if category and spec.model is CroppingStat:
+        qs = qs.filter(category__lower=category.lower())
+    return {"page": page, **spec.build(qs)}
@@ -0,0 +1,219 @@
+"""
+Response cache and conditional GET for the read APIs.
+
+Successful GET responses are stored in the "api" cache under a key built from
+the view, action, negotiated format, normalized query string and the data
+versions of the models the view reads (core.versions). Any write bumps a
+version, so stale entries are simply never read again and age out of the LRU
+backend.
+
+Streamed responses, sync or async (core.async_views), are passed through
+chunk by chunk and stored once fully sent, unless they exceed
+settings.API_CACHE_MAX_BYTES.
+
+The same key, hashed, is the response's strong ETag and the version's bump
+time its Last-Modified, so If-None-Match / If-Modified-Since are answered with
+304 after a single version lookup, before the queryset or serializer runs.
+"""
+import hashlib
+from functools import wraps
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator, List, Optional
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from . import versions
+
+CACHE_ALIAS = "api"
+HITS_KEY = "response-cache:hits"
+MISSES_KEY = "response-cache:misses"
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def _count(key: str) -> None:
+    cache = get_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        # First hit/miss since the counter was evicted or the cache started
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def stats() -> dict:
+    counts = get_cache().get_many([HITS_KEY, MISSES_KEY])
+    hits, misses = counts.get(HITS_KEY, 0), counts.get(MISSES_KEY, 0)
+    return {
+        "backend": settings.CACHES[CACHE_ALIAS]["BACKEND"],
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / (hits + misses) if hits + misses else None,
+    }
+
+
+def reset_stats() -> None:
+    get_cache().delete_many([HITS_KEY, MISSES_KEY])
+
+
+def normalized_query(params) -> str:
+    """Query string with keys and repeated values sorted, so equivalent URLs share a key."""
+    return urlencode(sorted((k, v) for k in params for v in params.getlist(k)))
+
+
+def _store_when_complete(chunks: Iterable[bytes], key: str, content_type: str) -> Iterator[bytes]:
+    parts: Optional[List[bytes]] = []
+    size = 0
+    for chunk in chunks:
+        if parts is not None:
+            size += len(chunk)
+            if size > settings.API_CACHE_MAX_BYTES:
+                parts = None
+            else:
+                parts.append(chunk)
+        yield chunk
+    if parts is not None:
+        get_cache().set(key, (content_type, b"".join(parts)))
+
+
+async def _acount(key: str) -> None:
+    cache = get_cache()
+    try:
+        await cache.aincr(key)
+    except ValueError:
+        if not await cache.aadd(key, 1, timeout=None):
+            await cache.aincr(key)
+
+
+async def astore(key: str, content_type: str, content: bytes) -> None:
+    """Count a miss and cache a response rendered outside serve_cached (core.async_views)."""
+    await _acount(MISSES_KEY)
+    if len(content) <= settings.API_CACHE_MAX_BYTES:
+        await get_cache().aset(key, (content_type, content))
+
+
+async def astore_when_complete(chunks: AsyncIterable[bytes], key: str, content_type: str) -> AsyncIterator[bytes]:
+    """_store_when_complete() for the async views' streams (core.async_views)."""
+    parts: Optional[List[bytes]] = []
+    size = 0
+    async for chunk in chunks:
+        if parts is not None:
+            size += len(chunk)
+            if size > settings.API_CACHE_MAX_BYTES:
+                parts = None
+            else:
+                parts.append(chunk)
+        yield chunk
+    if parts is not None:
+        await get_cache().aset(key, (content_type, b"".join(parts)))
+
+
+class ResponseCacheMixin:
+    """
+    Cache list/retrieve responses (and any action decorated with
+    cache_response) per data version of get_version_models(), and answer
+    conditional requests for them.
+    """
+    cache_responses = True
+    conditional_responses = True
+
+    def get_version_model(self):
+        """Model whose data version keys and validates the responses."""
+        return self.queryset.model
+
+    def get_version_models(self) -> tuple:
+        """Every model the response is derived from; override for responses joining several tables."""
+        return (self.get_version_model(),)
+
+    def get_response_cache_key(self, request, version: str, **kwargs) -> str:
+        renderer = getattr(request, "accepted_renderer", None)
+        fmt = renderer.format if renderer else ""
+        path_args = "/".join(f"{k}={v}" for k, v in sorted(kwargs.items()))
+        query = normalized_query(request.query_params)
+        return f"response:{self.basename}:{self.action}:{fmt}:v{version}:{path_args}:{query}"
+
+    def serve_cached(self, handler, request, *args, **kwargs):
+        if request.method != "GET" or not (self.cache_responses or self.conditional_responses):
+            return handler(request, *args, **kwargs)
+
+        response, key, validators = self.lookup_cached(request, **kwargs)
+        if response is not None:
+            return response
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code != 200:
+            return response
+        self._add_validators(response, validators)
+        if not self.cache_responses:
+            return response
+
+        _count(MISSES_KEY)
+        if response.streaming:
+            store = astore_when_complete if response.is_async else _store_when_complete
+            response.streaming_content = store(response.streaming_content, key, response["Content-Type"])
+        elif hasattr(response, "add_post_render_callback"):
+            def store(rendered):
+                if len(rendered.content) <= settings.API_CACHE_MAX_BYTES:
+                    get_cache().set(key, (rendered["Content-Type"], rendered.content))
+            response.add_post_render_callback(store)
+        return response
+
+    def lookup_cached(self, request, **kwargs):
+        """
+        (response, cache key, validators) for a GET: the response is a 304 or
+        a cache hit ready to send, or None when the view has to run.
+        """
+        if not (self.cache_responses or self.conditional_responses):
+            return None, None, {}
+        token, updated_at = versions.current_token(*self.get_version_models())
+        key = self.get_response_cache_key(request, token, **kwargs)
+        validators = {}
+        if self.conditional_responses:
+            validators["ETag"] = '"%s"' % hashlib.sha1(key.encode()).hexdigest()
+            if updated_at:
+                validators["Last-Modified"] = http_date(updated_at.timestamp())
+            not_modified = get_conditional_response(
+                request,
+                etag=validators["ETag"],
+                last_modified=int(updated_at.timestamp()) if updated_at else None,
+            )
+            if not_modified is not None:
+                return self._add_validators(not_modified, validators), key, validators
+
+        cached = get_cache().get(key) if self.cache_responses else None
+        if cached is not None:
+            _count(HITS_KEY)
+            content_type, content = cached
+            return self._add_validators(HttpResponse(content, content_type=content_type), validators), key, validators
+        return None, key, validators
+
+    @staticmethod
+    def _add_validators(response, validators: dict):
+        for header, value in validators.items():
+            response[header] = value
+        if validators:
+            # Browsers may keep the body but must revalidate it on every use
+            patch_cache_control(response, no_cache=True)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.serve_cached(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.serve_cached(super().retrieve, request, *args, **kwargs)
+
+
+def cache_response(method):
+    """Serve an extra @action through ResponseCacheMixin.serve_cached."""
+    @wraps(method)
+    def wrapper(self, request, *args, **kwargs):
+        if not hasattr(self, "serve_cached"):
+            return method(self, request, *args, **kwargs)
+        return self.serve_cached(lambda *a, **kw: method(self, *a, **kw), request, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,280 @@
+"""
+In-process columnar snapshot of Region, CroppingStat and IrrigationArea.
+
+Each table is loaded once into NumPy arrays: one float64 array per numeric
+column (NaN for NULL), the state_ref key included, and dictionary-encoded
+text columns (an int32 code per row plus the list of distinct values).
+Region also carries its crops as one row-index array per crop key,
+mirroring RegionCrop. A snapshot is rebuilt the first time it is asked for
+after the table's data version (core.versions) changes, so writes never
+need to invalidate it by hand.
+
+Filters become boolean masks and aggregates reductions over the masked
+arrays; region_mask() and summarize_regions() mirror RegionViewSet's filters
+and live summary. NumPy is optional: without it available() is False and
+callers keep using the ORM.
+"""
+import math
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Sequence
+
+from django.conf import settings
+from django.db.models import F
+from django.db.models.functions import Coalesce
+from rest_framework.exceptions import ValidationError
+
+from . import geo, states, versions
+from .crops import crop_key
+from .mixins import SpatialFilterMixin
+from .models import CroppingStat, IrrigationArea, Region, RegionCrop
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional
+    np = None
+
+_lock = threading.Lock()
+_snapshots: Dict[type, "Table"] = {}
+
+
+def available() -> bool:
+    return np is not None and settings.COLUMNAR_ANALYTICS
+
+
+class Table:
+    """Column arrays of one model at one data version."""
+
+    def __init__(self, token: str, ids, numeric: Dict[str, "np.ndarray"], text: Dict[str, tuple]):
+        self.token = token
+        self.ids = ids
+        self.numeric = numeric
+        # column -> (codes, values, lower-cased value -> codes)
+        self.text = text
+        self.crop_rows: Dict[str, "np.ndarray"] = {}
+        self.crop_names: Dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def all(self) -> "np.ndarray":
+        return np.ones(len(self), dtype=bool)
+
+    def equals_ci(self, column: str, value: str) -> "np.ndarray":
+        """Rows whose text column equals `value` ignoring case (the `__lower` lookups)."""
+        codes, _, by_lower = self.text[column]
+        wanted = by_lower.get(value.lower())
+        if not wanted:
+            return np.zeros(len(self), dtype=bool)
+        return np.isin(codes, wanted)
+
+    def in_state(self, name: str) -> "np.ndarray":
+        """Rows in state `name`, selected as states.filter_state() selects them."""
+        state_id = states.resolver().resolve(name)
+        if state_id is None:
+            return self.equals_ci("state", name)
+        return self.numeric["state_ref_id"] == state_id
+
+
+def _encode(values: Sequence[str]) -> tuple:
+    distinct, codes = np.unique(np.asarray(values, dtype=object), return_inverse=True)
+    distinct = list(distinct)
+    by_lower: Dict[str, List[int]] = {}
+    for code, value in enumerate(distinct):
+        by_lower.setdefault(value.lower(), []).append(code)
+    return codes.astype(np.int32), distinct, by_lower
+
+
+def _float_column(values) -> "np.ndarray":
+    return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+
+
+def _load(model, token: str, numeric: Sequence[str], text: Sequence[str], qs=None) -> Table:
+    qs = (qs if qs is not None else model.objects.all()).order_by("pk")
+    rows = list(qs.values_list("pk", *numeric, *text))
+    columns = list(zip(*rows)) if rows else [()] * (1 + len(numeric) + len(text))
+    ids = np.array(columns[0], dtype=np.int64)
+    return Table(
+        token,
+        ids,
+        {name: _float_column(col) for name, col in zip(numeric, columns[1:1 + len(numeric)])},
+        {name: _encode(col) for name, col in zip(text, columns[1 + len(numeric):])},
+    )
+
+
+# Every table also loads its state_ref foreign key as a column (NaN where unresolved)
+REGION_NUMERIC = ("state_ref_id", "average_land_holding", "land_holding", "effective_land_holding",
+                  "irrigation_area", "rainfall", "yield_per_hectare", "latitude", "longitude")
+CROPPING_NUMERIC = ("state_ref_id", "total_geographical_area", "reporting_area", "forests",
+                    "not_available_for_cultivation", "permanent_pastures", "tree_crops_and_groves", "culturable_wasteland",
+                    "fallow_other_than_current", "current_fallows", "net_area_sown")
+IRRIGATION_NUMERIC = ("state_ref_id", "kharif_area", "rabi_area", "perennial_area", "others_area", "total_area")
+
+
+def _load_regions(token: str) -> Table:
+    qs = Region.objects.annotate(effective_land_holding=Coalesce(F("land_holding"), F("average_land_holding")))
+    table = _load(Region, token, REGION_NUMERIC, ("state", "irrigation_type"), qs)
+    position = {pk: i for i, pk in enumerate(table.ids.tolist())}
+    members: Dict[str, List[int]] = {}
+    for region_id, key, name in RegionCrop.objects.values_list("region_id", "crop__key", "crop__name").iterator(chunk_size=5000):
+        if region_id in position:
+            members.setdefault(key, []).append(position[region_id])
+            table.crop_names.setdefault(key, name)
+    table.crop_rows = {key: np.array(sorted(rows), dtype=np.int64) for key, rows in members.items()}
+    return table
+
+
+_LOADERS = {
+    Region: _load_regions,
+    CroppingStat: lambda token: _load(CroppingStat, token, CROPPING_NUMERIC, ("state", "category")),
+    IrrigationArea: lambda token: _load(IrrigationArea, token, IRRIGATION_NUMERIC, ("state",)),
+}
+
+
+def snapshot(model) -> Table:
+    """Current snapshot of `model`, rebuilt if its data version moved on."""
+    token = versions.token(model)
+    table = _snapshots.get(model)
+    if table is not None and table.token == token:
+        return table
+    with _lock:
+        table = _snapshots.get(model)
+        if table is None or table.token != token:
+            table = _LOADERS[model](token)
+            _snapshots[model] = table
+    return table
+
+
+def _number(params, name: str) -> Optional[float]:
+    raw = params.get(name)
+    if raw is None:
+        return None
+    try:
+        return float(raw)
+    except ValueError:
+        raise ValidationError({name: "Must be a number."})
+
+
+def _in_box(table: Table, bbox: geo.BBox) -> "np.ndarray":
+    west, south, east, north = bbox
+    lat, lon = table.numeric["latitude"], table.numeric["longitude"]
+    return (lat >= south) & (lat <= north) & (lon >= west) & (lon <= east)
+
+
+def _distance_km(table: Table, latitude: float, longitude: float) -> "np.ndarray":
+    """geo.distance_km() over the latitude/longitude columns."""
+    lat1, lon1 = math.radians(latitude), math.radians(longitude)
+    lat2 = np.radians(table.numeric["latitude"])
+    dlon = np.radians(table.numeric["longitude"]) - lon1
+    a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * geo.EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def region_mask(table: Table, params) -> "np.ndarray":
+    """Rows matching RegionViewSet.get_queryset()'s filters for `params`."""
+    mask = table.all()
+    if params.get("state"):
+        mask &= table.in_state(params["state"])
+    if params.get("irrigation_type"):
+        mask &= table.equals_ci("irrigation_type", params["irrigation_type"])
+    if params.get("crop"):
+        has_crop = np.zeros(len(table), dtype=bool)
+        has_crop[table.crop_rows.get(crop_key(params["crop"]), [])] = True
+        mask &= has_crop
+
+    # NaN compares false, so NULLs drop out exactly as they do in SQL
+    with np.errstate(invalid="ignore"):
+        for param, column, op in (
+            ("land_holding_min", "effective_land_holding", np.greater_equal),
+            ("land_holding_max", "effective_land_holding", np.less_equal),
+            ("irrigation_area_min", "irrigation_area", np.greater_equal),
+            ("irrigation_area_max", "irrigation_area", np.less_equal),
+            ("rainfall_min", "rainfall", np.greater_equal),
+            ("rainfall_max", "rainfall", np.less_equal),
+        ):
+            value = _number(params, param)
+            if value is not None:
+                mask &= op(table.numeric[column], value)
+
+        bbox, near = SpatialFilterMixin.get_spatial_filters(params)
+        if bbox:
+            mask &= _in_box(table, bbox)
+        if near:
+            lat, lon, radius = near
+            mask &= _in_box(table, geo.radius_bbox(lat, lon, radius))
+            mask &= _distance_km(table, lat, lon) <= radius
+    return mask
+
+
+def _nan_stat(fn, values) -> Optional[float]:
+    values = values[~np.isnan(values)]
+    return float(fn(values)) if len(values) else None
+
+
+def summarize_regions(table: Table, mask) -> dict:
+    """The live /api/regions/summary/ payload for the rows in `mask`."""
+    n = table.numeric
+    land_holding = n["land_holding"][mask]
+    avg_land_holding = _nan_stat(np.mean, land_holding)
+    if avg_land_holding is None:
+        # Use legacy average if new is null
+        avg_land_holding = _nan_stat(np.mean, n["average_land_holding"][mask])
+
+    top_irrigation = None
+    codes = table.text["irrigation_type"][0][mask]
+    if len(codes):
+        # argmax returns the lowest code on ties, i.e. the first name in sort order
+        top_irrigation = table.text["irrigation_type"][1][int(np.argmax(np.bincount(codes)))]
+
+    crop_counts = Counter()
+    for key, rows in table.crop_rows.items():
+        count = int(np.count_nonzero(mask[rows]))
+        if count:
+            crop_counts[table.crop_names[key]] += count
+    top_crops = sorted(crop_counts.items(), key=lambda x: (-x[1], x[0]))[:5]
+
+    return {
+        "count": int(np.count_nonzero(mask)),
+        "avg_land_holding": avg_land_holding,
+        "min_land_holding": _nan_stat(np.min, land_holding),
+        "max_land_holding": _nan_stat(np.max, land_holding),
+        "avg_rainfall": _nan_stat(np.mean, n["rainfall"][mask]),
+        "total_irrigation_area": _nan_stat(np.mean, n["irrigation_area"][mask]),
+        "top_irrigation_type": top_irrigation,
+        "top_crops": [c for c, _ in top_crops],
+    }
+
+
+def group_sum(table: Table, key: str, column: str, mask=None) -> Dict[str, float]:
+    """SUM(column) GROUP BY key over the masked rows, NULLs ignored."""
+    codes, values, _ = table.text[key]
+    data = table.numeric[column]
+    keep = ~np.isnan(data) if mask is None else mask & ~np.isnan(data)
+    sums = np.bincount(codes[keep], weights=data[keep], minlength=len(values))
+    present = np.bincount(codes[keep], minlength=len(values)) > 0
+    return {values[i]: float(sums[i]) for i in np.flatnonzero(present)}
+
+
+def state_aggregates(table: Table, specs: Dict[str, tuple], mask=None) -> Dict[int, Dict[str, Optional[float]]]:
+    """
+    Per state_ref id, {name: value} for specs of name -> (fn, column) with
+    fn "sum", "mean" or "count", over the masked rows. NULLs are ignored as
+    SQL's SUM/AVG/COUNT(column) do; rows without a state are left out.
+    """
+    state_ids = table.numeric["state_ref_id"]
+    keep = ~np.isnan(state_ids) if mask is None else mask & ~np.isnan(state_ids)
+    ids, index = np.unique(state_ids[keep].astype(np.int64), return_inverse=True)
+    result: Dict[int, Dict[str, Optional[float]]] = {int(pk): {} for pk in ids}
+    for name, (fn, column) in specs.items():
+        data = table.numeric[column][keep]
+        present = ~np.isnan(data)
+        counts = np.bincount(index[present], minlength=len(ids))
+        sums = np.bincount(index[present], weights=data[present], minlength=len(ids))
+        for i, pk in enumerate(ids.tolist()):
+            if fn == "count":
+                result[pk][name] = int(counts[i])
+            elif not counts[i]:
+                result[pk][name] = None
+            else:
+                result[pk][name] = float(sums[i] if fn == "sum" else sums[i] / counts[i])
+    return result
@@ -0,0 +1,55 @@
+"""
+Normalized crop index over Region.dominant_crops.
+
+dominant_crops stays the source of truth (a comma-separated string); Crop and
+RegionCrop mirror it so crop filters are an indexed join on Crop.key and crop
+frequencies are a single GROUP BY.
+"""
+from typing import Dict, Iterable, List, Optional
+
+from django.db import transaction
+
+from .models import Crop, Region, RegionCrop
+
+
+def crop_key(name: str) -> str:
+    return name.strip().lower()
+
+
+def split_crops(value: Optional[str]) -> List[str]:
+    """Split a dominant_crops string into distinct crop names, keeping first-seen order."""
+    if not value:
+        return []
+    seen: Dict[str, str] = {}
+    for c in [x.strip() for x in value.split(",") if x.strip()]:
+        seen.setdefault(crop_key(c), c)
+    return list(seen.values())
+
+
+def ensure_crops(names: Iterable[str]) -> Dict[str, int]:
+    """Return crop key -> Crop id for the given names, creating missing Crop rows."""
+    wanted = {crop_key(n): n.strip() for n in names}
+    if not wanted:
+        return {}
+    ids = dict(Crop.objects.filter(key__in=wanted).values_list("key", "id"))
+    missing = [Crop(key=k, name=n) for k, n in wanted.items() if k not in ids]
+    if missing:
+        Crop.objects.bulk_create(missing, ignore_conflicts=True)
+        ids.update(Crop.objects.filter(key__in=[c.key for c in missing]).values_list("key", "id"))
+    return ids
+
+
+def sync_region_crops(regions: Iterable[Region]) -> None:
+    """Rewrite the RegionCrop links of the given saved regions from their dominant_crops."""
+    regions = [r for r in regions if r.pk is not None]
+    if not regions:
+        return
+    parsed = {r.pk: split_crops(r.dominant_crops) for r in regions}
+    with transaction.atomic():
+        ids = ensure_crops(n for names in parsed.values() for n in names)
+        RegionCrop.objects.filter(region_id__in=list(parsed)).delete()
+        RegionCrop.objects.bulk_create([
+            RegionCrop(region_id=pk, crop_id=ids[crop_key(n)])
+            for pk, names in parsed.items()
+            for n in names
+        ])
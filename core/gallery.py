@@ -0,0 +1,130 @@
+"""
+File handling for gallery items.
+
+Uploads of several images are written to storage concurrently and inserted
+with one bulk_create. Deletes remove the rows in one statement and leave
+unlinking the original and variant files to the background pool once the
+transaction commits, so the request never waits on the filesystem (or a
+remote storage backend). sweep_gallery_orphans reconciles whatever is left
+behind, e.g. by a crash between the two.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Optional, Set, Tuple
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+
+from .models import GalleryItem
+
+logger = logging.getLogger(__name__)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.GALLERY_WORKERS, thread_name_prefix="gallery"
+            )
+        return _executor
+
+
+def _run(fn, *args) -> None:
+    try:
+        fn(*args)
+    except Exception:
+        logger.exception("Background gallery task %s failed", getattr(fn, "__name__", fn))
+    finally:
+        connections.close_all()
+
+
+def in_background(fn, *args) -> None:
+    """Run fn(*args) on the gallery worker pool once the current transaction commits."""
+    transaction.on_commit(lambda: _get_executor().submit(_run, fn, *args))
+
+
+def save_uploads(files) -> List[str]:
+    """Write uploaded files to storage in parallel; returns their storage names in order."""
+    field = GalleryItem._meta.get_field("image")
+
+    def save(f):
+        return field.storage.save(field.generate_filename(None, f.name), f)
+
+    files = list(files)
+    if len(files) == 1:
+        return [save(files[0])]
+    with ThreadPoolExecutor(max_workers=min(len(files), settings.GALLERY_WORKERS)) as pool:
+        return list(pool.map(save, files))
+
+
+def create_items(category: str, files, description: str = "") -> List[GalleryItem]:
+    from . import thumbnails
+
+    names = save_uploads(files)
+    try:
+        items = GalleryItem.objects.bulk_create(
+            GalleryItem(category=category, image=name, description=description) for name in names
+        )
+    except Exception:
+        delete_files(names)
+        raise
+    for item in items:
+        thumbnails.schedule(item)
+    return items
+
+
+def item_files(image: str, variants: Optional[dict]) -> List[str]:
+    from .thumbnails import variant_files
+
+    return ([image] if image else []) + variant_files(variants or {})
+
+
+def delete_files(names: Iterable[str], storage=default_storage) -> None:
+    for name in names:
+        try:
+            storage.delete(name)
+        except OSError as exc:
+            logger.warning("Cannot delete gallery file %s: %s", name, exc)
+
+
+def delete_items(queryset) -> int:
+    """
+    Delete the matched items in one statement; their files are unlinked in
+    the background after commit. Returns the number of rows deleted.
+    """
+    with transaction.atomic():
+        rows = list(queryset.values_list("pk", "image", "variants"))
+        if not rows:
+            return 0
+        deleted, _ = GalleryItem.objects.filter(pk__in=[pk for pk, _, _ in rows]).delete()
+        names = [name for _, image, variants in rows for name in item_files(image, variants)]
+        in_background(delete_files, names)
+    return deleted
+
+
+def referenced_files() -> Tuple[Set[str], Set[str]]:
+    """Storage names of the originals and of the variants the table points at."""
+    from .thumbnails import variant_files
+
+    originals: Set[str] = set()
+    derived: Set[str] = set()
+    for image, variants in GalleryItem.objects.values_list("image", "variants").iterator(chunk_size=2000):
+        if image:
+            originals.add(image)
+        derived.update(variant_files(variants or {}))
+    return originals, derived
+
+
+def stored_files(directory: str = "gallery", storage=default_storage) -> Set[str]:
+    """Storage names of the files under `directory` (not recursive, as upload_to is flat)."""
+    try:
+        _, files = storage.listdir(directory)
+    except FileNotFoundError:
+        return set()
+    return {f"{directory}/{name}" for name in files}
@@ -0,0 +1,118 @@
+"""
+Geohash spatial index for the latitude/longitude columns.
+
+Region, CroppingStat and IrrigationArea keep a `geohash` column (indexed)
+in step with their coordinates: a pre_save signal covers model saves and
+BulkUpserter covers bulk writes. A bounding box is answered by covering it
+with a few geohash cells and turning each cell into a range on the index
+(geohash >= cell AND geohash < cell + "~"), followed by an exact
+latitude/longitude check on the candidate rows only.
+"""
+import math
+from typing import List, Optional, Tuple
+
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import ASin, Cos, Power, Radians, Sin, Sqrt
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+PRECISION = 9  # about 5 m x 5 m cells
+EARTH_RADIUS_KM = 6371.0088
+
+# A bounding box is covered by at most this many geohash ranges
+MAX_COVER_CELLS = 32
+
+BBox = Tuple[float, float, float, float]  # (west, south, east, north)
+
+
+def encode(latitude: Optional[float], longitude: Optional[float], precision: int = PRECISION) -> str:
+    """Geohash of a point; empty when either coordinate is missing."""
+    if latitude is None or longitude is None:
+        return ""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars = []
+    bits, bit_count, even = 0, 0, True
+    while len(chars) < precision:
+        rng, value = (lon_range, longitude) if even else (lat_range, latitude)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            bits = bits * 2 + 1
+            rng[0] = mid
+        else:
+            bits = bits * 2
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(BASE32[bits])
+            bits, bit_count = 0, 0
+    return "".join(chars)
+
+
+def cell_size(precision: int) -> Tuple[float, float]:
+    """(width, height) in degrees of a geohash cell."""
+    lon_bits = math.ceil(precision * 5 / 2)
+    lat_bits = precision * 5 // 2
+    return 360.0 / 2 ** lon_bits, 180.0 / 2 ** lat_bits
+
+
+def cover(bbox: BBox, max_cells: int = MAX_COVER_CELLS) -> List[str]:
+    """
+    Geohash prefixes whose cells together cover `bbox`, using the finest
+    precision that needs no more than `max_cells` of them. An empty list
+    means the box is too large to narrow down.
+    """
+    west, south, east, north = bbox
+    best: List[str] = []
+    for precision in range(1, PRECISION + 1):
+        width, height = cell_size(precision)
+        x0, x1 = math.floor((west + 180) / width), math.floor((east + 180) / width)
+        y0, y1 = math.floor((south + 90) / height), math.floor((north + 90) / height)
+        if (x1 - x0 + 1) * (y1 - y0 + 1) > max_cells:
+            break
+        best = sorted({
+            encode(min(90.0, -90 + (y + 0.5) * height), min(180.0, -180 + (x + 0.5) * width), precision)
+            for x in range(x0, x1 + 1)
+            for y in range(y0, y1 + 1)
+        })
+    return best
+
+
+def bbox_q(bbox: BBox) -> Q:
+    """Filter for rows inside `bbox` that the geohash index can answer."""
+    west, south, east, north = bbox
+    q = Q()
+    cells = cover(bbox)
+    if cells:
+        q = Q(pk__in=[])
+        for cell in cells:
+            q |= Q(geohash__gte=cell, geohash__lt=cell + "~")
+    return q & Q(latitude__gte=south, latitude__lte=north, longitude__gte=west, longitude__lte=east)
+
+
+def radius_bbox(latitude: float, longitude: float, radius_km: float) -> BBox:
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    # Widen the longitude span towards the poles; clamp to the whole globe there
+    cos_lat = math.cos(math.radians(min(89.9, abs(latitude) + dlat)))
+    dlon = min(180.0, dlat / cos_lat)
+    return (
+        max(-180.0, longitude - dlon),
+        max(-90.0, latitude - dlat),
+        min(180.0, longitude + dlon),
+        min(90.0, latitude + dlat),
+    )
+
+
+def distance_km(latitude: float, longitude: float):
+    """Haversine distance expression from (latitude, longitude) to each row."""
+    lat1, lon1 = math.radians(latitude), math.radians(longitude)
+    dlat = Radians(F("latitude")) - Value(lat1)
+    dlon = Radians(F("longitude")) - Value(lon1)
+    a = (
+        Power(Sin(dlat / 2), 2)
+        + Value(math.cos(lat1)) * Cos(Radians(F("latitude"))) * Power(Sin(dlon / 2), 2)
+    )
+    return Value(2 * EARTH_RADIUS_KM) * ASin(Sqrt(a), output_field=FloatField())
+
+
+def set_geohash(obj) -> None:
+    obj.geohash = encode(obj.latitude, obj.longitude)
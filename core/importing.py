@@ -0,0 +1,340 @@
+"""
+Bulk upsert pipeline shared by the import_* management commands.
+
+BulkUpserter buffers incoming rows and writes them in batches: it looks up
+the pks of the batch's keys in one query, then new keys go through
+bulk_create and known keys through bulk_update (grouped by the set of
+fields each row actually carries, so absent values never overwrite stored
+ones).
+
+JSONTableReader / NDJSONTableReader parse data.gov.in style
+{"fields": [...], "data": [[...], ...]} payloads incrementally, so rows
+reach the upserter while the file is still being read.
+"""
+import json
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, TextIO, Tuple
+
+from django.db.models import Model
+
+from . import crops, geo, summary, versions
+from .models import Region
+from .states import StateResolver
+
+Row = Dict[str, Any]
+
+READ_CHUNK_SIZE = 64 * 1024
+
+# Largest single JSON value (one row, or the fields list) the reader will buffer
+MAX_VALUE_SIZE = 8 * 1024 * 1024
+
+
+class JSONTableReader:
+    """
+    Incremental reader for {"fields": [...], "data": [[...], ...]}.
+
+    read_fields() consumes the object up to the start of the "data" array
+    (which must come after "fields"); rows() then decodes one row at a time
+    from a fixed-size read buffer. A value still incomplete after
+    max_value_size characters is reported as invalid JSON rather than
+    buffered until the end of the file.
+    """
+
+    def __init__(self, fp: TextIO, chunk_size: int = READ_CHUNK_SIZE, max_value_size: int = MAX_VALUE_SIZE):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.max_value_size = max_value_size
+        self.buf = ""
+        self.pos = 0
+        # UTF-8 bytes of input dropped from the front of buf, for error offsets
+        self.consumed = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+        self.fields: Optional[List[Dict[str, Any]]] = None
+        self._at_data = False
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.fp.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.consumed += len(self.buf[:self.pos].encode("utf-8"))
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def byte_offset(self, pos: int) -> int:
+        """Offset in the input of buf[pos], in UTF-8 bytes."""
+        return self.consumed + len(self.buf[:pos].encode("utf-8"))
+
+    def _peek(self) -> str:
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos].isspace():
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def _expect(self, char: str) -> None:
+        found = self._peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} but found {found or 'end of input'!r} "
+                             f"at byte {self.byte_offset(self.pos)}")
+        self.pos += 1
+
+    def _value(self) -> Any:
+        self._peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError as exc:
+                if len(self.buf) - self.pos > self.max_value_size:
+                    raise ValueError(f"Invalid JSON at byte {self.byte_offset(self.pos)}: "
+                                     f"no complete value within {self.max_value_size} characters") from None
+                if self._fill():
+                    continue
+                raise ValueError(f"Invalid JSON at byte {self.byte_offset(exc.pos)}: {exc.msg}") from None
+            # A number at the end of the buffer may continue in the next chunk
+            if end == len(self.buf) and self._fill():
+                continue
+            self.pos = end
+            return value
+
+    def read_fields(self) -> Optional[List[Dict[str, Any]]]:
+        if self._at_data or self.fields is not None:
+            return self.fields
+        self._expect("{")
+        while self._peek() not in ("}", ""):
+            key = self._value()
+            self._expect(":")
+            if key == "data":
+                if self.fields is None:
+                    raise ValueError("'fields' must come before 'data' to stream the file")
+                self._at_data = True
+                return self.fields
+            value = self._value()
+            if key == "fields":
+                self.fields = value
+            if self._peek() == ",":
+                self.pos += 1
+        return self.fields
+
+    def rows(self) -> Iterator[List[Any]]:
+        self.read_fields()
+        if not self._at_data:
+            return
+        self._expect("[")
+        if self._peek() == "]":
+            return
+        while True:
+            yield self._value()
+            char = self._peek()
+            if char == "]":
+                self.pos += 1
+                return
+            self._expect(",")
+
+
+class NDJSONTableReader:
+    """
+    Line-oriented variant: the first line is {"fields": [...]} (or the bare
+    fields list) and every following non-blank line is one row array.
+    """
+
+    def __init__(self, fp: TextIO):
+        self.fp = fp
+        self.fields: Optional[List[Dict[str, Any]]] = None
+
+    def read_fields(self) -> Optional[List[Dict[str, Any]]]:
+        if self.fields is None:
+            for line in self.fp:
+                if line.strip():
+                    header = json.loads(line)
+                    self.fields = header.get("fields") if isinstance(header, dict) else header
+                    break
+        return self.fields
+
+    def rows(self) -> Iterator[List[Any]]:
+        self.read_fields()
+        for line in self.fp:
+            if line.strip():
+                yield json.loads(line)
+
+
+def table_reader(fp: TextIO, fmt: str = "json"):
+    return NDJSONTableReader(fp) if fmt == "ndjson" else JSONTableReader(fp)
+
+
+class ImportStats:
+    def __init__(self):
+        self.created = 0
+        self.updated = 0
+        self.skipped = 0
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    @property
+    def total(self) -> int:
+        return self.created + self.updated + self.skipped
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.total / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self):
+        return (
+            f"created: {self.created}, updated: {self.updated}, skipped: {self.skipped} "
+            f"in {self.elapsed:.2f}s ({self.rows_per_sec:.0f} rows/sec)"
+        )
+
+
+class BulkUpserter:
+    """
+    Insert-or-update rows of `model` keyed on `key_fields`.
+
+    update_fields limits what is written for existing keys (default: every
+    non-key field present in the row); update_existing=False leaves existing
+    rows untouched. before_write(to_create, to_update) and
+    after_write(created, updated) run around each batch, since bulk writes
+    skip model signals. state_centroids=True fills missing coordinates from
+    the row's State centroid.
+    """
+
+    def __init__(
+        self,
+        model: type,
+        key_fields: Sequence[str],
+        update_fields: Optional[Sequence[str]] = None,
+        batch_size: int = 1000,
+        update_existing: bool = True,
+        before_write: Optional[Callable[[List[Model], List[Model]], None]] = None,
+        after_write: Optional[Callable[[List[Model], List[Model]], None]] = None,
+        state_centroids: bool = False,
+    ):
+        self.model = model
+        self.key_fields = tuple(key_fields)
+        self.update_fields = tuple(update_fields) if update_fields is not None else None
+        self.batch_size = batch_size
+        self.update_existing = update_existing
+        self.before_write = before_write
+        self.after_write = after_write
+        self.stats = ImportStats()
+        # Bulk writes skip the pre_save signal that maintains the geohash column
+        self.track_geohash = any(f.name == "geohash" for f in model._meta.concrete_fields)
+        # ...and the one that resolves state_ref; every row of the import shares one resolver
+        self.states = StateResolver.load() if any(f.name == "state_ref" for f in model._meta.concrete_fields) else None
+        self.state_centroids = state_centroids
+        self._pending: Dict[Tuple, Row] = {}
+
+    def resolve_state(self, row: Row) -> None:
+        state_id = self.states.resolve(row.get("state"))
+        row["state_ref_id"] = state_id
+        if (self.state_centroids and state_id in self.states.centroids
+                and row.get("latitude") is None and row.get("longitude") is None):
+            row["latitude"], row["longitude"] = self.states.centroids[state_id]
+
+    def key_for(self, row: Row) -> Tuple:
+        return tuple(row[f] for f in self.key_fields)
+
+    def existing_pks(self, keys: Sequence[Tuple]) -> Dict[Tuple, Any]:
+        """key -> pk of the stored rows among `keys`, in one query on the first key field."""
+        first = self.key_fields[0]
+        rows = self.model.objects.filter(**{f"{first}__in": {key[0] for key in keys}}).values_list(*self.key_fields, "pk")
+        wanted = set(keys)
+        found = {}
+        for *key, pk in rows:
+            if tuple(key) in wanted:
+                found[tuple(key)] = pk
+        return found
+
+    def add(self, row: Row) -> None:
+        key = self.key_for(row)
+        if key in self._pending:
+            # Same key twice in one batch: the later row wins
+            self.stats.skipped += 1
+        self._pending[key] = row
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def add_many(self, rows: Iterable[Row]) -> None:
+        for row in rows:
+            self.add(row)
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        to_create: List[Model] = []
+        to_update: Dict[Tuple[str, ...], List[Model]] = {}
+        existing = self.existing_pks(list(self._pending))
+        for key, row in self._pending.items():
+            if self.states is not None:
+                self.resolve_state(row)
+            pk = existing.get(key)
+            if pk is None:
+                obj = self.model(**row)
+                if self.track_geohash:
+                    geo.set_geohash(obj)
+                to_create.append(obj)
+            elif self.update_existing:
+                fields = {
+                    f for f in row
+                    if f not in self.key_fields and (self.update_fields is None or f in self.update_fields)
+                }
+                obj = self.model(pk=pk, **row)
+                if self.track_geohash and {"latitude", "longitude"} <= fields:
+                    geo.set_geohash(obj)
+                    fields.add("geohash")
+                if self.states is not None:
+                    fields.add("state_ref_id")
+                to_update.setdefault(tuple(sorted(fields)), []).append(obj)
+            else:
+                self.stats.skipped += 1
+        self._pending = {}
+
+        updated = [obj for objs in to_update.values() for obj in objs]
+        if self.before_write:
+            self.before_write(to_create, updated)
+        if to_create:
+            created = self.model.objects.bulk_create(to_create, batch_size=self.batch_size)
+            self.stats.created += len(created)
+        for fields, objs in to_update.items():
+            if fields:
+                self.model.objects.bulk_update(objs, fields, batch_size=self.batch_size)
+        self.stats.updated += len(updated)
+        if to_create or updated:
+            # bulk_create/bulk_update send no model signals
+            versions.bump(self.model)
+        if self.after_write:
+            self.after_write(to_create, updated)
+
+    def finish(self) -> ImportStats:
+        self.flush()
+        self.stats.elapsed = time.perf_counter() - self.stats.started
+        return self.stats
+
+
+def region_upserter(key_fields: Sequence[str] = ("name", "state"), **kwargs) -> BulkUpserter:
+    """
+    BulkUpserter for Region that keeps the crop index and summary rollup in
+    step with each batch. Use inside summary.deferred_refresh() so every
+    touched group is recomputed once at the end of the import.
+    """
+    def before_write(to_create: List[Region], to_update: List[Region]) -> None:
+        if to_update:
+            # Rows may move out of their current (state, irrigation_type) group
+            summary.mark_dirty(*Region.objects.filter(pk__in=[r.pk for r in to_update])
+                               .values_list("state", "irrigation_type").distinct())
+
+    def after_write(created: List[Region], updated: List[Region]) -> None:
+        # Update instances only carry the written fields; re-read the rest
+        if updated:
+            updated = list(Region.objects.filter(pk__in=[r.pk for r in updated])
+                           .only("state", "irrigation_type", "dominant_crops"))
+        written = created + updated
+        crops.sync_region_crops(written)
+        summary.mark_dirty(*{(r.state, r.irrigation_type) for r in written})
+
+    return BulkUpserter(Region, key_fields, before_write=before_write, after_write=after_write, **kwargs)
@@ -0,0 +1,151 @@
+import asyncio
+import time
+from itertools import count
+from statistics import quantiles
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+# Sync API path -> its async counterpart (core.async_views)
+PATHS: List[Tuple[str, str]] = [
+    ("/api/regions/", "/api/async/regions/"),
+    ("/api/regions/summary/?rainfall_min=500", "/api/async/regions/summary/?rainfall_min=500"),
+    ("/api/cropping-stats/", "/api/async/cropping-stats/"),
+    ("/api/irrigation-areas/", "/api/async/irrigation-areas/"),
+]
+
+
+async def _read_body(reader: asyncio.StreamReader, headers: Dict[str, str]) -> Tuple[int, bool]:
+    """Read one response body; returns (bytes read, whether the connection can be reused)."""
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        size = 0
+        while True:
+            length = int((await reader.readline()).split(b";")[0], 16)
+            if length == 0:
+                await reader.readline()
+                return size, True
+            size += len((await reader.readexactly(length + 2))) - 2
+    if "content-length" in headers:
+        size = int(headers["content-length"])
+        await reader.readexactly(size)
+        return size, headers.get("connection", "").lower() != "close"
+    return len(await reader.read()), False
+
+
+class Connection:
+    """One keep-alive HTTP/1.1 connection, reopened whenever the server closes it."""
+
+    def __init__(self, host: str, port: int):
+        self.host, self.port = host, port
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def get(self, target: str) -> int:
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        self.writer.write(
+            f"GET {target} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+            f"Accept: application/json\r\nAccept-Encoding: identity\r\n\r\n".encode()
+        )
+        await self.writer.drain()
+        status = int((await self.reader.readline()).split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        _, reusable = await _read_body(self.reader, headers)
+        if not reusable:
+            await self.close()
+        return status
+
+    async def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except OSError:
+                pass
+        self.reader = self.writer = None
+
+
+async def load(base_url: str, path: str, concurrency: int, total: int, cold: bool) -> dict:
+    """`total` GETs of `path` from `concurrency` connections at once."""
+    url = urlsplit(base_url)
+    host, port = url.hostname, url.port or 80
+    issued = count()
+    latencies: List[float] = []
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        conn = Connection(host, port)
+        try:
+            while next(issued) < total:
+                target = path
+                if cold:
+                    # A parameter no view reads makes every request miss the response cache
+                    target += ("&" if "?" in path else "?") + f"_nocache={time.perf_counter_ns()}"
+                start = time.perf_counter()
+                try:
+                    status = await conn.get(target)
+                except (OSError, asyncio.IncompleteReadError, ValueError, IndexError):
+                    errors += 1
+                    await conn.close()
+                    continue
+                latencies.append(time.perf_counter() - start)
+                if status != 200:
+                    errors += 1
+        finally:
+            await conn.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    cuts = quantiles(latencies, n=100) if len(latencies) > 1 else [latencies[0] if latencies else 0.0] * 99
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50": cuts[49] * 1000,
+        "p95": cuts[94] * 1000,
+        "p99": cuts[98] * 1000,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test the sync API on a WSGI server against its async counterparts (core.async_views) on an "
+        "ASGI server, at several concurrency levels: throughput, errors and latency percentiles. Start "
+        "both servers first, e.g. `gunicorn land_insights.wsgi -b 127.0.0.1:8000 -w 4 --threads 8` and "
+        "`uvicorn land_insights.asgi:application --port 8001 --workers 4`."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--wsgi", default="http://127.0.0.1:8000", help="Base URL of the WSGI server")
+        parser.add_argument("--asgi", default="http://127.0.0.1:8001", help="Base URL of the ASGI server")
+        parser.add_argument("--concurrency", type=int, nargs="+", default=[50, 200, 1000],
+                            help="Concurrent connections per run (default 50 200 1000)")
+        parser.add_argument("--requests", type=int, default=2000, help="Requests per run (default 2000)")
+        parser.add_argument("--cold", action="store_true",
+                            help="Bypass the response cache, so every request reads and serializes rows")
+
+    def handle(self, *args, **options):
+        for base in (options["wsgi"], options["asgi"]):
+            if urlsplit(base).scheme != "http":
+                raise CommandError(f"Only plain http:// servers are supported, got {base!r}")
+
+        mode = "cold" if options["cold"] else "cached"
+        for sync_path, async_path in PATHS:
+            self.stdout.write(self.style.MIGRATE_HEADING(f"{sync_path} vs {async_path} ({mode})"))
+            for concurrency in options["concurrency"]:
+                for label, base, path in (("wsgi", options["wsgi"], sync_path), ("asgi", options["asgi"], async_path)):
+                    result = asyncio.run(load(base, path, concurrency, options["requests"], options["cold"]))
+                    self.stdout.write(
+                        f"  {label} c={concurrency:<5} {result['rps']:8.1f} req/s  "
+                        f"p50 {result['p50']:7.1f} ms  p95 {result['p95']:7.1f} ms  p99 {result['p99']:7.1f} ms  "
+                        f"errors {result['errors']}"
+                    )
@@ -0,0 +1,119 @@
+import math
+import random
+import time
+from statistics import median
+from typing import Dict, List
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import RequestFactory
+from rest_framework.request import Request
+
+from core import columnar, scorecard
+from core.management.commands.benchmark_filters import CASES, Rollback, seed_synthetic_data
+from core.models import Region
+from core.views import RegionViewSet
+
+# Region filters from benchmark_filters that the column snapshot answers (not the spatial ones)
+FILTER_CASES: List[Dict[str, str]] = [
+    params for viewset, params in CASES
+    if viewset is RegionViewSet and not {"bbox", "near"} & set(params)
+] + [{"state": "punjab", "crop": "rice", "rainfall_min": "800"}]
+
+
+def orm_summary(params: Dict[str, str]) -> dict:
+    view = RegionViewSet.as_view({"get": "summary"}, columnar_summary=False,
+                                 cache_responses=False, conditional_responses=False)
+    return view(RequestFactory().get("/", params)).data
+
+
+def orm_ids(params: Dict[str, str]) -> List[int]:
+    view = RegionViewSet()
+    view.request = Request(RequestFactory().get("/", params))
+    view.format_kwarg = None
+    view.action = "list"
+    view.kwargs = {}
+    return sorted(view.get_queryset().values_list("pk", flat=True))
+
+
+def same(a, b) -> bool:
+    if isinstance(a, float) and isinstance(b, float):
+        return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-9)
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(same(a[k], b[k]) for k in a)
+    return a == b
+
+
+def timed(fn, repeat: int):
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        runs.append(time.perf_counter() - start)
+    return result, median(runs)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the NumPy column snapshot (core.columnar) with the ORM for every Region filter, the "
+        "live summary and the states scorecard, on N synthetic regions (rolled back afterwards): "
+        "matching rows, results and latency."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100000, help="Synthetic Region rows to seed (default 100000)")
+        parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case (default 5)")
+        parser.add_argument("--seed", type=int, default=42, help="Random seed for the synthetic data")
+
+    def handle(self, *args, **options):
+        if not columnar.available():
+            raise CommandError("NumPy is required (and COLUMNAR_ANALYTICS enabled) to benchmark core.columnar")
+        repeat = options["repeat"]
+        mismatches = []
+        try:
+            with transaction.atomic():
+                counts = seed_synthetic_data(random.Random(options["seed"]), options["rows"])
+                self.stdout.write("Seeded %d regions, %d cropping stats, %d irrigation areas." % counts)
+
+                start = time.perf_counter()
+                table = columnar.snapshot(Region)
+                self.stdout.write(f"Snapshot built in {(time.perf_counter() - start) * 1000:.0f} ms "
+                                  f"({len(table)} rows, {len(table.crop_rows)} crops)")
+
+                self.stdout.write(f"{'case':<55} {'rows':>7} {'orm ms':>9} {'numpy ms':>9} {'speedup':>8}  match")
+                for params in FILTER_CASES:
+                    label = "filter ?" + "&".join(f"{k}={v}" for k, v in params.items())
+                    expected, orm_s = timed(lambda: orm_ids(params), repeat)
+                    got, np_s = timed(lambda: sorted(table.ids[columnar.region_mask(table, params)].tolist()), repeat)
+                    if not self.report(label, len(expected), orm_s, np_s, expected == got):
+                        mismatches.append(label)
+
+                    if not any(params.get(p) for p in RegionViewSet.LIVE_SUMMARY_PARAMS):
+                        continue  # answered from the RegionSummary rollup, not live
+                    label = "summary ?" + "&".join(f"{k}={v}" for k, v in params.items())
+                    expected, orm_s = timed(lambda: orm_summary(params), repeat)
+                    got, np_s = timed(lambda: columnar.summarize_regions(table, columnar.region_mask(table, params)), repeat)
+                    if not self.report(label, expected["count"], orm_s, np_s, same(dict(expected), got)):
+                        mismatches.append(label)
+
+                # Cross-dataset per-state metrics: one SQL statement vs the three snapshots
+                expected, orm_s = timed(scorecard.from_database, repeat)
+                got, np_s = timed(scorecard.from_snapshot, repeat)
+                match = len(expected) == len(got) and all(same(a, b) for a, b in zip(
+                    sorted(expected, key=lambda r: r["id"]), sorted(got, key=lambda r: r["id"])))
+                if not self.report("states scorecard", len(expected), orm_s, np_s, match):
+                    mismatches.append("states scorecard")
+                raise Rollback
+        except Rollback:
+            pass
+
+        if mismatches:
+            raise CommandError("Column snapshot disagrees with the ORM for: " + ", ".join(mismatches))
+        self.stdout.write(self.style.SUCCESS("Column snapshot matches the ORM in every case."))
+
+    def report(self, label: str, rows: int, orm_s: float, np_s: float, match: bool) -> bool:
+        self.stdout.write(
+            f"{label[:55]:<55} {rows:>7} {orm_s * 1000:>9.2f} {np_s * 1000:>9.2f} "
+            f"{orm_s / np_s if np_s else 0:>7.1f}x  {'yes' if match else 'NO'}"
+        )
+        return match
@@ -0,0 +1,168 @@
+import random
+import time
+from statistics import median
+from typing import Dict, List, Tuple
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import RequestFactory
+from rest_framework.request import Request
+
+from core.crops import sync_region_crops
+from core.geo import encode, set_geohash
+from core.models import CroppingStat, IrrigationArea, Region
+from core.states import SEED_STATES, StateResolver
+from core.views import CroppingStatViewSet, IrrigationAreaViewSet, RegionViewSet
+
+
+IRRIGATION_TYPES = ["Canal", "Tube Well", "Drip", "Well", "Tank", "Sprinkler"]
+CROPS = ["Wheat", "Rice", "Sugarcane", "Cotton", "Coconut", "Jute", "Maize", "Millet", "Pulses", "Licorice"]
+CATEGORIES = ["Area", "Percentage to Geographical Area"]
+
+# (viewset, query params) pairs covering every filter parameter the list endpoints accept
+CASES: List[Tuple[type, Dict[str, str]]] = [
+    (RegionViewSet, {"state": "punjab"}),
+    (RegionViewSet, {"irrigation_type": "canal"}),
+    (RegionViewSet, {"state": "Punjab", "irrigation_type": "Canal"}),
+    (RegionViewSet, {"crop": "rice"}),
+    (RegionViewSet, {"land_holding_min": "4.5"}),
+    (RegionViewSet, {"land_holding_max": "0.5"}),
+    (RegionViewSet, {"irrigation_area_min": "4500"}),
+    (RegionViewSet, {"irrigation_area_max": "100"}),
+    (RegionViewSet, {"rainfall_min": "2400"}),
+    (RegionViewSet, {"rainfall_max": "500"}),
+    (RegionViewSet, {"bbox": "75,30,77,32"}),
+    (RegionViewSet, {"near": "31.15,75.34", "radius_km": "25"}),
+    (CroppingStatViewSet, {"state": "punjab"}),
+    (CroppingStatViewSet, {"category": "area"}),
+    (CroppingStatViewSet, {"state": "Punjab", "category": "Area"}),
+    (CroppingStatViewSet, {"bbox": "75,30,77,32"}),
+    (IrrigationAreaViewSet, {"state": "punjab"}),
+    (IrrigationAreaViewSet, {"near": "31.15,75.34", "radius_km": "100"}),
+]
+
+
+def seed_synthetic_data(rng: random.Random, rows: int) -> Tuple[int, int, int]:
+    """Bulk insert synthetic Region rows plus one CroppingStat/IrrigationArea set per state."""
+    states = list(SEED_STATES)
+    state_ids = StateResolver.load()
+    regions = []
+    for i in range(rows):
+        state = rng.choice(states)
+        lat, lon = SEED_STATES[state][0]
+        land_holding = round(rng.uniform(0.2, 5.0), 2)
+        regions.append(Region(
+            name=f"Synthetic {i}",
+            state=state,
+            state_ref_id=state_ids.resolve(state),
+            average_land_holding=land_holding,
+            land_holding=None if rng.random() < 0.1 else land_holding,
+            irrigation_type=rng.choice(IRRIGATION_TYPES),
+            dominant_crops=", ".join(rng.sample(CROPS, 2)),
+            rainfall=round(rng.uniform(300, 2500), 1),
+            yield_per_hectare=round(rng.uniform(1, 5), 2),
+            irrigation_area=round(rng.uniform(50, 5000), 1),
+            latitude=lat + rng.uniform(-1, 1),
+            longitude=lon + rng.uniform(-1, 1),
+        ))
+    for region in regions:
+        set_geohash(region)
+    regions = Region.objects.bulk_create(regions, batch_size=1000)
+    for i in range(0, len(regions), 1000):
+        sync_region_crops(regions[i:i + 1000])
+
+    stats = []
+    areas = []
+    for state in states:
+        lat, lon = SEED_STATES[state][0]
+        state_id = state_ids.resolve(state)
+        for category in CATEGORIES:
+            stats.append(CroppingStat(state=state, state_ref_id=state_id, category=category,
+                                      net_area_sown=rng.uniform(100, 20000),
+                                      latitude=lat, longitude=lon, geohash=encode(lat, lon)))
+        areas.append(IrrigationArea(state=state, state_ref_id=state_id, total_area=rng.uniform(1000, 1000000),
+                                    latitude=lat, longitude=lon, geohash=encode(lat, lon)))
+    CroppingStat.objects.bulk_create(stats)
+    IrrigationArea.objects.bulk_create(areas)
+    return rows, len(stats), len(areas)
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed N synthetic rows (rolled back afterwards) and report the EXPLAIN plan and latency "
+        "of every filter parameter on the Region, CroppingStat and IrrigationArea list endpoints."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10000, help="Synthetic Region rows to seed (default 10000)")
+        parser.add_argument("--repeat", type=int, default=5, help="Timed runs per filter (default 5)")
+        parser.add_argument("--seed", type=int, default=42, help="Random seed for the synthetic data")
+        parser.add_argument("--fail-on-scan", action="store_true",
+                            help="Exit with an error if any filter plan falls back to a full table scan")
+
+    def handle(self, *args, **options):
+        rows = options["rows"]
+        if rows <= 0:
+            raise CommandError("--rows must be positive")
+        self.rng = random.Random(options["seed"])
+
+        scans: List[str] = []
+        try:
+            with transaction.atomic():
+                counts = seed_synthetic_data(self.rng, rows)
+                self.stdout.write("Seeded %d regions, %d cropping stats, %d irrigation areas." % counts)
+                with connection.cursor() as cursor:
+                    cursor.execute("ANALYZE")
+                for viewset, params in CASES:
+                    label, plan, timings, count = self.run_case(viewset, params, options["repeat"])
+                    self.stdout.write(self.style.MIGRATE_HEADING(label))
+                    self.stdout.write(f"  rows: {count}  median: {median(timings) * 1000:.2f} ms  "
+                                      f"min: {min(timings) * 1000:.2f} ms")
+                    for line in plan.splitlines():
+                        self.stdout.write(f"  | {line}")
+                    if self.is_full_scan(plan, viewset.queryset.model._meta.db_table):
+                        scans.append(label)
+                raise Rollback
+        except Rollback:
+            pass
+
+        if scans:
+            msg = "Full table scan in: " + ", ".join(scans)
+            if options["fail_on_scan"]:
+                raise CommandError(msg)
+            self.stdout.write(self.style.WARNING(msg))
+        else:
+            self.stdout.write(self.style.SUCCESS("All filters use an index."))
+
+    def run_case(self, viewset, params: Dict[str, str], repeat: int):
+        view = viewset()
+        view.request = Request(RequestFactory().get("/", params))
+        view.format_kwarg = None
+        view.action = "list"
+        view.kwargs = {}
+        qs = view.get_queryset()
+
+        label = f"{viewset.__name__} ?" + "&".join(f"{k}={v}" for k, v in params.items())
+        plan = qs.explain()
+        timings = []
+        count = 0
+        for _ in range(repeat):
+            start = time.perf_counter()
+            count = len(list(qs.values_list("pk", flat=True)))
+            timings.append(time.perf_counter() - start)
+        return label, plan, timings, count
+
+    @staticmethod
+    def is_full_scan(plan: str, table: str) -> bool:
+        # SQLite reports "SCAN <table>" without "USING ... INDEX"; PostgreSQL reports "Seq Scan on <table>"
+        for line in plan.splitlines():
+            if f"Seq Scan on {table}" in line:
+                return True
+            words = line.replace("--", " ").split()
+            if "SCAN" in words and table in words and "INDEX" not in words:
+                return True
+        return False
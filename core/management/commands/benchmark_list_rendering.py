@@ -0,0 +1,72 @@
+import random
+import time
+from statistics import median
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import RequestFactory
+
+from core.management.commands.benchmark_filters import Rollback, seed_synthetic_data
+from core.views import CroppingStatViewSet, IrrigationAreaViewSet, RegionViewSet
+
+
+VIEWSETS = [RegionViewSet, CroppingStatViewSet, IrrigationAreaViewSet]
+
+
+def render_list(viewset, fast: bool) -> bytes:
+    view = viewset.as_view({"get": "list"}, fast_list=fast)
+    response = view(RequestFactory().get("/", HTTP_ACCEPT="application/json"))
+    if response.streaming:
+        return b"".join(response.streaming_content)
+    return response.render().content
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the serializer and fast .values() list paths for byte-identical output and latency "
+        "at one or more synthetic Region table sizes (rolled back afterwards)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000],
+                            help="Region table sizes to benchmark (default 10000 100000)")
+        parser.add_argument("--repeat", type=int, default=3, help="Timed runs per path (default 3)")
+        parser.add_argument("--seed", type=int, default=42, help="Random seed for the synthetic data")
+
+    def handle(self, *args, **options):
+        mismatches = []
+        for rows in options["rows"]:
+            try:
+                with transaction.atomic():
+                    seed_synthetic_data(random.Random(options["seed"]), rows)
+                    self.stdout.write(self.style.MIGRATE_HEADING(f"{rows} synthetic regions"))
+                    for viewset in VIEWSETS:
+                        if not self.compare(viewset, options["repeat"]):
+                            mismatches.append(f"{viewset.__name__} @ {rows}")
+                    raise Rollback
+            except Rollback:
+                pass
+
+        if mismatches:
+            raise CommandError("Fast path output differs from serializer output: " + ", ".join(mismatches))
+        self.stdout.write(self.style.SUCCESS("Fast path output is byte-identical in every case."))
+
+    def compare(self, viewset, repeat: int) -> bool:
+        timings = {}
+        bodies = {}
+        for fast in (False, True):
+            runs = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                bodies[fast] = render_list(viewset, fast)
+                runs.append(time.perf_counter() - start)
+            timings[fast] = median(runs)
+
+        identical = bodies[False] == bodies[True]
+        self.stdout.write(
+            f"  {viewset.__name__:<22} serializer: {timings[False] * 1000:9.1f} ms  "
+            f"fast: {timings[True] * 1000:9.1f} ms  "
+            f"speedup: {timings[False] / timings[True]:5.1f}x  "
+            f"bytes: {len(bodies[True])}  identical: {'yes' if identical else 'NO'}"
+        )
+        return identical
@@ -0,0 +1,60 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+
+from core import thumbnails
+from core.models import GalleryItem
+
+
+class Command(BaseCommand):
+    help = (
+        "Build the thumbnail and WebP/AVIF variants of gallery images that do not have them yet. "
+        "Images are resized in parallel worker processes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--category", choices=[c for c, _ in GalleryItem.CATEGORY_CHOICES],
+                            help="Only this gallery")
+        parser.add_argument("--force", action="store_true", help="Rebuild variants that already exist")
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 2,
+                            help="Worker processes (default: CPU count)")
+
+    def handle(self, *args, **options):
+        if not thumbnails.available():
+            raise CommandError("Pillow is required to build gallery variants (pip install Pillow)")
+
+        items = GalleryItem.objects.exclude(image="")
+        if options["category"]:
+            items = items.filter(category=options["category"])
+        todo = [
+            (pk, name) for pk, name, variants in items.values_list("pk", "image", "variants").iterator()
+            if options["force"] or (variants or {}).get("source") != name
+        ]
+        if not todo:
+            self.stdout.write("All gallery images already have their variants.")
+            return
+
+        built = failed = 0
+        started = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=max(1, min(options["workers"], len(todo))),
+                                 initializer=django.setup) as pool:
+            futures = {pool.submit(thumbnails.generate, name): (pk, name) for pk, name in todo}
+            for future in as_completed(futures):
+                pk, name = futures[future]
+                try:
+                    variants = future.result()
+                except Exception as exc:
+                    variants = {}
+                    self.stderr.write(f"{name}: {exc}")
+                if variants and thumbnails.store(pk, name, variants):
+                    built += 1
+                else:
+                    failed += 1
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Built variants for {built} of {len(todo)} gallery images in {elapsed:.2f}s. Skipped: {failed}."
+        ))
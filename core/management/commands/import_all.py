@@ -0,0 +1,195 @@
+import json
+import os
+import queue as queue_module
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import Manager
+from typing import Any, Dict, List
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core import summary as region_summary
+from core.importing import BulkUpserter, region_upserter, table_reader
+from core.management.commands import import_cropping_stats, import_irrigation_areas, import_regions
+from core.models import CroppingStat, IrrigationArea
+
+
+KINDS = ("cropping_stats", "irrigation_areas", "regions")
+
+
+def load_manifest(path: str) -> List[Dict[str, Any]]:
+    """
+    Read a manifest: a JSON list of {"kind": ..., "path": ...} entries, with
+    optional "format" (json/ndjson for the table kinds) and "update" (regions;
+    default false, like import_regions without --update). Relative paths are
+    resolved against the manifest's directory.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+    except (OSError, ValueError) as exc:
+        raise CommandError(f"Failed to read manifest: {exc}")
+    if not isinstance(entries, list) or not entries:
+        raise CommandError("Manifest must be a non-empty JSON list of {\"kind\", \"path\"} entries")
+
+    base = os.path.dirname(os.path.abspath(path))
+    for entry in entries:
+        if entry.get("kind") not in KINDS:
+            raise CommandError(f"Unknown kind {entry.get('kind')!r}; expected one of: {', '.join(KINDS)}")
+        if not entry.get("path"):
+            raise CommandError(f"Manifest entry has no path: {entry}")
+        entry["path"] = os.path.join(base, entry["path"])
+        if not os.path.exists(entry["path"]):
+            raise CommandError(f"File not found: {entry['path']}")
+        if entry["kind"] == "regions":
+            entry["update"] = bool(entry.get("update", False))
+        else:
+            entry.setdefault("format", "ndjson" if entry["path"].endswith(".ndjson") else "json")
+    return entries
+
+
+def _put(queue, abort, item) -> bool:
+    # Block while the writer is behind, but give up once it has aborted
+    while not abort.is_set():
+        try:
+            queue.put(item, timeout=0.5)
+            return True
+        except queue_module.Full:
+            continue
+    return False
+
+
+def parse_file(index: int, entry: Dict[str, Any], batch_size: int, queue, abort) -> None:
+    """
+    Worker process: parse one manifest file and send ("rows", index, batch)
+    messages to the writer, then ("done", index, rows, seconds) or
+    ("error", index, message). Never touches the database.
+    """
+    started = time.perf_counter()
+    count = 0
+    try:
+        if entry["kind"] == "regions":
+            f = open(entry["path"], "r", encoding="utf-8", newline="")
+            rows = import_regions.parse_csv(f)
+        else:
+            f = open(entry["path"], "r", encoding="utf-8")
+            module = import_cropping_stats if entry["kind"] == "cropping_stats" else import_irrigation_areas
+            rows = module.parse_table(table_reader(f, entry["format"]))
+        with f:
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    if not _put(queue, abort, ("rows", index, batch)):
+                        return
+                    count += len(batch)
+                    batch = []
+            if batch:
+                if not _put(queue, abort, ("rows", index, batch)):
+                    return
+                count += len(batch)
+    except Exception as exc:
+        _put(queue, abort, ("error", index, str(exc)))
+        return
+    _put(queue, abort, ("done", index, count, time.perf_counter() - started))
+
+
+class Command(BaseCommand):
+    help = (
+        "Import many cropping, irrigation and region files listed in a JSON manifest. Files are "
+        "parsed in parallel worker processes and written by a single writer in one transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("manifest", type=str, help="JSON list of {\"kind\", \"path\"[, \"format\", \"update\"]}")
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 2,
+                            help="Parser processes (default: CPU count)")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows per bulk write (default 1000)")
+
+    def handle(self, *args, **options):
+        entries = load_manifest(options["manifest"])
+        workers = max(1, min(options["workers"], len(entries)))
+        batch_size = options["batch_size"]
+
+        self.upserters: Dict[str, BulkUpserter] = {}
+        self.reports = [{"rows": 0, "parse": 0.0, "write": 0.0} for _ in entries]
+        started = time.perf_counter()
+
+        with Manager() as manager:
+            # Bounded so parsers cannot run arbitrarily far ahead of the writer
+            queue = manager.Queue(maxsize=workers * 4)
+            abort = manager.Event()
+            with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+                futures = [pool.submit(parse_file, i, entry, batch_size, queue, abort)
+                           for i, entry in enumerate(entries)]
+                try:
+                    with transaction.atomic(), region_summary.deferred_refresh():
+                        self.write(entries, queue, futures, batch_size)
+                        totals = {key: upserter.finish() for key, upserter in self.upserters.items()}
+                except BaseException:
+                    abort.set()
+                    raise
+
+        self.report(entries, totals, time.perf_counter() - started)
+
+    def upserter_for(self, kind: str, batch_size: int) -> BulkUpserter:
+        # One upserter per kind, so a key found in several files is inserted once
+        if kind not in self.upserters:
+            if kind == "regions":
+                self.upserters[kind] = region_upserter(batch_size=batch_size)
+            elif kind == "cropping_stats":
+                self.upserters[kind] = BulkUpserter(CroppingStat, import_cropping_stats.KEY_FIELDS,
+                                                    batch_size=batch_size, state_centroids=True)
+            else:
+                self.upserters[kind] = BulkUpserter(IrrigationArea, import_irrigation_areas.KEY_FIELDS,
+                                                    batch_size=batch_size, state_centroids=True)
+        return self.upserters[kind]
+
+    def write(self, entries, queue, futures, batch_size: int) -> None:
+        remaining = len(entries)
+        while remaining:
+            try:
+                message = queue.get(timeout=1)
+            except queue_module.Empty:
+                # A worker that died without reporting (e.g. killed) would otherwise hang the writer
+                for future in futures:
+                    if future.done() and future.exception():
+                        raise CommandError(f"Parser process failed: {future.exception()}")
+                continue
+
+            kind, index = message[0], message[1]
+            report = self.reports[index]
+            if kind == "rows":
+                start = time.perf_counter()
+                entry = entries[index]
+                upserter = self.upserter_for(entry["kind"], batch_size)
+                if entry["kind"] == "regions":
+                    # Each batch is flushed before the next, so the file's flag covers exactly its rows
+                    upserter.update_existing = entry["update"]
+                upserter.add_many(message[2])
+                upserter.flush()
+                report["write"] += time.perf_counter() - start
+            elif kind == "done":
+                report["rows"], report["parse"] = message[2], message[3]
+                remaining -= 1
+            else:
+                raise CommandError(f"{entries[index]['path']}: {message[2]}")
+
+    def report(self, entries, totals, elapsed: float) -> None:
+        self.stdout.write(f"{'file':<40} {'kind':<17} {'rows':>8} {'parse s':>8} {'write s':>8} {'rows/sec':>10}")
+        for entry, report in zip(entries, self.reports):
+            busy = max(report["parse"], report["write"])
+            rate = report["rows"] / busy if busy else 0.0
+            self.stdout.write(
+                f"{os.path.basename(entry['path']):<40} {entry['kind']:<17} {report['rows']:>8} "
+                f"{report['parse']:>8.2f} {report['write']:>8.2f} {rate:>10.0f}"
+            )
+        rows = sum(r["rows"] for r in self.reports)
+        created = sum(s.created for s in totals.values())
+        updated = sum(s.updated for s in totals.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {rows} rows from {len(entries)} files in {elapsed:.2f}s "
+            f"({rows / elapsed if elapsed else 0:.0f} rows/sec). Created: {created}. Updated: {updated}."
+        ))
@@ -1,12 +1,17 @@
+import http.client
 import json
+import os
+import threading
+import time
 import urllib.parse
-import urllib.request
-from typing import Dict, Any
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Any, List, Optional, Set
 
 from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
 
-from core.models import Region
+from core import summary as region_summary
+from core.importing import region_upserter
 
 
 BASE_URL = (
@@ -14,19 +19,111 @@ BASE_URL = (
 )
 
 
-def fetch_records(api_key: str, limit: int = 100, offset: int = 0) -> Dict[str, Any]:
-    params = {
-        "api-key": api_key,
-        "format": "json",
-        "limit": str(limit),
-        "offset": str(offset),
-    }
-    url = f"{BASE_URL}?{urllib.parse.urlencode(params)}"
-    with urllib.request.urlopen(url, timeout=30) as resp:
-        if resp.status != 200:
-            raise CommandError(f"HTTP {resp.status} from data.gov.in")
-        data = json.loads(resp.read().decode("utf-8"))
-        return data
+class PageFetcher:
+    """
+    Fetches data.gov.in pages over one keep-alive HTTP connection per worker
+    thread, retrying connection errors, 5xx and 429 responses with
+    exponential backoff.
+    """
+
+    def __init__(self, api_key: str, limit: int = 100, base_url: str = BASE_URL,
+                 retries: int = 3, backoff: float = 0.5, timeout: float = 30):
+        parts = urllib.parse.urlsplit(base_url)
+        self.connection_class = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+        self.netloc = parts.netloc
+        self.path = parts.path or "/"
+        self.api_key = api_key
+        self.limit = limit
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self) -> http.client.HTTPConnection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self.connection_class(self.netloc, timeout=self.timeout)
+            self._local.conn = conn
+        return conn
+
+    def _reset(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+        self._local.conn = None
+
+    def fetch(self, offset: int) -> Dict[str, Any]:
+        params = {
+            "api-key": self.api_key,
+            "format": "json",
+            "limit": str(self.limit),
+            "offset": str(offset),
+        }
+        url = f"{self.path}?{urllib.parse.urlencode(params)}"
+        error: Any = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(self.backoff * 2 ** (attempt - 1))
+            try:
+                conn = self._connection()
+                conn.request("GET", url, headers={"Accept": "application/json"})
+                resp = conn.getresponse()
+                body = resp.read()
+            except (OSError, http.client.HTTPException) as exc:
+                self._reset()
+                error = exc
+                continue
+            if resp.status == 200:
+                try:
+                    return json.loads(body.decode("utf-8"))
+                except ValueError as exc:
+                    error = exc
+                    continue
+            if resp.status != 429 and resp.status < 500:
+                raise CommandError(f"HTTP {resp.status} from data.gov.in")
+            error = f"HTTP {resp.status}"
+        raise CommandError(f"Giving up on offset {offset} after {self.retries + 1} attempts: {error}")
+
+    def close(self) -> None:
+        self._reset()
+
+
+def fetch_records(api_key: str, limit: int = 100, offset: int = 0, base_url: str = BASE_URL) -> Dict[str, Any]:
+    fetcher = PageFetcher(api_key, limit=limit, base_url=base_url)
+    try:
+        return fetcher.fetch(offset)
+    finally:
+        fetcher.close()
+
+
+class Checkpoint:
+    """Offsets already committed to the DB, persisted so an interrupted run can resume."""
+
+    def __init__(self, path: Optional[str], base_url: str, limit: int):
+        self.path = path
+        self.key = {"base_url": base_url, "limit": limit}
+        self.total: Optional[int] = None
+        self.done: Set[int] = set()
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            # A checkpoint from a different source or page size does not apply
+            if {k: state.get(k) for k in self.key} == self.key:
+                self.total = state.get("total")
+                self.done = set(state.get("done", []))
+
+    def mark_done(self, offset: int) -> None:
+        self.done.add(offset)
+        if not self.path:
+            return
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({**self.key, "total": self.total, "done": sorted(self.done)}, f)
+        os.replace(tmp, self.path)
+
+    def clear(self) -> None:
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
 
 
 class Command(BaseCommand):
@@ -35,31 +132,70 @@ class Command(BaseCommand):
     def add_arguments(self, parser):
         parser.add_argument("--api-key", required=True, help="data.gov.in API key")
         parser.add_argument("--limit", type=int, default=100, help="Page size (default 100)")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows per bulk write (default 1000)")
+        parser.add_argument("--base-url", default=BASE_URL, help="Resource URL (default: data.gov.in land holdings)")
+        parser.add_argument("--workers", type=int, default=4, help="Concurrent page fetches (default 4)")
+        parser.add_argument("--retries", type=int, default=3, help="Retries per page on transient errors (default 3)")
+        parser.add_argument("--backoff", type=float, default=0.5, help="Initial retry delay in seconds (default 0.5)")
+        parser.add_argument("--checkpoint", type=str,
+                            help="File recording committed offsets; an interrupted run resumes from it")
 
     def handle(self, *args, **options):
         api_key = options.get("api_key")
         limit = options["limit"]
+        workers = max(1, options["workers"])
+        fetcher = PageFetcher(api_key, limit=limit, base_url=options["base_url"],
+                              retries=options["retries"], backoff=options["backoff"])
+        checkpoint = Checkpoint(options.get("checkpoint"), options["base_url"], limit)
+        upserter = region_upserter(
+            # Existing rows only get their land holding refreshed
+            update_fields=("average_land_holding", "land_holding"),
+            batch_size=options["batch_size"],
+        )
 
-        # Fetch first page to get total
-        first = fetch_records(api_key, limit=limit, offset=0)
-        total = int(first.get("total", 0))
-        records = list(first.get("records", []))
-
-        # If more pages, fetch remaining
-        offset = len(records)
-        while offset < total:
-            page = fetch_records(api_key, limit=limit, offset=offset)
-            recs = page.get("records", [])
-            if not recs:
-                break
-            records.extend(recs)
-            offset += len(recs)
-
-        if not records:
+        imported = 0
+        try:
+            if checkpoint.total is None:
+                # Fetch first page to get total
+                first = fetcher.fetch(0)
+                checkpoint.total = int(first.get("total", 0))
+                imported += self.write_page(upserter, checkpoint, 0, first.get("records", []))
+            elif checkpoint.done:
+                self.stdout.write(f"Resuming: {len(checkpoint.done)} page(s) already imported.")
+
+            # Remaining pages are fetched concurrently and written as they arrive
+            pending = [o for o in range(0, checkpoint.total, limit) if o not in checkpoint.done]
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                in_flight = {}
+                while pending or in_flight:
+                    # Keep a bounded window so fetched pages never pile up ahead of the writer
+                    while pending and len(in_flight) < workers * 2:
+                        offset = pending.pop(0)
+                        in_flight[pool.submit(fetcher.fetch, offset)] = offset
+                    finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        offset = in_flight.pop(future)
+                        page = future.result()
+                        imported += self.write_page(upserter, checkpoint, offset, page.get("records", []))
+        finally:
+            fetcher.close()
+
+        stats = upserter.finish()
+        if not checkpoint.total:
             raise CommandError("No records returned from data.gov.in")
+        checkpoint.clear()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported states: {imported}. Created: {stats.created}. Updated: {stats.updated}. "
+                f"({stats.rows_per_sec:.0f} rows/sec)"
+            )
+        )
 
-        created, updated = 0, 0
-        with transaction.atomic():
+    def write_page(self, upserter, checkpoint: Checkpoint, offset: int, records: List[Dict[str, Any]]) -> int:
+        """Commit one page and record its offset in the checkpoint."""
+        count = 0
+        with transaction.atomic(), region_summary.deferred_refresh():
             for r in records:
                 state = r.get("state_uts")
                 latest = r.get("_2021_22")
@@ -72,8 +208,9 @@ class Command(BaseCommand):
                     lh_val = None
 
                 # We model one Region per state when importing this dataset
-                defaults = {
+                upserter.add({
                     "name": state,
+                    "state": state,
                     "average_land_holding": lh_val if lh_val is not None else 0.0,
                     "land_holding": lh_val,
                     "irrigation_type": "Unknown",
@@ -83,26 +220,8 @@ class Command(BaseCommand):
                     "irrigation_area": None,
                     "latitude": None,
                     "longitude": None,
-                }
-
-                obj, was_created = Region.objects.get_or_create(
-                    name=state,
-                    state=state,
-                    defaults=defaults,
-                )
-                if was_created:
-                    created += 1
-                else:
-                    # Update land holding fields on existing record
-                    obj.average_land_holding = defaults["average_land_holding"]
-                    obj.land_holding = defaults["land_holding"]
-                    obj.save()
-                    updated += 1
-
-        self.stdout.write(
-            self.style.SUCCESS(
-                f"Imported states: {len(records)}. Created: {created}. Updated: {updated}."
-            )
-        )
-
-
+                })
+                count += 1
+            upserter.flush()
+        checkpoint.mark_done(offset)
+        return count
@@ -1,11 +1,10 @@
-import json
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional
 
 from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
 
+from core.importing import BulkUpserter, table_reader
 from core.models import IrrigationArea
-from core.management.commands.seed_state_centroids import STATE_CENTROIDS
 
 
 def to_float(value: Optional[str]) -> Optional[float]:
@@ -20,73 +19,80 @@ def to_float(value: Optional[str]) -> Optional[float]:
         return None
 
 
+KEY_FIELDS = ("state",)
+
+REQUIRED_LABELS = [
+    "State",
+    "Actual area irrigated (Ha) - Kharif",
+    "Actual area irrigated (Ha) - Rabi",
+    "Actual area irrigated (Ha) - Perennial",
+    "Actual area irrigated (Ha) - Others",
+    "Total"
+]
+
+
+def parse_table(reader) -> Iterator[Dict[str, Any]]:
+    """
+    Validate the header and yield one IrrigationArea field dict per row.
+    Touches no database, so import_all can run it in a worker process.
+    """
+    fields: List[Dict[str, Any]] = reader.read_fields() or []
+    if not fields:
+        raise CommandError("JSON must include 'fields' and 'data'")
+
+    # Map labels to column indices for robust access
+    label_to_index: Dict[str, int] = {f["label"]: idx for idx, f in enumerate(fields)}
+
+    missing = [lab for lab in REQUIRED_LABELS if lab not in label_to_index]
+    if missing:
+        raise CommandError(f"Missing required labels: {', '.join(missing)}")
+
+    for row in reader.rows():
+        state = row[label_to_index["State"]]
+
+        values = {
+            "state": state,
+            "kharif_area": to_float(row[label_to_index["Actual area irrigated (Ha) - Kharif"]]),
+            "rabi_area": to_float(row[label_to_index["Actual area irrigated (Ha) - Rabi"]]),
+            "perennial_area": to_float(row[label_to_index["Actual area irrigated (Ha) - Perennial"]]),
+            "others_area": to_float(row[label_to_index["Actual area irrigated (Ha) - Others"]]),
+            "total_area": to_float(row[label_to_index["Total"]]),
+        }
+
+        yield values
+
+
 class Command(BaseCommand):
     help = "Import irrigation area statistics from a JSON payload/file matching the provided schema."
 
     def add_arguments(self, parser):
         parser.add_argument("--path", type=str, help="Path to JSON file; if omitted, reads from stdin")
+        parser.add_argument("--format", choices=["json", "ndjson"], default="json",
+                            help="json: {\"fields\": [...], \"data\": [...]} (parsed incrementally); "
+                                 "ndjson: a fields header line followed by one row array per line")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows per bulk write (default 1000)")
 
     def handle(self, *args, **options):
         path = options.get("path")
-        if path:
-            with open(path, "r", encoding="utf-8") as f:
-                payload = json.load(f)
-        else:
-            try:
-                payload = json.load(self.stdin)
-            except Exception as exc:
-                raise CommandError(f"Failed to read JSON from stdin: {exc}")
-
-        fields: List[Dict[str, Any]] = payload.get("fields") or []
-        data: List[List[Any]] = payload.get("data") or []
-        if not fields or not data:
-            raise CommandError("JSON must include 'fields' and 'data'")
-
-        # Map labels to column indices for robust access
-        label_to_index: Dict[str, int] = {f["label"]: idx for idx, f in enumerate(fields)}
-
-        required_labels = [
-            "State",
-            "Actual area irrigated (Ha) - Kharif",
-            "Actual area irrigated (Ha) - Rabi", 
-            "Actual area irrigated (Ha) - Perennial",
-            "Actual area irrigated (Ha) - Others",
-            "Total"
-        ]
-        missing = [lab for lab in required_labels if lab not in label_to_index]
-        if missing:
-            raise CommandError(f"Missing required labels: {', '.join(missing)}")
-
-        created = 0
-        updated = 0
+        try:
+            if path:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.import_table(table_reader(f, options["format"]), options)
+            else:
+                self.import_table(table_reader(self.stdin, options["format"]), options)
+        except ValueError as exc:
+            raise CommandError(f"Failed to read JSON: {exc}")
+
+    def import_table(self, reader, options):
         with transaction.atomic():
-            for row in data:
-                state = row[label_to_index["State"]]
-
-                defaults = {
-                    "kharif_area": to_float(row[label_to_index["Actual area irrigated (Ha) - Kharif"]]),
-                    "rabi_area": to_float(row[label_to_index["Actual area irrigated (Ha) - Rabi"]]),
-                    "perennial_area": to_float(row[label_to_index["Actual area irrigated (Ha) - Perennial"]]),
-                    "others_area": to_float(row[label_to_index["Actual area irrigated (Ha) - Others"]]),
-                    "total_area": to_float(row[label_to_index["Total"]]),
-                }
-
-                # Set coordinates from centroid helper if available
-                coords = STATE_CENTROIDS.get(state) or STATE_CENTROIDS.get(state.replace("&", "and"))
-                if coords:
-                    defaults["latitude"], defaults["longitude"] = coords
-
-                obj, was_created = IrrigationArea.objects.get_or_create(
-                    state=state, defaults=defaults
-                )
-                if not was_created:
-                    for k, v in defaults.items():
-                        setattr(obj, k, v)
-                    obj.save()
-                    updated += 1
-                else:
-                    created += 1
+            # Coordinates come from the State centroid the row's state resolves to
+            upserter = BulkUpserter(IrrigationArea, KEY_FIELDS, batch_size=options["batch_size"], state_centroids=True)
+            # Rows are streamed from the reader straight into the batch writer
+            upserter.add_many(parse_table(reader))
+            stats = upserter.finish()
+            if not stats.total:
+                raise CommandError("JSON must include 'fields' and 'data'")
 
         self.stdout.write(self.style.SUCCESS(
-            f"Imported {created + updated} IrrigationArea rows (created: {created}, updated: {updated})."
+            f"Imported {stats.created + stats.updated} IrrigationArea rows ({stats})."
         ))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core import summary as region_summary
+
+
+class Command(BaseCommand):
+    help = "Recompute the RegionSummary rollup used by /api/regions/summary/ from the Region table"
+
+    def handle(self, *args, **options):
+        groups = region_summary.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt region summary: {groups} state/irrigation-type groups"))
@@ -1,4 +1,5 @@
 from django.core.management.base import BaseCommand
+from core import summary as region_summary
 from core.models import Region
 
 
@@ -76,17 +77,18 @@ class Command(BaseCommand):
 
     def handle(self, *args, **options):
         created = 0
-        for data in SAMPLES:
-            obj, was_created = Region.objects.get_or_create(
-                name=data["name"], state=data["state"], defaults=data
-            )
-            if was_created:
-                created += 1
-            else:
-                # Update existing with latest defaults
-                for k, v in data.items():
-                    setattr(obj, k, v)
-                obj.save()
+        with region_summary.deferred_refresh():
+            for data in SAMPLES:
+                obj, was_created = Region.objects.get_or_create(
+                    name=data["name"], state=data["state"], defaults=data
+                )
+                if was_created:
+                    created += 1
+                else:
+                    # Update existing with latest defaults
+                    for k, v in data.items():
+                        setattr(obj, k, v)
+                    obj.save()
         self.stdout.write(self.style.SUCCESS(f"Seed complete. Regions created/updated: {len(SAMPLES)} (new: {created})"))
 
 
@@ -0,0 +1,43 @@
+import time
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from core import gallery
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconcile media/gallery/ with the GalleryItem table: report (and with --delete, remove) files no "
+        "row refers to, and report rows whose original file is missing."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--delete", action="store_true", help="Delete the orphaned files (default: report only)")
+        parser.add_argument("--min-age", type=int, default=3600,
+                            help="Leave files younger than this many seconds alone, as uploads and variant "
+                                 "builds may not be recorded yet (default 3600)")
+
+    def handle(self, *args, **options):
+        on_disk = gallery.stored_files()
+        originals, derived = gallery.referenced_files()
+
+        cutoff = time.time() - options["min_age"]
+        orphans = sorted(
+            name for name in on_disk - originals - derived
+            if default_storage.get_modified_time(name).timestamp() < cutoff
+        )
+        missing = sorted(originals - on_disk)
+
+        for name in orphans:
+            self.stdout.write(f"orphan  {name}")
+        for name in missing:
+            self.stdout.write(f"missing {name}")
+        if options["delete"] and orphans:
+            gallery.delete_files(orphans)
+
+        action = "Deleted" if options["delete"] else "Found"
+        self.stdout.write(self.style.SUCCESS(
+            f"{action} {len(orphans)} orphaned files of {len(on_disk)} in gallery/; "
+            f"{len(missing)} rows point at missing files."
+        ))
@@ -1,34 +1,19 @@
 from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core import states
 from core.models import IrrigationArea
-from core.management.commands.seed_state_centroids import STATE_CENTROIDS
 
 
 class Command(BaseCommand):
     help = "Update coordinates for IrrigationArea entries using state centroids"
 
     def handle(self, *args, **options):
-        updated = 0
-        for state, (lat, lon) in STATE_CENTROIDS.items():
-            # Try exact match first
-            qs = IrrigationArea.objects.filter(state__iexact=state)
-            if not qs.exists():
-                # Try with different variations
-                variations = [
-                    state.replace("&", "and"),
-                    state.replace("and", "&"),
-                    state.upper(),
-                    state.title()
-                ]
-                for variation in variations:
-                    qs = IrrigationArea.objects.filter(state__iexact=variation)
-                    if qs.exists():
-                        break
-            
-            for area in qs:
-                area.latitude = lat
-                area.longitude = lon
-                area.save()
-                updated += 1
-                self.stdout.write(f"Updated {area.state}: {lat}, {lon}")
-        
+        with transaction.atomic():
+            # Any spelling an alias covers resolves in memory; no per-variation queries
+            states.link_states(IrrigationArea)
+            updated = states.apply_centroids(IrrigationArea)
+        unresolved = IrrigationArea.objects.filter(state_ref__isnull=True).values_list("state", flat=True)
+        for name in unresolved:
+            self.stdout.write(f"No state matches {name!r}; add it as an alias")
         self.stdout.write(self.style.SUCCESS(f"Updated coordinates for {updated} irrigation areas"))
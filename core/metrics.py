@@ -0,0 +1,290 @@
+"""
+Per-request performance metrics for the API and page routes.
+
+With settings.REQUEST_METRICS on, RequestMetricsMiddleware times every
+request that resolves to a named route in core.api_urls or core.urls, and a
+database execute wrapper counts its queries, the time spent executing and
+fetching them, and the rows fetched. Each request gets a Server-Timing
+header (db, app and total durations), and the totals are kept per route in
+an in-process registry served at /metrics in the Prometheus text format:
+a latency histogram plus query, SQL time, row and response byte counters.
+
+Streamed responses are recorded once their last chunk is sent, so queries
+run while streaming count too; their Server-Timing header can only cover
+the time until the headers went out.
+
+The registry is per process; with several server workers each one serves
+its own counters, which Prometheus sums across scrape targets. With the
+setting off the middleware removes itself at startup (MiddlewareNotUsed),
+no execute wrapper is installed and /metrics answers 404, so requests pay
+nothing.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import Http404, HttpResponse
+
+# Upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class RequestStats:
+    """Database work of one request, filled in by the execute wrapper."""
+    __slots__ = ("queries", "sql_seconds", "rows")
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.rows = 0
+
+    def server_timing(self, elapsed: float) -> str:
+        return (
+            f'db;dur={self.sql_seconds * 1000:.2f};desc="{self.queries} queries", '
+            f"app;dur={max(elapsed - self.sql_seconds, 0.0) * 1000:.2f}, "
+            f"total;dur={elapsed * 1000:.2f}"
+        )
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_metrics", default=None)
+
+
+class _CountingCursor:
+    """DB-API cursor proxy adding fetched rows and fetch time to a request's stats."""
+
+    def __init__(self, cursor, stats: RequestStats):
+        self._cursor = cursor
+        self._stats = stats
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        for row in self._cursor:
+            self._stats.rows += 1
+            yield row
+
+    def _fetch(self, method, *args):
+        start = time.perf_counter()
+        result = getattr(self._cursor, method)(*args)
+        self._stats.sql_seconds += time.perf_counter() - start
+        return result
+
+    def fetchone(self):
+        row = self._fetch("fetchone")
+        if row is not None:
+            self._stats.rows += 1
+        return row
+
+    def fetchmany(self, *args):
+        rows = self._fetch("fetchmany", *args)
+        self._stats.rows += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self._fetch("fetchall")
+        self._stats.rows += len(rows)
+        return rows
+
+
+def _count_queries(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    cursor = context["cursor"]
+    if not isinstance(cursor.cursor, _CountingCursor):
+        cursor.cursor = _CountingCursor(cursor.cursor, stats)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.sql_seconds += time.perf_counter() - start
+
+
+def _install(connection, **kwargs) -> None:
+    if _count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_queries)
+
+
+def install_query_hooks() -> None:
+    """Wrap queries on every connection opened from now on, and on those already open in this thread."""
+    connection_created.connect(_install, dispatch_uid="core.metrics")
+    for connection in connections.all(initialized_only=True):
+        _install(connection)
+
+
+class Registry:
+    """Per-route request totals and latency histograms."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (route, method, status) -> [bucket counts..., +Inf count, latency sum, queries, sql seconds, rows, bytes]
+        self._series: Dict[Tuple[str, str, str], List[float]] = {}
+
+    def record(self, route: str, method: str, status: int, elapsed: float, stats: RequestStats, size: int) -> None:
+        key = (route, method, str(status))
+        bucket = bisect_left(LATENCY_BUCKETS, elapsed)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(LATENCY_BUCKETS) + 1) + [0.0, 0, 0.0, 0, 0]
+            series[bucket] += 1
+            n = len(LATENCY_BUCKETS) + 1
+            series[n] += elapsed
+            series[n + 1] += stats.queries
+            series[n + 2] += stats.sql_seconds
+            series[n + 3] += stats.rows
+            series[n + 4] += size
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def render(self) -> str:
+        """The registry in the Prometheus text exposition format."""
+        with self._lock:
+            series = sorted((key, list(values)) for key, values in self._series.items())
+        n = len(LATENCY_BUCKETS) + 1
+        lines = [
+            "# HELP land_insights_request_duration_seconds Time to the response headers, or to the last chunk when streamed.",
+            "# TYPE land_insights_request_duration_seconds histogram",
+        ]
+        for (route, method, status), values in series:
+            labels = f'route="{route}",method="{method}",status="{status}"'
+            cumulative = 0
+            for bound, hits in zip((*LATENCY_BUCKETS, "+Inf"), values[:n]):
+                cumulative += hits
+                lines.append(f'land_insights_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"land_insights_request_duration_seconds_sum{{{labels}}} {values[n]}")
+            lines.append(f"land_insights_request_duration_seconds_count{{{labels}}} {cumulative}")
+        for offset, name, help_text in (
+            (1, "db_queries_total", "SQL statements executed."),
+            (2, "db_query_seconds_total", "Time spent executing SQL and fetching its rows."),
+            (3, "db_rows_fetched_total", "Rows fetched from the database."),
+            (4, "response_bytes_total", "Response body bytes sent."),
+        ):
+            lines.append(f"# HELP land_insights_{name} {help_text}")
+            lines.append(f"# TYPE land_insights_{name} counter")
+            for (route, method, status), values in series:
+                labels = f'route="{route}",method="{method}",status="{status}"'
+                lines.append(f"land_insights_{name}{{{labels}}} {values[n + offset]}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+def _route(request) -> Optional[str]:
+    """Name of the core route the request resolved to; None for admin, static files and 404s."""
+    match = getattr(request, "resolver_match", None)
+    if match is None or not match.url_name or match.namespaces:
+        return None
+    return match.url_name
+
+
+class RequestMetricsMiddleware:
+    """Records RequestStats per request; see the module docstring."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_METRICS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        install_query_hooks()
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        start = time.perf_counter()
+        stats = RequestStats()
+        token = _current.set(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, stats, start)
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        stats = RequestStats()
+        token = _current.set(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, stats, start)
+
+    def finish(self, request, response, stats: RequestStats, start: float):
+        route = _route(request)
+        if route is None:
+            return response
+        response["Server-Timing"] = stats.server_timing(time.perf_counter() - start)
+
+        def record(size: int) -> None:
+            registry.record(route, request.method, response.status_code, time.perf_counter() - start, stats, size)
+
+        if not response.streaming:
+            record(len(response.content))
+        elif response.is_async:
+            response.streaming_content = _arecord_stream(response.streaming_content, stats, record)
+        else:
+            response.streaming_content = _record_stream(response.streaming_content, stats, record)
+        return response
+
+
+def _record_stream(chunks, stats: RequestStats, record):
+    # Queries made while producing a chunk belong to the request
+    size = 0
+    chunks = iter(chunks)
+    try:
+        while True:
+            token = _current.set(stats)
+            try:
+                chunk = next(chunks)
+            except StopIteration:
+                break
+            finally:
+                _current.reset(token)
+            size += len(chunk)
+            yield chunk
+    finally:
+        record(size)
+
+
+async def _arecord_stream(chunks, stats: RequestStats, record):
+    size = 0
+    chunks = chunks.__aiter__()
+    try:
+        while True:
+            token = _current.set(stats)
+            try:
+                chunk = await chunks.__anext__()
+            except StopAsyncIteration:
+                break
+            finally:
+                _current.reset(token)
+            size += len(chunk)
+            yield chunk
+    finally:
+        record(size)
+
+
+def metrics_view(request):
+    """GET /metrics: this process's registry in the Prometheus text format."""
+    if not settings.REQUEST_METRICS:
+        raise Http404
+    return HttpResponse(registry.render(), content_type=CONTENT_TYPE)
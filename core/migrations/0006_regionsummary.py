@@ -0,0 +1,81 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:48
+
+from collections import Counter
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Min, Sum
+
+
+def populate_region_summary(apps, schema_editor):
+    Region = apps.get_model('core', 'Region')
+    RegionSummary = apps.get_model('core', 'RegionSummary')
+
+    # Count each crop once per region under its first-seen spelling, as the
+    # crop index (0007) and core.summary's RegionCrop-based refresh do
+    crops = {}
+    names = {}
+    for state, irrigation_type, dominant in Region.objects.values_list('state', 'irrigation_type', 'dominant_crops'):
+        counter = crops.setdefault((state, irrigation_type), Counter())
+        seen = set()
+        for c in [x.strip() for x in (dominant or '').split(',') if x.strip()]:
+            key = c.lower()
+            if key in seen:
+                continue
+            seen.add(key)
+            counter[names.setdefault(key, c)] += 1
+
+    grouped = Region.objects.values('state', 'irrigation_type').annotate(
+        count=Count('id'),
+        land_holding_count=Count('land_holding'),
+        land_holding_sum=Sum('land_holding'),
+        land_holding_min=Min('land_holding'),
+        land_holding_max=Max('land_holding'),
+        average_land_holding_sum=Sum('average_land_holding'),
+        rainfall_sum=Sum('rainfall'),
+        rainfall_min=Min('rainfall'),
+        rainfall_max=Max('rainfall'),
+        irrigation_area_count=Count('irrigation_area'),
+        irrigation_area_sum=Sum('irrigation_area'),
+        irrigation_area_min=Min('irrigation_area'),
+        irrigation_area_max=Max('irrigation_area'),
+    ).order_by()
+    RegionSummary.objects.bulk_create([
+        RegionSummary(crop_counts=dict(crops.get((g['state'], g['irrigation_type']), {})), **g)
+        for g in grouped
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_galleryitem'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RegionSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('state', models.CharField(max_length=100)),
+                ('irrigation_type', models.CharField(max_length=100)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('land_holding_count', models.PositiveIntegerField(default=0)),
+                ('land_holding_sum', models.FloatField(blank=True, null=True)),
+                ('land_holding_min', models.FloatField(blank=True, null=True)),
+                ('land_holding_max', models.FloatField(blank=True, null=True)),
+                ('average_land_holding_sum', models.FloatField(blank=True, null=True)),
+                ('rainfall_sum', models.FloatField(blank=True, null=True)),
+                ('rainfall_min', models.FloatField(blank=True, null=True)),
+                ('rainfall_max', models.FloatField(blank=True, null=True)),
+                ('irrigation_area_count', models.PositiveIntegerField(default=0)),
+                ('irrigation_area_sum', models.FloatField(blank=True, null=True)),
+                ('irrigation_area_min', models.FloatField(blank=True, null=True)),
+                ('irrigation_area_max', models.FloatField(blank=True, null=True)),
+                ('crop_counts', models.JSONField(blank=True, default=dict)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('state', 'irrigation_type'), name='unique_region_summary_group')],
+            },
+        ),
+        migrations.RunPython(populate_region_summary, migrations.RunPython.noop),
+    ]
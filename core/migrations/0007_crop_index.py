@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_crop_index(apps, schema_editor):
+    Region = apps.get_model('core', 'Region')
+    Crop = apps.get_model('core', 'Crop')
+    RegionCrop = apps.get_model('core', 'RegionCrop')
+
+    crop_ids = {}
+    links = []
+    for region_id, dominant in Region.objects.values_list('id', 'dominant_crops').iterator():
+        seen = set()
+        for name in [x.strip() for x in (dominant or '').split(',') if x.strip()]:
+            key = name.lower()
+            if key in seen:
+                continue
+            seen.add(key)
+            if key not in crop_ids:
+                crop_ids[key] = Crop.objects.create(key=key, name=name).id
+            links.append(RegionCrop(region_id=region_id, crop_id=crop_ids[key]))
+    RegionCrop.objects.bulk_create(links, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_regionsummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Crop',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('key', models.CharField(max_length=100, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RegionCrop',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('crop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='region_crops', to='core.crop')),
+                ('region', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='region_crops', to='core.region')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='region',
+            name='crops',
+            field=models.ManyToManyField(blank=True, related_name='regions', through='core.RegionCrop', to='core.crop'),
+        ),
+        migrations.AddConstraint(
+            model_name='regioncrop',
+            constraint=models.UniqueConstraint(fields=('region', 'crop'), name='unique_region_crop'),
+        ),
+        migrations.RunPython(populate_crop_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 00:50
+
+import django.db.models.functions.comparison
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_crop_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='croppingstat',
+            index=models.Index(django.db.models.functions.text.Lower('state'), django.db.models.functions.text.Lower('category'), name='cropstat_state_cat_ci_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='croppingstat',
+            index=models.Index(django.db.models.functions.text.Lower('category'), name='cropstat_category_ci_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='irrigationarea',
+            index=models.Index(django.db.models.functions.text.Lower('state'), name='irrigation_state_ci_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='region',
+            index=models.Index(django.db.models.functions.text.Lower('state'), django.db.models.functions.text.Lower('irrigation_type'), name='region_state_type_ci_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='region',
+            index=models.Index(django.db.models.functions.text.Lower('irrigation_type'), name='region_type_ci_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='region',
+            index=models.Index(django.db.models.functions.comparison.Coalesce('land_holding', 'average_land_holding'), name='region_eff_holding_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='region',
+            index=models.Index(fields=['rainfall'], name='region_rainfall_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='region',
+            index=models.Index(fields=['irrigation_area'], name='region_irrigation_area_idx'),
+        ),
+    ]
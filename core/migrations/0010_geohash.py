@@ -0,0 +1,74 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:05
+
+from django.db import migrations, models
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def encode(latitude, longitude, precision=9):
+    # Frozen copy of core.geo.encode, so later changes to it cannot alter this migration
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars = []
+    bits, bit_count, even = 0, 0, True
+    while len(chars) < precision:
+        rng, value = (lon_range, longitude) if even else (lat_range, latitude)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            bits = bits * 2 + 1
+            rng[0] = mid
+        else:
+            bits = bits * 2
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(BASE32[bits])
+            bits, bit_count = 0, 0
+    return ''.join(chars)
+
+
+def populate_geohash(apps, schema_editor):
+    for name in ('Region', 'CroppingStat', 'IrrigationArea'):
+        model = apps.get_model('core', name)
+        rows = []
+        for pk, lat, lon in model.objects.exclude(latitude=None).exclude(longitude=None).values_list('id', 'latitude', 'longitude').iterator():
+            rows.append(model(id=pk, geohash=encode(lat, lon)))
+        model.objects.bulk_update(rows, ['geohash'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_dataversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='croppingstat',
+            name='geohash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=12),
+        ),
+        migrations.AddField(
+            model_name='irrigationarea',
+            name='geohash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=12),
+        ),
+        migrations.AddField(
+            model_name='region',
+            name='geohash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=12),
+        ),
+        migrations.AddIndex(
+            model_name='croppingstat',
+            index=models.Index(fields=['geohash'], name='cropstat_geohash_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='irrigationarea',
+            index=models.Index(fields=['geohash'], name='irrigation_geohash_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='region',
+            index=models.Index(fields=['geohash'], name='region_geohash_idx'),
+        ),
+        migrations.RunPython(populate_geohash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,118 @@
+# Generated by Django 5.2.18 on 2026-10-18 01:23
+
+import django.db.models.deletion
+import django.db.models.functions.text
+from django.db import migrations, models
+
+# Frozen copies of core.states.SEED_STATES and state_key, so later edits to
+# them cannot change what this migration creates
+SEED_STATES = {
+    'Andhra Pradesh': ((15.9129, 79.7400), ()),
+    'Arunachal Pradesh': ((28.2180, 94.7278), ()),
+    'Assam': ((26.2006, 92.9376), ()),
+    'Bihar': ((25.0961, 85.3131), ()),
+    'Chhattisgarh': ((21.2787, 81.8661), ('Chattisgarh',)),
+    'Goa': ((15.2993, 74.1240), ()),
+    'Gujarat': ((22.2587, 71.1924), ()),
+    'Haryana': ((29.0588, 76.0856), ()),
+    'Himachal Pradesh': ((31.1048, 77.1734), ()),
+    'Jharkhand': ((23.6102, 85.2799), ()),
+    'Karnataka': ((15.3173, 75.7139), ()),
+    'Kerala': ((10.8505, 76.2711), ()),
+    'Madhya Pradesh': ((22.9734, 78.6569), ()),
+    'Maharashtra': ((19.7515, 75.7139), ('Mahrashtra',)),
+    'Manipur': ((24.6637, 93.9063), ()),
+    'Meghalaya': ((25.4670, 91.3662), ()),
+    'Mizoram': ((23.1645, 92.9376), ()),
+    'Nagaland': ((26.1584, 94.5624), ()),
+    'Odisha': ((20.9517, 85.0985), ('Orissa',)),
+    'Punjab': ((31.1471, 75.3412), ()),
+    'Rajasthan': ((27.0238, 74.2179), ()),
+    'Sikkim': ((27.5330, 88.5122), ()),
+    'Tamil Nadu': ((11.1271, 78.6569), ('Tamilnadu',)),
+    'Telangana': ((18.1124, 79.0193), ()),
+    'Tripura': ((23.9408, 91.9882), ()),
+    'Uttar Pradesh': ((26.8467, 80.9462), ()),
+    'Uttarakhand': ((30.0668, 79.0193), ('Uttaranchal',)),
+    'West Bengal': ((22.9868, 87.8550), ()),
+    # Union Territories
+    'Andaman and Nicobar Islands': ((11.7401, 92.6586), ('Andaman and Nicobars', 'Andaman and Nicobar', 'A & N Islands')),
+    'Chandigarh': ((30.7333, 76.7794), ()),
+    'Delhi': ((28.6139, 77.2090), ('NCT of Delhi',)),
+    'Jammu and Kashmir': ((33.7782, 76.5762), ()),
+    'Ladakh': ((34.1526, 77.5770), ()),
+    'Lakshadweep': ((10.5667, 72.6417), ('Lakshwadeep',)),
+    'Puducherry': ((11.9416, 79.8083), ('Pondicherry',)),
+    'Dadra and Nagar Haveli and Daman and Diu': ((20.3974, 72.8328), ()),
+    # Separate UTs until 2020; older datasets still report them individually
+    'Dadra and Nagar Haveli': ((20.1809, 73.0169), ('Dadar and Nagar Haveli',)),
+    'Daman and Diu': ((20.4283, 72.8397), ()),
+}
+
+
+def state_key(name):
+    return ' '.join(name.replace('&', ' and ').replace('.', ' ').lower().split())
+
+
+def populate_states(apps, schema_editor):
+    State = apps.get_model('core', 'State')
+
+    ids = {}
+    for name, ((lat, lon), aliases) in SEED_STATES.items():
+        state = State.objects.create(name=name, aliases=list(aliases), latitude=lat, longitude=lon)
+        for spelling in (name, *aliases):
+            ids.setdefault(state_key(spelling), state.id)
+
+    for model_name in ('Region', 'CroppingStat', 'IrrigationArea'):
+        model = apps.get_model('core', model_name)
+        for name in model.objects.values_list('state', flat=True).distinct().order_by():
+            state_id = ids.get(state_key(name)) if name else None
+            if state_id is not None:
+                model.objects.filter(state=name).update(state_ref_id=state_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_gallery_created_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='State',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('aliases', models.JSONField(blank=True, default=list)),
+                ('latitude', models.FloatField(blank=True, null=True)),
+                ('longitude', models.FloatField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='croppingstat',
+            name='state_ref',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='cropping_stats', to='core.state'),
+        ),
+        migrations.AddField(
+            model_name='irrigationarea',
+            name='state_ref',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='irrigation_areas', to='core.state'),
+        ),
+        migrations.AddField(
+            model_name='region',
+            name='state_ref',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='regions', to='core.state'),
+        ),
+        migrations.AddIndex(
+            model_name='croppingstat',
+            index=models.Index(models.F('state_ref'), django.db.models.functions.text.Lower('category'), name='cropstat_stateref_cat_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='region',
+            index=models.Index(models.F('state_ref'), django.db.models.functions.text.Lower('irrigation_type'), name='region_stateref_type_idx'),
+        ),
+        migrations.RunPython(populate_states, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,418 @@
+import math
+from typing import Dict, List, Optional, Tuple
+
+from django.db.models import Avg, Count, F, FloatField, Max, Min, Sum, Value
+from django.db.models.functions import Floor, Least
+from django.http import StreamingHttpResponse
+from rest_framework import serializers
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from . import geo, versions
+from .caching import cache_response, get_cache, normalized_query
+from .renderers import NDJSONRenderer, iter_json_array, iter_ndjson, make_encoder
+
+# Serializer fields whose to_representation() is a no-op for the DB value
+PASSTHROUGH_FIELDS = (serializers.IntegerField, serializers.FloatField, serializers.CharField, serializers.BooleanField)
+
+
+class FieldProjectionMixin:
+    """
+    Honour ?fields=a,b,c on list/retrieve/export: only the listed serializer fields are
+    rendered and only the model columns behind them are SELECTed (`.only()`).
+
+    `projection_columns` maps serializer fields computed from other columns to
+    the columns they read; every other field is assumed to be a column itself.
+    """
+    fields_query_param = "fields"
+    projection_actions = ("list", "retrieve", "export")
+    projection_columns: Dict[str, Tuple[str, ...]] = {}
+
+    def get_projected_fields(self) -> Optional[List[str]]:
+        if getattr(self, "_projected_fields", False) is not False:
+            return self._projected_fields
+        self._projected_fields = None
+        raw = self.request.query_params.get(self.fields_query_param) if self.request else None
+        if raw and self.request.method == "GET" and self.action in self.projection_actions:
+            requested = [f.strip() for f in raw.split(",") if f.strip()]
+            available = list(self.get_serializer_class()().fields)
+            unknown = [f for f in requested if f not in available]
+            if unknown:
+                raise ValidationError({self.fields_query_param: f"Unknown field(s): {', '.join(unknown)}"})
+            # Keep the serializer's own field order so projected output is a subset of the full row
+            self._projected_fields = [f for f in available if f in requested]
+        return self._projected_fields
+
+    def get_projected_columns(self, fields: List[str]) -> List[str]:
+        columns = {"id"}
+        for name in fields:
+            columns.update(self.projection_columns.get(name, (name,)))
+        # The keyset cursor reads the sort column from each row
+        sort = self.request.query_params.get("sort", "").lstrip("-")
+        if sort in {f.name for f in self.queryset.model._meta.concrete_fields}:
+            columns.add(sort)
+        return sorted(columns)
+
+    def get_queryset(self):
+        qs = super().get_queryset()
+        fields = self.get_projected_fields()
+        if fields:
+            qs = qs.only(*self.get_projected_columns(fields))
+        return qs
+
+    def get_serializer(self, *args, **kwargs):
+        fields = self.get_projected_fields()
+        if fields:
+            kwargs.setdefault("fields", fields)
+        return super().get_serializer(*args, **kwargs)
+
+
+class SpatialFilterMixin:
+    """
+    ?bbox=west,south,east,north keeps rows inside a box;
+    ?near=lat,lon[&radius_km=] keeps rows within radius_km (default 50) of a
+    point, nearest first. Both go through the geohash index (core.geo), so
+    only rows in the cells around the area are read.
+    """
+    default_radius_km = 50.0
+    max_radius_km = 2000.0
+
+    @staticmethod
+    def _floats(name: str, raw: str, count: int) -> List[float]:
+        try:
+            values = [float(v) for v in raw.split(",")]
+        except ValueError:
+            values = []
+        if len(values) != count:
+            raise ValidationError({name: f"Expected {count} comma-separated numbers."})
+        return values
+
+    @classmethod
+    def get_spatial_filters(cls, params) -> Tuple[Optional[geo.BBox], Optional[Tuple[float, float, float]]]:
+        """The validated (bbox, (lat, lon, radius_km)) in `params`, each None when absent."""
+        bbox = near = None
+        if params.get("bbox"):
+            bbox = tuple(cls._floats("bbox", params["bbox"], 4))
+            west, south, east, north = bbox
+            if west > east or south > north:
+                raise ValidationError({"bbox": "Expected west,south,east,north."})
+        if params.get("near"):
+            lat, lon = cls._floats("near", params["near"], 2)
+            radius = cls._floats("radius_km", params.get("radius_km", str(cls.default_radius_km)), 1)[0]
+            near = lat, lon, max(0.0, min(radius, cls.max_radius_km))
+        return bbox, near
+
+    def get_queryset(self):
+        qs = super().get_queryset()
+        bbox, near = self.get_spatial_filters(self.request.query_params)
+        if bbox:
+            qs = qs.filter(geo.bbox_q(bbox))
+        if near:
+            lat, lon, radius = near
+            qs = (
+                qs.filter(geo.bbox_q(geo.radius_bbox(lat, lon, radius)))
+                .annotate(distance_km=geo.distance_km(lat, lon))
+                .filter(distance_km__lte=radius)
+                .order_by("distance_km", "pk")
+            )
+        return qs
+
+
+class FastListMixin:
+    """
+    Serve unpaginated JSON list responses straight from .values_list() rows,
+    skipping per-row serializer field machinery (see core.renderers).
+
+    `fast_list_columns` maps serializer fields that are not plain model columns
+    to a queryset column or annotation holding the same value. Views whose
+    serializer has any other computed field, paginated requests and non-JSON
+    renderers fall back to the regular serializer path.
+    """
+    fast_list = True
+    fast_list_columns: Dict[str, str] = {}
+    fast_list_chunk_size = 2000
+
+    def get_fast_list_columns(self) -> Optional[List[Tuple[str, str]]]:
+        columns = []
+        for name, field in self.get_serializer().fields.items():
+            if name in self.fast_list_columns:
+                columns.append((name, self.fast_list_columns[name]))
+            elif isinstance(field, PASSTHROUGH_FIELDS) and field.source == name:
+                columns.append((name, name))
+            else:
+                return None
+        return columns
+
+    def can_fast_list(self, request) -> bool:
+        renderer = getattr(request, "accepted_renderer", None)
+        return (
+            self.fast_list
+            and isinstance(renderer, JSONRenderer)
+            and renderer.get_indent(request.accepted_media_type, self.get_renderer_context()) is None
+        )
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
+        columns = self.get_fast_list_columns() if self.can_fast_list(request) else None
+        if columns is None:
+            serializer = self.get_serializer(queryset, many=True)
+            return Response(serializer.data)
+
+        renderer = request.accepted_renderer
+        rows = queryset.values_list(*[c for _, c in columns]).iterator(chunk_size=self.fast_list_chunk_size)
+        return StreamingHttpResponse(
+            iter_json_array(rows, [k for k, _ in columns], make_encoder(renderer)),
+            content_type=renderer.media_type,
+        )
+
+
+class ExportMixin:
+    """
+    GET <prefix>/export/?format=json|ndjson streams the whole filtered queryset.
+
+    Rows are read with .iterator(chunk_size=...) and written through a
+    StreamingHttpResponse, so memory stays flat regardless of table size.
+    Uses the FastListMixin column mapping when the view has one and the
+    serializer one row at a time otherwise.
+    """
+    export_chunk_size = 2000
+    max_export_chunk_size = 20000
+
+    def get_export_chunk_size(self) -> int:
+        raw = self.request.query_params.get("chunk_size")
+        if raw is None:
+            return self.export_chunk_size
+        try:
+            size = int(raw)
+        except ValueError:
+            raise ValidationError({"chunk_size": "Must be an integer."})
+        return max(1, min(size, self.max_export_chunk_size))
+
+    @action(detail=False, methods=["get"], url_path="export", renderer_classes=[JSONRenderer, NDJSONRenderer])
+    def export(self, request):
+        queryset = self.filter_queryset(self.get_queryset())
+        chunk_size = self.get_export_chunk_size()
+
+        columns = self.get_fast_list_columns() if hasattr(self, "get_fast_list_columns") else None
+        if columns is not None:
+            keys = [k for k, _ in columns]
+            rows = queryset.values_list(*[c for _, c in columns]).iterator(chunk_size=chunk_size)
+        else:
+            serializer = self.get_serializer()
+            keys = list(serializer.fields)
+            rows = (
+                tuple(serializer.to_representation(obj).values())
+                for obj in queryset.iterator(chunk_size=chunk_size)
+            )
+
+        renderer = request.accepted_renderer
+        encoder = make_encoder(renderer)
+        if renderer.format == NDJSONRenderer.format:
+            stream = iter_ndjson(rows, keys, encoder, batch_size=chunk_size)
+        else:
+            stream = iter_json_array(rows, keys, encoder, batch_size=chunk_size)
+        response = StreamingHttpResponse(stream, content_type=renderer.media_type)
+        response["Content-Disposition"] = f'attachment; filename="{self.basename}.{renderer.format}"'
+        return response
+
+
+def quantile_breaks(qs, column: str, count: int, quantiles) -> List[dict]:
+    """Lower value at index floor((count - 1) * q) of `column` for each q, one query per break."""
+    ordered = qs.filter(**{f"{column}__isnull": False}).order_by(column).values_list(column, flat=True)
+    return [
+        {"q": q, "value": ordered[int((count - 1) * q)] if count else None}
+        for q in quantiles
+    ]
+
+
+class DistributionMixin:
+    """
+    GET <prefix>/distribution/?metric=...&quantiles=0.25,0.5,0.75&bins=10&top=10
+    describes one numeric column of the filtered queryset entirely in SQL:
+    quantile breaks (lower value at index floor((n - 1) * q), as the pages
+    used to compute them), equal-width histogram bins and the top-N rows.
+
+    `distribution_metrics` maps public metric names to a column or
+    annotation on get_queryset(); the first entry is the default metric.
+    `distribution_label` is the column shown next to each top-N value.
+    """
+    distribution_metrics: Dict[str, str] = {}
+    distribution_label = "state"
+    default_quantiles = (0.25, 0.5, 0.75)
+    default_bins = 10
+    default_top = 10
+    max_bins = 100
+    max_top = 100
+
+    def _int_param(self, name: str, default: int, maximum: int) -> int:
+        raw = self.request.query_params.get(name)
+        if raw is None:
+            return default
+        try:
+            value = int(raw)
+        except ValueError:
+            raise ValidationError({name: "Must be an integer."})
+        return max(0, min(value, maximum))
+
+    def get_distribution_params(self) -> Tuple[str, str, List[float], int, int]:
+        params = self.request.query_params
+        metric = params.get("metric") or next(iter(self.distribution_metrics))
+        if metric not in self.distribution_metrics:
+            raise ValidationError({"metric": f"Must be one of: {', '.join(self.distribution_metrics)}"})
+
+        quantiles = list(self.default_quantiles)
+        if params.get("quantiles"):
+            try:
+                quantiles = [float(q) for q in params["quantiles"].split(",") if q.strip()]
+            except ValueError:
+                raise ValidationError({"quantiles": "Must be a comma-separated list of numbers."})
+            if any(not 0 <= q <= 1 for q in quantiles):
+                raise ValidationError({"quantiles": "Each quantile must be between 0 and 1."})
+
+        bins = max(1, self._int_param("bins", self.default_bins, self.max_bins))
+        top = self._int_param("top", self.default_top, self.max_top)
+        return metric, self.distribution_metrics[metric], quantiles, bins, top
+
+    @action(detail=False, methods=["get"], url_path="distribution")
+    @cache_response
+    def distribution(self, request):
+        metric, column, quantiles, bins, top = self.get_distribution_params()
+        qs = self.filter_queryset(self.get_queryset()).filter(**{f"{column}__isnull": False})
+        stats = qs.aggregate(count=Count("pk"), min=Min(column), max=Max(column))
+        count, low, high = stats["count"], stats["min"], stats["max"]
+
+        breaks = quantile_breaks(qs, column, count, quantiles)
+
+        histogram = []
+        if count:
+            width = (high - low) / bins
+            if width:
+                # Bucket index in SQL; the maximum value belongs to the last bin
+                bucket = Least(Floor((F(column) - low) / width), Value(bins - 1), output_field=FloatField())
+                rows = qs.annotate(bucket=bucket).values_list("bucket").annotate(n=Count("pk")).order_by()
+                counts = {int(b): n for b, n in rows}
+            else:
+                counts = {0: count}
+            histogram = [
+                {"start": low + i * width, "end": high if i == bins - 1 else low + (i + 1) * width,
+                 "count": counts.get(i, 0)}
+                for i in range(bins if width else 1)
+            ]
+
+        top_rows = qs.order_by(F(column).desc(), "pk").values_list(self.distribution_label, column)[:top]
+        return Response({
+            "metric": metric,
+            "count": count,
+            "min": low,
+            "max": high,
+            "quantiles": breaks,
+            "histogram": histogram,
+            "top": [{"label": label, "value": value} for label, value in top_rows],
+        })
+
+
+class TileMixin:
+    """
+    GET <prefix>/tiles/{z}/{x}/{y}/ returns the filtered rows inside one
+    Web Mercator map tile, clustered on a grid x grid cell raster (?grid=,
+    default 8) with count, mean position and metric aggregates per cell.
+    Cells holding a single row also carry its id and label.
+
+    Metrics come from `distribution_metrics` (?metric=, default first entry);
+    `tile_label` names the label column. Tiles are cached under the table's
+    data version (core.versions), so any write invalidates them.
+    """
+    tile_label = "state"
+    tile_grid = 8
+    max_tile_grid = 32
+    max_tile_zoom = 22
+    tile_cache_timeout = 24 * 60 * 60
+
+    @staticmethod
+    def tile_bounds(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+        """(west, south, east, north) in degrees for a slippy-map tile."""
+        n = 2 ** z
+
+        def lat(row: int) -> float:
+            return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+        return x / n * 360 - 180, lat(y + 1), (x + 1) / n * 360 - 180, lat(y)
+
+    def get_tile_cache_key(self, z: int, x: int, y: int) -> str:
+        version = versions.token(self.queryset.model)
+        query = normalized_query(self.request.query_params)
+        return f"tiles:{self.basename}:v{version}:{z}/{x}/{y}:{query}"
+
+    @action(detail=False, methods=["get"], url_path=r"tiles/(?P<z>\d+)/(?P<x>\d+)/(?P<y>\d+)")
+    def tiles(self, request, z, x, y):
+        z, x, y = int(z), int(x), int(y)
+        if z > self.max_tile_zoom or x >= 2 ** z or y >= 2 ** z:
+            raise NotFound("No such tile.")
+
+        cache_key = self.get_tile_cache_key(z, x, y)
+        data = get_cache().get(cache_key)
+        if data is None:
+            data = self.build_tile(z, x, y)
+            get_cache().set(cache_key, data, self.tile_cache_timeout)
+        return Response(data)
+
+    def build_tile(self, z: int, x: int, y: int) -> dict:
+        params = self.request.query_params
+        metric = params.get("metric") or next(iter(self.distribution_metrics))
+        if metric not in self.distribution_metrics:
+            raise ValidationError({"metric": f"Must be one of: {', '.join(self.distribution_metrics)}"})
+        column = self.distribution_metrics[metric]
+        try:
+            grid = max(1, min(int(params.get("grid", self.tile_grid)), self.max_tile_grid))
+        except ValueError:
+            raise ValidationError({"grid": "Must be an integer."})
+
+        west, south, east, north = self.tile_bounds(z, x, y)
+        qs = self.filter_queryset(self.get_queryset()).filter(
+            geo.bbox_q((west, south, east, north)), latitude__lt=north, longitude__lt=east,
+        )
+        # Grid cells are linear in degrees, which is close enough to Mercator within one tile
+        cells = (
+            qs.annotate(
+                cx=Floor((F("longitude") - west) / ((east - west) / grid)),
+                cy=Floor((north - F("latitude")) / ((north - south) / grid)),
+            )
+            .values("cx", "cy")
+            .annotate(
+                count=Count("pk"),
+                lat=Avg("latitude"),
+                lon=Avg("longitude"),
+                avg=Avg(column),
+                sum=Sum(column),
+                min=Min(column),
+                max=Max(column),
+                first_id=Min("pk"),
+                first_label=Min(self.tile_label),
+            )
+            .order_by("cy", "cx")
+        )
+
+        clusters = []
+        for cell in cells:
+            cluster = {
+                "lat": cell["lat"],
+                "lon": cell["lon"],
+                "count": cell["count"],
+                "avg": cell["avg"],
+                "sum": cell["sum"],
+                "min": cell["min"],
+                "max": cell["max"],
+            }
+            if cell["count"] == 1:
+                cluster["id"] = cell["first_id"]
+                cluster["label"] = cell["first_label"]
+            clusters.append(cluster)
+        return {"z": z, "x": x, "y": y, "metric": metric, "clusters": clusters}
@@ -1,8 +1,32 @@
 from django.db import models
+from django.db.models.functions import Coalesce, Lower
+
+# Enables `field__lower=value.lower()`, which matches the Lower() indexes below
+# (`__iexact` compiles to LIKE/UPPER and cannot use them)
+models.CharField.register_lookup(Lower)
+
+
+class State(models.Model):
+    """Canonical state/UT. core.states resolves the spellings used by the source datasets to it."""
+    name = models.CharField(max_length=100, unique=True)
+    # Other spellings of the name, matched after core.states.state_key() normalization
+    aliases = models.JSONField(default=list, blank=True)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["name"]
+
+    def __str__(self):
+        return self.name
+
 
 class Region(models.Model):
     name = models.CharField(max_length=100)
     state = models.CharField(max_length=100)
+    # Canonical state resolved from `state`, kept in sync by core.states
+    state_ref = models.ForeignKey(State, null=True, blank=True, on_delete=models.SET_NULL,
+                                  related_name="regions", editable=False, db_index=False)
     average_land_holding = models.FloatField()
     # New normalized fields for analytics/UI
     land_holding = models.FloatField(null=True, blank=True)
@@ -13,13 +37,87 @@ class Region(models.Model):
     yield_per_hectare = models.FloatField()
     latitude = models.FloatField(null=True, blank=True)
     longitude = models.FloatField(null=True, blank=True)
+    # Spatial index key for latitude/longitude, kept in sync by core.geo
+    geohash = models.CharField(max_length=12, blank=True, default="", editable=False)
+    # Normalized index over dominant_crops, kept in sync by core.crops
+    crops = models.ManyToManyField("Crop", through="RegionCrop", related_name="regions", blank=True)
+
+    class Meta:
+        indexes = [
+            # State filters go through state_ref (core.states); the Lower("state") indexes
+            # serve names outside the State table
+            models.Index("state_ref", Lower("irrigation_type"), name="region_stateref_type_idx"),
+            models.Index(Lower("state"), Lower("irrigation_type"), name="region_state_type_ci_idx"),
+            models.Index(Lower("irrigation_type"), name="region_type_ci_idx"),
+            # Same expression as the effective_land_holding annotation in RegionViewSet
+            models.Index(Coalesce("land_holding", "average_land_holding"), name="region_eff_holding_idx"),
+            models.Index(fields=["rainfall"], name="region_rainfall_idx"),
+            models.Index(fields=["irrigation_area"], name="region_irrigation_area_idx"),
+            models.Index(fields=["geohash"], name="region_geohash_idx"),
+        ]
 
     def __str__(self):
         return self.name
 
 
+class Crop(models.Model):
+    name = models.CharField(max_length=100)
+    key = models.CharField(max_length=100, unique=True)  # case-folded name used for lookups
+
+    def __str__(self):
+        return self.name
+
+
+class RegionCrop(models.Model):
+    region = models.ForeignKey(Region, on_delete=models.CASCADE, related_name="region_crops")
+    crop = models.ForeignKey(Crop, on_delete=models.CASCADE, related_name="region_crops")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["region", "crop"], name="unique_region_crop"),
+        ]
+
+    def __str__(self):
+        return f"{self.region_id} - {self.crop_id}"
+
+
+class RegionSummary(models.Model):
+    """Precomputed Region rollup per (state, irrigation_type), maintained by core.summary."""
+    state = models.CharField(max_length=100)
+    irrigation_type = models.CharField(max_length=100)
+    count = models.PositiveIntegerField(default=0)
+
+    # land_holding is nullable; average_land_holding is the legacy fallback column
+    land_holding_count = models.PositiveIntegerField(default=0)
+    land_holding_sum = models.FloatField(null=True, blank=True)
+    land_holding_min = models.FloatField(null=True, blank=True)
+    land_holding_max = models.FloatField(null=True, blank=True)
+    average_land_holding_sum = models.FloatField(null=True, blank=True)
+
+    rainfall_sum = models.FloatField(null=True, blank=True)
+    rainfall_min = models.FloatField(null=True, blank=True)
+    rainfall_max = models.FloatField(null=True, blank=True)
+
+    irrigation_area_count = models.PositiveIntegerField(default=0)
+    irrigation_area_sum = models.FloatField(null=True, blank=True)
+    irrigation_area_min = models.FloatField(null=True, blank=True)
+    irrigation_area_max = models.FloatField(null=True, blank=True)
+
+    crop_counts = models.JSONField(default=dict, blank=True)  # crop name -> number of regions
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["state", "irrigation_type"], name="unique_region_summary_group"),
+        ]
+
+    def __str__(self):
+        return f"{self.state} - {self.irrigation_type} ({self.count})"
+
+
 class CroppingStat(models.Model):
     state = models.CharField(max_length=100)
+    state_ref = models.ForeignKey(State, null=True, blank=True, on_delete=models.SET_NULL,
+                                  related_name="cropping_stats", editable=False, db_index=False)
     category = models.CharField(max_length=100)  # e.g., "Area" or "Percentage to Geographical Area"
 
     total_geographical_area = models.FloatField(null=True, blank=True)
@@ -35,6 +133,15 @@ class CroppingStat(models.Model):
 
     latitude = models.FloatField(null=True, blank=True)
     longitude = models.FloatField(null=True, blank=True)
+    geohash = models.CharField(max_length=12, blank=True, default="", editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index("state_ref", Lower("category"), name="cropstat_stateref_cat_idx"),
+            models.Index(Lower("state"), Lower("category"), name="cropstat_state_cat_ci_idx"),
+            models.Index(Lower("category"), name="cropstat_category_ci_idx"),
+            models.Index(fields=["geohash"], name="cropstat_geohash_idx"),
+        ]
 
     def __str__(self):
         return f"{self.state} - {self.category}"
@@ -42,6 +149,8 @@ class CroppingStat(models.Model):
 
 class IrrigationArea(models.Model):
     state = models.CharField(max_length=100)
+    state_ref = models.ForeignKey(State, null=True, blank=True, on_delete=models.SET_NULL,
+                                  related_name="irrigation_areas", editable=False)
     kharif_area = models.FloatField(null=True, blank=True)  # Actual area irrigated (Ha) - Kharif
     rabi_area = models.FloatField(null=True, blank=True)   # Actual area irrigated (Ha) - Rabi
     perennial_area = models.FloatField(null=True, blank=True)  # Actual area irrigated (Ha) - Perennial
@@ -50,11 +159,28 @@ class IrrigationArea(models.Model):
 
     latitude = models.FloatField(null=True, blank=True)
     longitude = models.FloatField(null=True, blank=True)
+    geohash = models.CharField(max_length=12, blank=True, default="", editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(Lower("state"), name="irrigation_state_ci_idx"),
+            models.Index(fields=["geohash"], name="irrigation_geohash_idx"),
+        ]
 
     def __str__(self):
         return f"{self.state} - Irrigation Areas"
 
 
+class DataVersion(models.Model):
+    """Change counter per model (keyed by app_label.model), bumped by core.versions on every write."""
+    key = models.CharField(max_length=100, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.key} v{self.version}"
+
+
 class GalleryItem(models.Model):
     CATEGORY_CHOICES = [
         ("holding", "Land Holding"),
@@ -66,6 +192,60 @@ class GalleryItem(models.Model):
     image = models.FileField(upload_to='gallery/')
     description = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Storage names of the resized copies built by core.thumbnails; empty until they exist
+    variants = models.JSONField(default=dict, blank=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Gallery pages: newest first within a category, id breaking created_at ties
+            models.Index(fields=["category", "-created_at", "-id"], name="gallery_cat_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.get_category_display()} - {self.id}"
+
+    def _srcset(self, fmt: str) -> str:
+        return ", ".join(f"{self.image.storage.url(name)} {width}w" for width, name in self.variants.get(fmt, []))
+
+    @property
+    def webp_srcset(self) -> str:
+        return self._srcset("webp")
+
+    @property
+    def avif_srcset(self) -> str:
+        return self._srcset("avif")
+
+    @property
+    def thumbnail_url(self) -> str:
+        name = self.variants.get("thumbnail")
+        return self.image.storage.url(name) if name else self.image.url
+
+
+class ProfileCapture(models.Model):
+    """One request profile kept by core.profiling; the profile itself is a file in settings.PROFILE_DIR."""
+    TRIGGER_CHOICES = [
+        ("request", "Requested by staff"),
+        ("slow", "Slow request"),
+    ]
+    KIND_CHOICES = [
+        ("cprofile", "cProfile (.prof)"),
+        ("sampled", "Sampled stacks (.folded)"),
+    ]
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=500)
+    view_name = models.CharField(max_length=200, blank=True)
+    status_code = models.PositiveSmallIntegerField()
+    duration_ms = models.FloatField()
+    trigger = models.CharField(max_length=10, choices=TRIGGER_CHOICES)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    file_name = models.CharField(max_length=100)
+    # Top functions or stacks, for reading without downloading the file
+    summary = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ["-created_at", "-id"]
 
     def __str__(self):
-        return f"{self.get_category_display()} - {self.id}"
\ No newline at end of file
+        return f"{self.method} {self.path} ({self.duration_ms:.0f} ms)"
@@ -0,0 +1,107 @@
+import json
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import Cursor, CursorPagination, _reverse_ordering
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Keyset (cursor) pagination on id, or on one of the view's `keyset_sort_fields`
+    via ?sort=<field> / ?sort=-<field>, with id as the tie-breaker.
+
+    The cursor carries the (sort value, id) of the row at the page edge and the
+    next page is `sort > value OR (sort = value AND id > id)`, so pages stay
+    exact however many rows share a sort value. Sort fields must not be null.
+    Without ?sort=, a queryset the view ordered itself (e.g. nearest first for
+    ?near=) is paged in that order, whose last field must be unique.
+
+    Pagination is opt-in per request: it applies once the client sends `page_size`
+    or follows a `cursor`, so existing callers that expect a plain list keep working.
+    """
+    page_size = 500
+    page_size_query_param = "page_size"
+    max_page_size = 5000
+    ordering = "id"
+    sort_query_param = "sort"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+
+        reverse = self.cursor is not None and self.cursor.reverse
+        ordering = _reverse_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if self.cursor is not None:
+            queryset = queryset.filter(self._after(ordering, self.cursor.position))
+
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_more = len(results) > self.page_size
+        if reverse:
+            self.page.reverse()
+        # A cursor means rows exist on the side it came from
+        self.has_next = bool(self.page) and (reverse or has_more)
+        self.has_previous = bool(self.page) and (has_more if reverse else self.cursor is not None)
+        if self.page:
+            self.next_position = self._get_position_from_instance(self.page[-1], self.ordering)
+            self.previous_position = self._get_position_from_instance(self.page[0], self.ordering)
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def get_ordering(self, request, queryset, view):
+        sort = request.query_params.get(self.sort_query_param)
+        if not sort:
+            ordering = queryset.query.order_by
+            if ordering and all(isinstance(field, str) for field in ordering):
+                return tuple(ordering)
+            return (self.ordering,)
+        allowed = getattr(view, "keyset_sort_fields", ())
+        if sort.lstrip("-") not in allowed:
+            raise ValidationError({self.sort_query_param: f"Must be one of: {', '.join(allowed)}"})
+        return (sort, "-id" if sort.startswith("-") else "id")
+
+    @staticmethod
+    def _after(ordering, position) -> Q:
+        """Rows strictly after `position` (one value per ordering field) in `ordering`."""
+        q = Q()
+        # Built from the last field outwards: (a > x) OR (a = x AND (b > y ...))
+        for field, value in reversed(list(zip(ordering, position))):
+            name = field.lstrip("-")
+            beyond = Q(**{f"{name}__lt" if field.startswith("-") else f"{name}__gt": value})
+            q = beyond if not q else beyond | (Q(**{name: value}) & q)
+        return q
+
+    def _get_position_from_instance(self, instance, ordering):
+        names = [field.lstrip("-") for field in ordering]
+        if isinstance(instance, dict):
+            return [instance[name] for name in names]
+        return [getattr(instance, name) for name in names]
+
+    def decode_cursor(self, request):
+        cursor = super().decode_cursor(request)
+        if cursor is None:
+            return None
+        try:
+            position = json.loads(cursor.position)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return cursor._replace(position=position)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=json.dumps(self.next_position)))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=json.dumps(self.previous_position)))
@@ -0,0 +1,233 @@
+"""
+On-demand request profiling.
+
+With settings.REQUEST_PROFILING on, ProfilingMiddleware captures profiles
+two ways:
+
+* Staff-triggered: a request from a staff user carrying an `X-Profile: 1`
+  header or a `?profile=1` query parameter runs under cProfile, and the
+  pstats dump is saved (open it with `python -m pstats` or snakeviz). The
+  user is checked only when the header or parameter is present.
+* Slow requests: when settings.PROFILE_SLOW_MS is set, every request is
+  registered with one background sampler thread. A request still running
+  past the threshold has its thread's stack sampled every
+  PROFILE_SAMPLE_INTERVAL_MS until it finishes, and the samples are saved
+  as folded stacks (flamegraph.pl, speedscope). Only the part after the
+  threshold is sampled; a request that finishes in time costs two dict
+  operations.
+
+Each capture is a ProfileCapture row plus a file in settings.PROFILE_DIR.
+Only the newest settings.PROFILE_KEEP are kept, older rows and files are
+pruned as new ones arrive. The Django admin lists them and downloads the
+files.
+
+Profiles cover the thread running the view, i.e. sync views. With the
+setting off the middleware removes itself at startup (MiddlewareNotUsed).
+"""
+import cProfile
+import io
+import logging
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from .models import ProfileCapture
+
+logger = logging.getLogger(__name__)
+
+# Lines of the text summary stored on each capture
+SUMMARY_LINES = 30
+
+
+class _Watch:
+    """A request being timed by the sampler, and the stacks sampled once it ran late."""
+    __slots__ = ("thread_id", "deadline", "stacks")
+
+    def __init__(self, thread_id: int, deadline: float):
+        self.thread_id = thread_id
+        self.deadline = deadline
+        self.stacks: Counter = Counter()
+
+
+def _folded(frame) -> str:
+    parts = []
+    while frame is not None:
+        code = frame.f_code
+        parts.append(f"{code.co_qualname} ({Path(code.co_filename).name}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(parts))
+
+
+class Sampler(threading.Thread):
+    """
+    Daemon thread sampling the stacks of watched requests past their
+    deadline. It polls at a quarter of the threshold while no request is
+    late and at the sampling interval while one is.
+    """
+
+    def __init__(self, threshold: float, interval: float):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.threshold = threshold
+        self.interval = interval
+        # Plain dict updates are atomic; the sampler only reads copies of it
+        self._watched: Dict[int, _Watch] = {}
+
+    def watch(self) -> _Watch:
+        watch = _Watch(threading.get_ident(), time.perf_counter() + self.threshold)
+        self._watched[watch.thread_id] = watch
+        return watch
+
+    def unwatch(self, watch: _Watch) -> None:
+        self._watched.pop(watch.thread_id, None)
+
+    def run(self):
+        idle = max(self.threshold / 4, self.interval)
+        while True:
+            now = time.perf_counter()
+            late = [w for w in list(self._watched.values()) if w.deadline <= now]
+            if late:
+                frames = sys._current_frames()
+                for watch in late:
+                    frame = frames.get(watch.thread_id)
+                    if frame is not None and self._watched.get(watch.thread_id) is watch:
+                        watch.stacks[_folded(frame)] += 1
+                del frames
+            time.sleep(self.interval if late else idle)
+
+
+def _summarize_stats(profile: cProfile.Profile) -> str:
+    out = io.StringIO()
+    pstats.Stats(profile, stream=out).sort_stats("cumulative").print_stats(SUMMARY_LINES)
+    return out.getvalue()
+
+
+def _summarize_stacks(stacks: Counter) -> str:
+    total = sum(stacks.values())
+    leaves = Counter()
+    for stack, hits in stacks.items():
+        leaves[stack.rsplit(";", 1)[-1]] += hits
+    lines = [f"{total} samples; busiest frames:"]
+    lines += [f"{hits * 100 / total:5.1f}%  {leaf}" for leaf, hits in leaves.most_common(SUMMARY_LINES)]
+    return "\n".join(lines)
+
+
+def profile_path(capture: ProfileCapture) -> Path:
+    return Path(settings.PROFILE_DIR) / capture.file_name
+
+
+def save_capture(request, response, *, trigger: str, kind: str, duration: float, write, summary: str) -> None:
+    """Write a profile file with write(path), record it and prune the ring buffer; never raises."""
+    try:
+        directory = Path(settings.PROFILE_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        file_name = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}." + (
+            "prof" if kind == "cprofile" else "folded"
+        )
+        write(directory / file_name)
+        match = getattr(request, "resolver_match", None)
+        ProfileCapture.objects.create(
+            method=request.method,
+            path=request.get_full_path()[:500],
+            view_name=(match.view_name if match else "")[:200],
+            status_code=response.status_code,
+            duration_ms=duration * 1000,
+            trigger=trigger,
+            kind=kind,
+            file_name=file_name,
+            summary=summary,
+        )
+        prune()
+    except Exception:
+        logger.exception("Could not save the profile of %s %s", request.method, request.path)
+
+
+def prune(keep: Optional[int] = None) -> int:
+    """Delete all but the newest `keep` (settings.PROFILE_KEEP) captures; their files go with them."""
+    keep = settings.PROFILE_KEEP if keep is None else keep
+    stale = list(ProfileCapture.objects.values_list("pk", flat=True)[keep:])
+    if stale:
+        # post_delete (core.signals) removes the files
+        ProfileCapture.objects.filter(pk__in=stale).delete()
+    return len(stale)
+
+
+class ProfilingMiddleware:
+    """Staff-triggered and slow-request profiling; see the module docstring."""
+    header = "X-Profile"
+    query_param = "profile"
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_PROFILING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sampler = None
+        if settings.PROFILE_SLOW_MS:
+            self.sampler = Sampler(settings.PROFILE_SLOW_MS / 1000, settings.PROFILE_SAMPLE_INTERVAL_MS / 1000)
+            self.sampler.start()
+
+    def requested(self, request) -> bool:
+        asked = request.headers.get(self.header) == "1" or request.GET.get(self.query_param) == "1"
+        return asked and request.user.is_staff
+
+    def __call__(self, request):
+        if self.requested(request):
+            return self.profile(request)
+        if self.sampler is None:
+            return self.get_response(request)
+
+        start = time.perf_counter()
+        watch = self.sampler.watch()
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            self.sampler.unwatch(watch)
+            raise
+        if response.streaming and not response.is_async:
+            # The body is produced on this thread after we return; keep sampling until it is sent
+            response.streaming_content = self._sample_stream(request, response, response.streaming_content, watch, start)
+        else:
+            self._finish_sampling(request, response, watch, start)
+        return response
+
+    def _sample_stream(self, request, response, chunks, watch: _Watch, start: float):
+        try:
+            yield from chunks
+        finally:
+            self._finish_sampling(request, response, watch, start)
+
+    def _finish_sampling(self, request, response, watch: _Watch, start: float) -> None:
+        self.sampler.unwatch(watch)
+        if not watch.stacks:
+            return
+        stacks = watch.stacks
+        save_capture(
+            request, response, trigger="slow", kind="sampled", duration=time.perf_counter() - start,
+            write=lambda path: path.write_text("".join(f"{s} {n}\n" for s, n in stacks.most_common())),
+            summary=_summarize_stacks(stacks),
+        )
+
+    def profile(self, request):
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            response = self.get_response(request)
+            if response.streaming and not response.is_async:
+                # Produce a streamed body under the profiler too
+                response.streaming_content = [b"".join(response.streaming_content)]
+        finally:
+            profiler.disable()
+        save_capture(
+            request, response, trigger="request", kind="cprofile", duration=time.perf_counter() - start,
+            write=lambda path: profiler.dump_stats(str(path)),
+            summary=_summarize_stats(profiler),
+        )
+        return response
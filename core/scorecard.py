@@ -0,0 +1,141 @@
+"""
+Cross-dataset state scorecard.
+
+GET /api/states/scorecard/ returns one row per State with metrics from
+Region, CroppingStat and IrrigationArea side by side, plus ratios derived
+from them (e.g. irrigated share of the net sown area), so the dashboards no
+longer download all three tables to join them by state name.
+
+The per-state metrics come either from the in-memory column snapshot
+(core.columnar, when NumPy is installed) or from one SQL statement in which
+each dataset contributes aggregate subqueries keyed on the indexed state_ref
+column (core.states). There are a few dozen states, so the derived ratios,
+?sort= and ?top= are applied to the rows afterwards.
+"""
+from typing import List, Optional
+
+from django.db.models import Avg, Count, Exists, F, FloatField, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from rest_framework.exceptions import ValidationError
+
+from . import columnar
+from .models import CroppingStat, IrrigationArea, Region, State
+
+# CroppingStat "Area" rows are in thousand hectares, IrrigationArea in hectares
+CROPPING_AREA_HA = 1000.0
+
+# Only absolute areas can be summed; "Percentage to Geographical Area" rows are left out
+CROPPING_CATEGORY = "area"
+
+BASE_METRICS = (
+    "region_count", "avg_land_holding", "avg_rainfall", "avg_yield_per_hectare",
+    "geographical_area", "net_area_sown", "forest_area", "irrigated_area",
+)
+
+# Derived metrics as percentages: name -> (numerator, denominator, scale)
+DERIVED_METRICS = {
+    "irrigated_pct": ("irrigated_area", "net_area_sown", 100.0 / CROPPING_AREA_HA),
+    "sown_pct": ("net_area_sown", "geographical_area", 100.0),
+    "forest_pct": ("forest_area", "geographical_area", 100.0),
+}
+
+METRICS: List[str] = [*BASE_METRICS, *DERIVED_METRICS]
+SORT_FIELDS = ("state", *METRICS)
+
+
+def _per_state(qs, aggregate, output_field=None) -> Subquery:
+    return Subquery(
+        qs.filter(state_ref=OuterRef("pk")).order_by().values("state_ref").annotate(v=aggregate).values("v")[:1],
+        output_field=output_field or FloatField(),
+    )
+
+
+def from_database() -> List[dict]:
+    """Base metrics of every state with data, in one statement."""
+    regions = Region.objects.all()
+    areas = CroppingStat.objects.filter(category__lower=CROPPING_CATEGORY)
+    irrigation = IrrigationArea.objects.all()
+    qs = State.objects.annotate(
+        region_count=Coalesce(_per_state(regions, Count("pk"), IntegerField()), Value(0)),
+        avg_land_holding=_per_state(regions, Avg(Coalesce(F("land_holding"), F("average_land_holding")))),
+        avg_rainfall=_per_state(regions, Avg("rainfall")),
+        avg_yield_per_hectare=_per_state(regions, Avg("yield_per_hectare")),
+        geographical_area=_per_state(areas, Sum("total_geographical_area")),
+        net_area_sown=_per_state(areas, Sum("net_area_sown")),
+        forest_area=_per_state(areas, Sum("forests")),
+        irrigated_area=_per_state(irrigation, Sum("total_area")),
+    ).filter(
+        Exists(regions.filter(state_ref=OuterRef("pk")))
+        | Exists(areas.filter(state_ref=OuterRef("pk")))
+        | Exists(irrigation.filter(state_ref=OuterRef("pk")))
+    )
+    return [
+        {"id": row.pop("pk"), "state": row.pop("name"), **row}
+        for row in qs.values("pk", "name", "latitude", "longitude", *BASE_METRICS)
+    ]
+
+
+def from_snapshot() -> List[dict]:
+    """The same rows as from_database(), reduced from the column snapshots."""
+    regions = columnar.state_aggregates(columnar.snapshot(Region), {
+        "region_count": ("count", "state_ref_id"),
+        "avg_land_holding": ("mean", "effective_land_holding"),
+        "avg_rainfall": ("mean", "rainfall"),
+        "avg_yield_per_hectare": ("mean", "yield_per_hectare"),
+    })
+    cropping = columnar.snapshot(CroppingStat)
+    areas = columnar.state_aggregates(cropping, {
+        "geographical_area": ("sum", "total_geographical_area"),
+        "net_area_sown": ("sum", "net_area_sown"),
+        "forest_area": ("sum", "forests"),
+    }, mask=cropping.equals_ci("category", CROPPING_CATEGORY))
+    irrigation = columnar.state_aggregates(columnar.snapshot(IrrigationArea), {
+        "irrigated_area": ("sum", "total_area"),
+    })
+
+    rows = []
+    states = State.objects.filter(pk__in=regions.keys() | areas.keys() | irrigation.keys())
+    for pk, name, latitude, longitude in states.values_list("pk", "name", "latitude", "longitude"):
+        row = {"id": pk, "state": name, "latitude": latitude, "longitude": longitude,
+               **dict.fromkeys(BASE_METRICS), "region_count": 0}
+        for group in (regions, areas, irrigation):
+            row.update(group.get(pk, {}))
+        rows.append(row)
+    return rows
+
+
+def _ratio(numerator: Optional[float], denominator: Optional[float], scale: float) -> Optional[float]:
+    if numerator is None or not denominator:
+        return None
+    return numerator * scale / denominator
+
+
+def build(params, use_snapshot: bool = True) -> dict:
+    """Scorecard ordered by ?sort=<metric> (or -<metric>, descending) and cut to ?top=."""
+    sort = params.get("sort") or "state"
+    if sort.lstrip("-") not in SORT_FIELDS:
+        raise ValidationError({"sort": f"Must be one of: {', '.join(SORT_FIELDS)} (prefix - for descending)"})
+    top = params.get("top")
+    if top is not None:
+        try:
+            top = int(top)
+        except ValueError:
+            top = 0
+        if top < 1:
+            raise ValidationError({"top": "Must be a positive integer."})
+
+    rows = from_snapshot() if use_snapshot and columnar.available() else from_database()
+    for row in rows:
+        for name, (numerator, denominator, scale) in DERIVED_METRICS.items():
+            row[name] = _ratio(row[numerator], row[denominator], scale)
+
+    field = sort.lstrip("-")
+    descending = sort.startswith("-")
+    rows.sort(key=lambda r: r["state"], reverse=descending and field == "state")
+    if field != "state":
+        # Stable sort: the name breaks ties, and missing values go last either way
+        present = sorted((r for r in rows if r[field] is not None), key=lambda r: r[field], reverse=descending)
+        rows = present + [r for r in rows if r[field] is None]
+    if top is not None:
+        rows = rows[:top]
+    return {"sort": sort, "count": len(rows), "metrics": METRICS, "results": rows}
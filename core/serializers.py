@@ -1,25 +1,37 @@
 from rest_framework import serializers
 from .models import Region, CroppingStat, IrrigationArea
 
-class RegionSerializer(serializers.ModelSerializer):
+
+class DynamicFieldsModelSerializer(serializers.ModelSerializer):
+    """ModelSerializer taking an optional `fields` kwarg that limits the rendered fields."""
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class RegionSerializer(DynamicFieldsModelSerializer):
     # Expose land_holding, falling back to average_land_holding for backward data
     land_holding = serializers.SerializerMethodField()
 
     class Meta:
         model = Region
-        fields = '__all__'
+        exclude = ['crops', 'geohash', 'state_ref']
 
     def get_land_holding(self, obj: Region):
         return obj.land_holding if obj.land_holding is not None else obj.average_land_holding
 
 
-class CroppingStatSerializer(serializers.ModelSerializer):
+class CroppingStatSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = CroppingStat
-        fields = '__all__'
+        exclude = ['geohash', 'state_ref']
 
 
-class IrrigationAreaSerializer(serializers.ModelSerializer):
+class IrrigationAreaSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = IrrigationArea
-        fields = '__all__'
+        exclude = ['geohash', 'state_ref']
@@ -0,0 +1,83 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import crops, geo, profiling, states, summary, versions
+from .models import CroppingStat, IrrigationArea, ProfileCapture, Region, State
+
+
+@receiver(pre_save, sender=Region)
+@receiver(pre_save, sender=CroppingStat)
+@receiver(pre_save, sender=IrrigationArea)
+def update_geohash(sender, instance, raw=False, **kwargs):
+    geo.set_geohash(instance)
+
+
+@receiver(pre_save, sender=Region)
+@receiver(pre_save, sender=CroppingStat)
+@receiver(pre_save, sender=IrrigationArea)
+def update_state_ref(sender, instance, raw=False, **kwargs):
+    if not raw:
+        states.set_state_ref(instance)
+
+
+@receiver(post_save, sender=State)
+def relink_states(sender, instance: State, raw=False, **kwargs):
+    # A new or edited alias may change what existing rows resolve to
+    if not raw:
+        resolver = states.StateResolver.load()
+        for model in states.STATE_MODELS:
+            states.link_states(model, resolver)
+
+
+@receiver(post_delete, sender=State)
+def unlink_state(sender, **kwargs):
+    # Rows lost their state_ref through SET_NULL, which sends no signals
+    versions.bump(*states.STATE_MODELS)
+
+
+@receiver(pre_save, sender=Region)
+def remember_region_group(sender, instance: Region, raw=False, **kwargs):
+    # An update may move the row to another (state, irrigation_type) group or change its crops
+    instance._summary_old_group = None
+    instance._old_dominant_crops = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    old = Region.objects.filter(pk=instance.pk).values_list("state", "irrigation_type", "dominant_crops").first()
+    if old:
+        instance._summary_old_group = old[:2]
+        instance._old_dominant_crops = old[2]
+
+
+@receiver(post_save, sender=Region)
+def refresh_summary_on_save(sender, instance: Region, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    if created or instance.dominant_crops != getattr(instance, "_old_dominant_crops", None):
+        crops.sync_region_crops([instance])
+    summary.mark_dirty(
+        getattr(instance, "_summary_old_group", None),
+        (instance.state, instance.irrigation_type),
+    )
+
+
+@receiver(post_delete, sender=Region)
+def refresh_summary_on_delete(sender, instance: Region, **kwargs):
+    summary.mark_dirty((instance.state, instance.irrigation_type))
+
+
+@receiver(post_save, sender=Region)
+@receiver(post_save, sender=CroppingStat)
+@receiver(post_save, sender=IrrigationArea)
+@receiver(post_save, sender=State)
+@receiver(post_delete, sender=Region)
+@receiver(post_delete, sender=CroppingStat)
+@receiver(post_delete, sender=IrrigationArea)
+@receiver(post_delete, sender=State)
+def bump_data_version(sender, raw=False, **kwargs):
+    if not raw:
+        versions.bump(sender)
+
+
+@receiver(post_delete, sender=ProfileCapture)
+def delete_profile_file(sender, instance: ProfileCapture, **kwargs):
+    profiling.profile_path(instance).unlink(missing_ok=True)
@@ -0,0 +1,182 @@
+"""
+Canonical state dimension.
+
+Region, CroppingStat and IrrigationArea keep the state name exactly as the
+source dataset spelled it ("JAMMU & KASHMIR", "Orissa", "Mahrashtra") and an
+integer `state_ref` foreign key to the State row it resolves to. State
+filters and cross-dataset joins use the key; the text stays for display and
+as the import key.
+
+StateResolver maps normalized names and aliases to State ids in memory, so
+an import resolves every row without a query: BulkUpserter builds one per
+import and the model pre_save signal uses the process-wide resolver(),
+which is rebuilt when the State table's data version changes.
+"""
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.db.models import Q
+
+from . import geo, versions
+from .models import CroppingStat, IrrigationArea, Region, State
+
+STATE_MODELS = (Region, CroppingStat, IrrigationArea)
+
+# Canonical states/UTs: name -> (approximate centroid, other spellings found in the datasets).
+# Spellings differing only in case, "&"/"and", dots or spacing need no alias (see state_key).
+SEED_STATES: Dict[str, Tuple[Tuple[float, float], Tuple[str, ...]]] = {
+    "Andhra Pradesh": ((15.9129, 79.7400), ()),
+    "Arunachal Pradesh": ((28.2180, 94.7278), ()),
+    "Assam": ((26.2006, 92.9376), ()),
+    "Bihar": ((25.0961, 85.3131), ()),
+    "Chhattisgarh": ((21.2787, 81.8661), ("Chattisgarh",)),
+    "Goa": ((15.2993, 74.1240), ()),
+    "Gujarat": ((22.2587, 71.1924), ()),
+    "Haryana": ((29.0588, 76.0856), ()),
+    "Himachal Pradesh": ((31.1048, 77.1734), ()),
+    "Jharkhand": ((23.6102, 85.2799), ()),
+    "Karnataka": ((15.3173, 75.7139), ()),
+    "Kerala": ((10.8505, 76.2711), ()),
+    "Madhya Pradesh": ((22.9734, 78.6569), ()),
+    "Maharashtra": ((19.7515, 75.7139), ("Mahrashtra",)),
+    "Manipur": ((24.6637, 93.9063), ()),
+    "Meghalaya": ((25.4670, 91.3662), ()),
+    "Mizoram": ((23.1645, 92.9376), ()),
+    "Nagaland": ((26.1584, 94.5624), ()),
+    "Odisha": ((20.9517, 85.0985), ("Orissa",)),
+    "Punjab": ((31.1471, 75.3412), ()),
+    "Rajasthan": ((27.0238, 74.2179), ()),
+    "Sikkim": ((27.5330, 88.5122), ()),
+    "Tamil Nadu": ((11.1271, 78.6569), ("Tamilnadu",)),
+    "Telangana": ((18.1124, 79.0193), ()),
+    "Tripura": ((23.9408, 91.9882), ()),
+    "Uttar Pradesh": ((26.8467, 80.9462), ()),
+    "Uttarakhand": ((30.0668, 79.0193), ("Uttaranchal",)),
+    "West Bengal": ((22.9868, 87.8550), ()),
+    # Union Territories
+    "Andaman and Nicobar Islands": ((11.7401, 92.6586), ("Andaman and Nicobars", "Andaman and Nicobar", "A & N Islands")),
+    "Chandigarh": ((30.7333, 76.7794), ()),
+    "Delhi": ((28.6139, 77.2090), ("NCT of Delhi",)),
+    "Jammu and Kashmir": ((33.7782, 76.5762), ()),
+    "Ladakh": ((34.1526, 77.5770), ()),
+    "Lakshadweep": ((10.5667, 72.6417), ("Lakshwadeep",)),
+    "Puducherry": ((11.9416, 79.8083), ("Pondicherry",)),
+    "Dadra and Nagar Haveli and Daman and Diu": ((20.3974, 72.8328), ()),
+    # Separate UTs until 2020; older datasets still report them individually
+    "Dadra and Nagar Haveli": ((20.1809, 73.0169), ("Dadar and Nagar Haveli",)),
+    "Daman and Diu": ((20.4283, 72.8397), ()),
+}
+
+
+def state_key(name: str) -> str:
+    """Normalized spelling used for matching: case-folded, "&" as "and", no dots, single spaces."""
+    return " ".join(name.replace("&", " and ").replace(".", " ").lower().split())
+
+
+class StateResolver:
+    """In-memory name/alias -> State lookup, built from one query."""
+
+    def __init__(self, states: Iterable[Tuple[int, str, list, Optional[float], Optional[float]]] = ()):
+        self.ids: Dict[str, int] = {}
+        self.names: Dict[int, str] = {}
+        self.centroids: Dict[int, Tuple[float, float]] = {}
+        for pk, name, aliases, latitude, longitude in states:
+            self.names[pk] = name
+            if latitude is not None and longitude is not None:
+                self.centroids[pk] = (latitude, longitude)
+            for spelling in [name, *(aliases or [])]:
+                self.ids.setdefault(state_key(spelling), pk)
+
+    @classmethod
+    def load(cls) -> "StateResolver":
+        return cls(State.objects.values_list("pk", "name", "aliases", "latitude", "longitude"))
+
+    def resolve(self, name: Optional[str]) -> Optional[int]:
+        return self.ids.get(state_key(name)) if name else None
+
+    def centroid(self, name: Optional[str]) -> Optional[Tuple[float, float]]:
+        state_id = self.resolve(name)
+        return self.centroids.get(state_id) if state_id is not None else None
+
+
+_lock = threading.Lock()
+_resolver: Optional[Tuple[str, StateResolver]] = None
+
+
+def resolver() -> StateResolver:
+    """Process-wide resolver, reloaded when the State table's data version moves on."""
+    global _resolver
+    token = versions.token(State)
+    cached = _resolver
+    if cached is not None and cached[0] == token:
+        return cached[1]
+    with _lock:
+        if _resolver is None or _resolver[0] != token:
+            _resolver = (token, StateResolver.load())
+        return _resolver[1]
+
+
+def set_state_ref(instance, states: Optional[StateResolver] = None) -> None:
+    instance.state_ref_id = (states or resolver()).resolve(instance.state)
+
+
+def filter_state(qs, name: str):
+    """
+    Rows of `qs` in state `name` (any known spelling). Names no State
+    resolves fall back to a case-insensitive match on the stored text, so
+    rows outside the dimension (e.g. "All India") stay reachable.
+    """
+    state_id = resolver().resolve(name)
+    if state_id is None:
+        return qs.filter(state__lower=name.lower())
+    return qs.filter(state_ref_id=state_id)
+
+
+def seed_states() -> int:
+    """Create the SEED_STATES rows that do not exist yet; existing rows are left as edited."""
+    existing = set(State.objects.values_list("name", flat=True))
+    missing = [
+        State(name=name, aliases=list(aliases), latitude=lat, longitude=lon)
+        for name, ((lat, lon), aliases) in SEED_STATES.items()
+        if name not in existing
+    ]
+    if missing:
+        State.objects.bulk_create(missing)
+        versions.bump(State)
+    return len(missing)
+
+
+def link_states(model, states: Optional[StateResolver] = None) -> int:
+    """Point every row of `model` at the State its text resolves to; returns the rows changed."""
+    states = states or StateResolver.load()
+    changed = 0
+    for name in model.objects.values_list("state", flat=True).distinct().order_by():
+        state_id = states.resolve(name)
+        rows = model.objects.filter(state=name)
+        if state_id is None:
+            rows = rows.filter(state_ref__isnull=False)
+        else:
+            rows = rows.exclude(state_ref_id=state_id)
+        changed += rows.update(state_ref_id=state_id)
+    if changed:
+        # update() sends no model signals
+        versions.bump(model)
+    return changed
+
+
+def apply_centroids(model, overwrite: bool = True) -> int:
+    """
+    Set latitude/longitude (and geohash) of linked rows to their state's
+    centroid, one UPDATE per state; with overwrite=False only rows without
+    coordinates. Returns the rows changed.
+    """
+    changed = 0
+    centroids = State.objects.exclude(Q(latitude=None) | Q(longitude=None)).values_list("pk", "latitude", "longitude")
+    for state_id, lat, lon in centroids:
+        rows = model.objects.filter(state_ref_id=state_id)
+        if not overwrite:
+            rows = rows.filter(Q(latitude=None) | Q(longitude=None))
+        changed += rows.update(latitude=lat, longitude=lon, geohash=geo.encode(lat, lon))
+    if changed:
+        versions.bump(model)
+    return changed
@@ -1,17 +1,25 @@
 // cropping.js
 
 const BASE_URL = "http://127.0.0.1:8000/api/cropping-stats/";
+const BUNDLE_URL = "http://127.0.0.1:8000/api/bundle/cropping/";
 let chartInstance = null;
-
-async function fetchCroppingStats() {
-  try {
-    const res = await fetch(BASE_URL + '?category=Area', { headers: { 'Content-Type': 'application/json' } });
-    if (!res.ok) return [];
-    return await res.json();
-  } catch (e) {
-    console.error('Fetch cropping stats failed', e);
-    return [];
+let bundleRequest = null;
+
+// Cards, top-15 chart series, trend inputs and land-use table for this page in one (cached) response
+function fetchBundle() {
+  if (!bundleRequest) {
+    bundleRequest = (async () => {
+      try {
+        const res = await fetch(BUNDLE_URL, { headers: { 'Content-Type': 'application/json' } });
+        if (!res.ok) return null;
+        return await res.json();
+      } catch (e) {
+        console.error('Fetch cropping bundle failed', e);
+        return null;
+      }
+    })();
   }
+  return bundleRequest;
 }
 
 // Map toggle functionality
@@ -21,9 +29,6 @@ async function initCroppingMap() {
   mapInstance = L.map('map').setView([20.5937, 78.9629], 5);
   L.tileLayer('https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png').addTo(mapInstance);
 
-  const stats = await fetchCroppingStats();
-  if (!stats.length) return;
-
   const cropPalette = ['#ef4444','#f59e0b','#10b981','#3b82f6','#8b5cf6','#ec4899','#14b8a6','#84cc16'];
   const cropColor = (crop) => {
     if (!crop) return '#9ca3af';
@@ -35,35 +40,38 @@ async function initCroppingMap() {
     return h;
   }
 
-  stats.forEach(s => {
-    if (s.latitude && s.longitude) {
-      const main = 'Net area sown';
-      const marker = L.circleMarker([s.latitude, s.longitude], {
-        radius: 7,
-        color: cropColor(main),
-        fillColor: cropColor(main),
-        fillOpacity: 0.9,
-        weight: 1
-      }).addTo(mapInstance);
-      marker.bindPopup(`<b>${s.state}</b>
-        <br>Category: ${s.category}
-        <br>Total geographical area: ${s.total_geographical_area ?? 'NA'}
-        <br>Reporting area: ${s.reporting_area ?? 'NA'}
-        <br>Forests: ${s.forests ?? 'NA'}
-        <br>Not available for cultivation: ${s.not_available_for_cultivation ?? 'NA'}
-        <br>Permanent pastures: ${s.permanent_pastures ?? 'NA'}
-        <br>Tree crops & groves: ${s.tree_crops_and_groves ?? 'NA'}
-        <br>Culturable wasteland: ${s.culturable_wasteland ?? 'NA'}
-        <br>Fallow (other than current): ${s.fallow_other_than_current ?? 'NA'}
-        <br>Current fallows: ${s.current_fallows ?? 'NA'}
-        <br>Net area sown: ${s.net_area_sown ?? 'NA'}`);
+  const statPopup = (s) => `<b>${s.state}</b>
+    <br>Category: ${s.category}
+    <br>Total geographical area: ${s.total_geographical_area ?? 'NA'}
+    <br>Reporting area: ${s.reporting_area ?? 'NA'}
+    <br>Forests: ${s.forests ?? 'NA'}
+    <br>Not available for cultivation: ${s.not_available_for_cultivation ?? 'NA'}
+    <br>Permanent pastures: ${s.permanent_pastures ?? 'NA'}
+    <br>Tree crops & groves: ${s.tree_crops_and_groves ?? 'NA'}
+    <br>Culturable wasteland: ${s.culturable_wasteland ?? 'NA'}
+    <br>Fallow (other than current): ${s.fallow_other_than_current ?? 'NA'}
+    <br>Current fallows: ${s.current_fallows ?? 'NA'}
+    <br>Net area sown: ${s.net_area_sown ?? 'NA'}`;
+
+  // Only the clusters for the visible tiles are fetched; a state's full record loads when clicked
+  const main = 'Net area sown';
+  addClusterTiles(mapInstance, BASE_URL, {
+    params: { category: 'Area', metric: 'net_area_sown' },
+    color: () => cropColor(main),
+    popup: c => c.count === 1
+      ? `<b>${c.label}</b><br>Net area sown: ${c.avg ?? 'NA'}`
+      : `<b>${c.count} states</b><br>Net area sown: ${c.sum ?? 'NA'}`,
+    detail: async (c, marker) => {
+      const res = await fetch(`${BASE_URL}${c.id}/`, { headers: { 'Content-Type': 'application/json' } });
+      if (res.ok) marker.setPopupContent(statPopup(await res.json()));
     }
   });
 }
 
 async function initCroppingChart() {
-  const croppingStats = await fetchCroppingStats();
-  if (!croppingStats.length) return;
+  // Top 15 states arrive already ordered
+  const bundle = await fetchBundle();
+  if (!bundle || !bundle.top.length) return;
 
   // Color based on net area sown
   const getColorForArea = (netAreaSown) => {
@@ -74,15 +82,7 @@ async function initCroppingChart() {
     return '#ef4444'; // Red for very high
   };
 
-  const chartData = croppingStats
-    .filter(stat => stat.latitude && stat.longitude)
-    .map(stat => ({
-      name: stat.state,
-      value: stat.net_area_sown || 0,
-      color: getColorForArea(stat.net_area_sown)
-    }))
-    .sort((a, b) => b.value - a.value)
-    .slice(0, 15); // Show top 15 states
+  const chartData = bundle.top.map(t => ({ name: t.label, value: t.value, color: getColorForArea(t.value) }));
 
   const ctx = document.getElementById('croppingChart').getContext('2d');
   
@@ -188,50 +188,40 @@ function toggleChart() {
 
 // Update statistics with real data
 async function updateStatistics() {
-  const croppingStats = await fetchCroppingStats();
-  if (!croppingStats.length) return;
-
-  // Calculate statistics
-  const totalGeographicalArea = croppingStats.reduce((sum, stat) => sum + (stat.total_geographical_area || 0), 0);
-  const netAreaSown = croppingStats.reduce((sum, stat) => sum + (stat.net_area_sown || 0), 0);
-  const forestsArea = croppingStats.reduce((sum, stat) => sum + (stat.forests || 0), 0);
-  const notAvailableForCultivation = croppingStats.reduce((sum, stat) => sum + (stat.not_available_for_cultivation || 0), 0);
-  const currentFallows = croppingStats.reduce((sum, stat) => sum + (stat.current_fallows || 0), 0);
-  const statesCount = new Set(croppingStats.map(stat => stat.state)).size;
+  const bundle = await fetchBundle();
+  if (!bundle || !bundle.cards.count) return;
+  const cards = bundle.cards;
 
   // Update summary statistics
-  document.getElementById('total-geographical-area').textContent = totalGeographicalArea.toLocaleString();
-  document.getElementById('net-area-sown').textContent = netAreaSown.toLocaleString();
-  document.getElementById('forests-area').textContent = forestsArea.toLocaleString();
-  document.getElementById('states-count').textContent = statesCount;
+  document.getElementById('total-geographical-area').textContent = cards.total_geographical_area.toLocaleString();
+  document.getElementById('net-area-sown').textContent = cards.net_area_sown.toLocaleString();
+  document.getElementById('forests-area').textContent = cards.forests.toLocaleString();
+  document.getElementById('states-count').textContent = cards.states;
 
   // Update KPI cards
-  document.getElementById('kpi-total-geographical').textContent = totalGeographicalArea.toLocaleString() + ' Ha';
-  document.getElementById('kpi-net-area-sown').textContent = netAreaSown.toLocaleString() + ' Ha';
-  document.getElementById('kpi-forests').textContent = forestsArea.toLocaleString() + ' Ha';
-  document.getElementById('kpi-not-available').textContent = notAvailableForCultivation.toLocaleString() + ' Ha';
-  document.getElementById('kpi-current-fallows').textContent = currentFallows.toLocaleString() + ' Ha';
-  document.getElementById('kpi-states-count').textContent = statesCount;
+  document.getElementById('kpi-total-geographical').textContent = cards.total_geographical_area.toLocaleString() + ' Ha';
+  document.getElementById('kpi-net-area-sown').textContent = cards.net_area_sown.toLocaleString() + ' Ha';
+  document.getElementById('kpi-forests').textContent = cards.forests.toLocaleString() + ' Ha';
+  document.getElementById('kpi-not-available').textContent = cards.not_available_for_cultivation.toLocaleString() + ' Ha';
+  document.getElementById('kpi-current-fallows').textContent = cards.current_fallows.toLocaleString() + ' Ha';
+  document.getElementById('kpi-states-count').textContent = cards.states;
 }
 
 // Populate land use table
 async function populateLandUseTable() {
-  const croppingStats = await fetchCroppingStats();
-  if (!croppingStats.length) return;
+  const bundle = await fetchBundle();
+  if (!bundle || !bundle.table.rows.length) return;
 
   const tableBody = document.getElementById('land-use-table-body');
   tableBody.innerHTML = '';
 
-  croppingStats.forEach(stat => {
+  // Rows arrive as [state, category, total_geographical_area, net_area_sown, forests, current_fallows, culturable_wasteland]
+  bundle.table.rows.forEach(([state, category, ...areas]) => {
     const row = document.createElement('tr');
     row.innerHTML = `
-      <td>${stat.state}</td>
-      <td>${stat.category}</td>
-      <td>${(stat.total_geographical_area || 0).toLocaleString()}</td>
-      <td>${(stat.net_area_sown || 0).toLocaleString()}</td>
-      <td>${(stat.forests || 0).toLocaleString()}</td>
-      <td>${(stat.current_fallows || 0).toLocaleString()}</td>
-      <td>${(stat.culturable_wasteland || 0).toLocaleString()}</td>
+      <td>${state}</td>
+      <td>${category}</td>
+      ${areas.map(v => `<td>${(v || 0).toLocaleString()}</td>`).join('')}
     `;
     tableBody.appendChild(row);
   });
@@ -277,12 +267,12 @@ function initTableFiltering() {
 
 // Initialize trend charts
 async function initTrendCharts() {
-  const croppingStats = await fetchCroppingStats();
-  if (!croppingStats.length) return;
+  const bundle = await fetchBundle();
+  if (!bundle || !bundle.cards.count) return;
 
-  // Calculate average net area sown for trend
-  const avgNetAreaSown = croppingStats.reduce((sum, stat) => sum + (stat.net_area_sown || 0), 0) / croppingStats.length;
-  const avgForests = croppingStats.reduce((sum, stat) => sum + (stat.forests || 0), 0) / croppingStats.length;
+  // Average net area sown and forests, scaled into the trend lines
+  const avgNetAreaSown = bundle.trends.avg_net_area_sown;
+  const avgForests = bundle.trends.avg_forests;
 
   // Land Utilization Chart
   const utilizationCtx = document.getElementById('utilizationChart');
@@ -1,36 +1,30 @@
 // holding.js
 
 const BASE_URL = "http://127.0.0.1:8000/api/regions/";
-
-async function fetchRegions() {
-  try {
-    const res = await fetch(BASE_URL, { headers: { 'Content-Type': 'application/json' } });
-    if (!res.ok) return [];
-    return await res.json();
-  } catch (e) {
-    console.error('Fetch regions failed', e);
-    return [];
+const BUNDLE_URL = "http://127.0.0.1:8000/api/bundle/holding/";
+let bundleRequest = null;
+
+// Cards, top-15 chart series and legend breaks for this page in one (cached) response
+function fetchBundle() {
+  if (!bundleRequest) {
+    bundleRequest = (async () => {
+      try {
+        const res = await fetch(BUNDLE_URL, { headers: { 'Content-Type': 'application/json' } });
+        if (!res.ok) return null;
+        return await res.json();
+      } catch (e) {
+        console.error('Fetch holding bundle failed', e);
+        return null;
+      }
+    })();
   }
+  return bundleRequest;
 }
 
-let mapInstance = null;
-let chartInstance = null;
-
-async function initHoldingMap() {
-  mapInstance = L.map('map').setView([20.5937, 78.9629], 5);
-  L.tileLayer('https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png').addTo(mapInstance);
-
-  const regions = await fetchRegions();
-  if (!regions.length) return;
-
-  const values = regions
-    .map(r => r.land_holding ?? r.average_land_holding)
-    .filter(v => typeof v === 'number' && !isNaN(v))
-    .sort((a,b) => a-b);
-  const q = (p) => values.length ? values[Math.floor((values.length-1)*p)] : undefined;
-  const q1 = q(0.25), q2 = q(0.5), q3 = q(0.75);
-
-  const colorFor = (v) => {
+// Colour for a land holding value given the server's Q1/Q2/Q3 breaks
+function holdingColor(breaks) {
+  const [q1, q2, q3] = breaks ? breaks.quantiles.map(q => q.value) : [];
+  return (v) => {
     if (v == null) return '#9ca3af';
     if (q1 == null || q2 == null || q3 == null) return '#3b82f6';
     if (v <= q1) return '#a7f3d0';
@@ -38,19 +32,25 @@ async function initHoldingMap() {
     if (v <= q3) return '#10b981';
     return '#047857';
   };
+}
 
-  regions.forEach(r => {
-    if (r.latitude && r.longitude) {
-      const lh = r.land_holding ?? r.average_land_holding;
-      const marker = L.circleMarker([r.latitude, r.longitude], {
-        radius: 7,
-        color: colorFor(lh),
-        fillColor: colorFor(lh),
-        fillOpacity: 0.9,
-        weight: 1
-      }).addTo(mapInstance);
-      marker.bindPopup(`<b>${r.name}</b><br>Land Holding: ${lh ?? 'N/A'} ha`);
-    }
+let mapInstance = null;
+let chartInstance = null;
+
+async function initHoldingMap() {
+  mapInstance = L.map('map').setView([20.5937, 78.9629], 5);
+  L.tileLayer('https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png').addTo(mapInstance);
+
+  const bundle = await fetchBundle();
+  const colorFor = holdingColor(bundle && bundle.map);
+
+  // Only the clusters for the visible tiles are fetched
+  addClusterTiles(mapInstance, BASE_URL, {
+    params: { metric: 'land_holding' },
+    color: c => colorFor(c.avg),
+    popup: c => c.count === 1
+      ? `<b>${c.label}</b><br>Land Holding: ${c.avg ?? 'N/A'} ha`
+      : `<b>${c.count} regions</b><br>Avg Land Holding: ${c.avg != null ? c.avg.toFixed(2) : 'N/A'} ha`
   });
 
   const legend = L.control({ position: 'bottomright' });
@@ -73,34 +73,12 @@ async function initHoldingMap() {
 }
 
 async function initHoldingChart() {
-  const regions = await fetchRegions();
-  if (!regions.length) return;
+  // Top 15 regions arrive already ordered
+  const bundle = await fetchBundle();
+  if (!bundle || !bundle.top.length) return;
 
-  const values = regions
-    .map(r => r.land_holding ?? r.average_land_holding)
-    .filter(v => typeof v === 'number' && !isNaN(v))
-    .sort((a,b) => a-b);
-  const q = (p) => values.length ? values[Math.floor((values.length-1)*p)] : undefined;
-  const q1 = q(0.25), q2 = q(0.5), q3 = q(0.75);
-
-  const colorFor = (v) => {
-    if (v == null) return '#9ca3af';
-    if (q1 == null || q2 == null || q3 == null) return '#3b82f6';
-    if (v <= q1) return '#a7f3d0';
-    if (v <= q2) return '#34d399';
-    if (v <= q3) return '#10b981';
-    return '#047857';
-  };
-
-  const chartData = regions
-    .filter(r => r.latitude && r.longitude)
-    .map(r => ({
-      name: r.name,
-      value: r.land_holding ?? r.average_land_holding,
-      color: colorFor(r.land_holding ?? r.average_land_holding)
-    }))
-    .sort((a, b) => (b.value || 0) - (a.value || 0))
-    .slice(0, 15); // Show top 15 regions
+  const colorFor = holdingColor(bundle.map);
+  const chartData = bundle.top.map(t => ({ name: t.label, value: t.value, color: colorFor(t.value) }));
 
   const ctx = document.getElementById('landHoldingChart').getContext('2d');
   
@@ -213,35 +191,23 @@ function toggleChart() {
 
 // Update statistics with real data
 async function updateStatistics() {
-  const regions = await fetchRegions();
-  if (!regions.length) return;
-
-  // Calculate statistics
-  const totalLandHolding = regions.reduce((sum, region) => {
-    const landHolding = region.land_holding ?? region.average_land_holding;
-    return sum + (landHolding || 0);
-  }, 0);
-  
-  const avgLandHolding = totalLandHolding / regions.length;
-  const avgYield = regions.reduce((sum, region) => sum + (region.yield_per_hectare || 0), 0) / regions.length;
-  const avgRainfall = regions.reduce((sum, region) => sum + (region.rainfall || 0), 0) / regions.length;
-  const statesCount = new Set(regions.map(region => region.state)).size;
-  const irrigatedRegions = regions.filter(region => region.irrigation_area && region.irrigation_area > 0).length;
-  const irrigationCoverage = (irrigatedRegions / regions.length * 100).toFixed(1);
+  const bundle = await fetchBundle();
+  if (!bundle || !bundle.cards.count) return;
+  const cards = bundle.cards;
 
   // Update summary statistics
-  document.getElementById('total-land-holding').textContent = totalLandHolding.toLocaleString();
-  document.getElementById('regions-count').textContent = regions.length;
-  document.getElementById('avg-land-holding').textContent = avgLandHolding.toFixed(1);
-  document.getElementById('states-count').textContent = statesCount;
+  document.getElementById('total-land-holding').textContent = cards.total_land_holding.toLocaleString();
+  document.getElementById('regions-count').textContent = cards.count;
+  document.getElementById('avg-land-holding').textContent = cards.avg_land_holding.toFixed(1);
+  document.getElementById('states-count').textContent = cards.states;
 
   // Update KPI cards
-  document.getElementById('kpi-regions-count').textContent = regions.length;
-  document.getElementById('kpi-avg-land-holding').textContent = avgLandHolding.toFixed(1) + ' Ha';
-  document.getElementById('kpi-avg-yield').textContent = avgYield.toFixed(1) + ' Q/Ha';
-  document.getElementById('kpi-avg-rainfall').textContent = avgRainfall.toFixed(1) + ' mm';
-  document.getElementById('kpi-irrigation-coverage').textContent = irrigationCoverage + '%';
-  document.getElementById('kpi-states-count').textContent = statesCount;
+  document.getElementById('kpi-regions-count').textContent = cards.count;
+  document.getElementById('kpi-avg-land-holding').textContent = cards.avg_land_holding.toFixed(1) + ' Ha';
+  document.getElementById('kpi-avg-yield').textContent = cards.avg_yield_per_hectare.toFixed(1) + ' Q/Ha';
+  document.getElementById('kpi-avg-rainfall').textContent = cards.avg_rainfall.toFixed(1) + ' mm';
+  document.getElementById('kpi-irrigation-coverage').textContent = cards.irrigation_coverage.toFixed(1) + '%';
+  document.getElementById('kpi-states-count').textContent = cards.states;
 }
 
 // 🚪 Logout functionality
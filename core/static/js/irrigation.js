@@ -1,26 +1,31 @@
 // irrigation.js
 
 const BASE_URL = "http://127.0.0.1:8000/api/irrigation-areas/";
+const BUNDLE_URL = "http://127.0.0.1:8000/api/bundle/irrigation/";
 let chartInstance = null;
+let bundleRequest = null;
 
-async function fetchIrrigationAreas() {
-  try {
-    const res = await fetch(BASE_URL, { headers: { 'Content-Type': 'application/json' } });
-    if (!res.ok) return [];
-    return await res.json();
-  } catch (e) {
-    console.error('Fetch irrigation areas failed', e);
-    return [];
+// Cards and top-15 chart series for this page in one (cached) response
+function fetchBundle() {
+  if (!bundleRequest) {
+    bundleRequest = (async () => {
+      try {
+        const res = await fetch(BUNDLE_URL, { headers: { 'Content-Type': 'application/json' } });
+        if (!res.ok) return null;
+        return await res.json();
+      } catch (e) {
+        console.error('Fetch irrigation bundle failed', e);
+        return null;
+      }
+    })();
   }
+  return bundleRequest;
 }
 
 async function initIrrigationMap() {
   mapInstance = L.map('map').setView([20.5937, 78.9629], 5);
   L.tileLayer('https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png').addTo(mapInstance);
 
-  const irrigationAreas = await fetchIrrigationAreas();
-  if (!irrigationAreas.length) return;
-
   // Color based on total irrigation area
   const getColorForArea = (totalArea) => {
     if (!totalArea || totalArea === 0) return '#9ca3af'; // Gray for no data
@@ -30,29 +35,27 @@ async function initIrrigationMap() {
     return '#ef4444'; // Red for very high
   };
 
-  irrigationAreas.forEach(area => {
-    if (area.latitude && area.longitude) {
-      const color = getColorForArea(area.total_area);
-      const marker = L.circleMarker([area.latitude, area.longitude], {
-        radius: 8,
-        color: color,
-        fillColor: color,
-        fillOpacity: 0.8,
-        weight: 2
-      }).addTo(mapInstance);
-      
-      const popupContent = `
-        <div style="min-width: 250px;">
-          <h4 style="margin: 0 0 8px 0; color: #2d3748;">${area.state}</h4>
-          <p style="margin: 4px 0;"><strong>Total Irrigated Area:</strong> ${area.total_area ? area.total_area.toLocaleString() + ' Ha' : 'N/A'}</p>
-          <p style="margin: 4px 0;"><strong>Kharif:</strong> ${area.kharif_area ? area.kharif_area.toLocaleString() + ' Ha' : 'N/A'}</p>
-          <p style="margin: 4px 0;"><strong>Rabi:</strong> ${area.rabi_area ? area.rabi_area.toLocaleString() + ' Ha' : 'N/A'}</p>
-          <p style="margin: 4px 0;"><strong>Perennial:</strong> ${area.perennial_area ? area.perennial_area.toLocaleString() + ' Ha' : 'N/A'}</p>
-          <p style="margin: 4px 0;"><strong>Others:</strong> ${area.others_area ? area.others_area.toLocaleString() + ' Ha' : 'N/A'}</p>
-        </div>
-      `;
-      
-      marker.bindPopup(popupContent);
+  const areaPopup = (area) => `
+    <div style="min-width: 250px;">
+      <h4 style="margin: 0 0 8px 0; color: #2d3748;">${area.state}</h4>
+      <p style="margin: 4px 0;"><strong>Total Irrigated Area:</strong> ${area.total_area ? area.total_area.toLocaleString() + ' Ha' : 'N/A'}</p>
+      <p style="margin: 4px 0;"><strong>Kharif:</strong> ${area.kharif_area ? area.kharif_area.toLocaleString() + ' Ha' : 'N/A'}</p>
+      <p style="margin: 4px 0;"><strong>Rabi:</strong> ${area.rabi_area ? area.rabi_area.toLocaleString() + ' Ha' : 'N/A'}</p>
+      <p style="margin: 4px 0;"><strong>Perennial:</strong> ${area.perennial_area ? area.perennial_area.toLocaleString() + ' Ha' : 'N/A'}</p>
+      <p style="margin: 4px 0;"><strong>Others:</strong> ${area.others_area ? area.others_area.toLocaleString() + ' Ha' : 'N/A'}</p>
+    </div>
+  `;
+
+  // Only the clusters for the visible tiles are fetched; a state's full record loads when clicked
+  addClusterTiles(mapInstance, BASE_URL, {
+    params: { metric: 'total_area' },
+    color: c => getColorForArea(c.avg),
+    popup: c => c.count === 1
+      ? areaPopup({ state: c.label, total_area: c.avg })
+      : `<b>${c.count} states</b><br>Total Irrigated Area: ${c.sum ? c.sum.toLocaleString() + ' Ha' : 'N/A'}`,
+    detail: async (c, marker) => {
+      const res = await fetch(`${BASE_URL}${c.id}/`, { headers: { 'Content-Type': 'application/json' } });
+      if (res.ok) marker.setPopupContent(areaPopup(await res.json()));
     }
   });
 
@@ -92,8 +95,9 @@ async function initIrrigationMap() {
 }
 
 async function initIrrigationChart() {
-  const irrigationAreas = await fetchIrrigationAreas();
-  if (!irrigationAreas.length) return;
+  // Top 15 states arrive already ordered
+  const bundle = await fetchBundle();
+  if (!bundle || !bundle.top.length) return;
 
   // Color based on total irrigation area
   const getColorForArea = (totalArea) => {
@@ -104,15 +108,7 @@ async function initIrrigationChart() {
     return '#ef4444'; // Red for very high
   };
 
-  const chartData = irrigationAreas
-    .filter(area => area.latitude && area.longitude)
-    .map(area => ({
-      name: area.state,
-      value: area.total_area || 0,
-      color: getColorForArea(area.total_area)
-    }))
-    .sort((a, b) => b.value - a.value)
-    .slice(0, 15); // Show top 15 states
+  const chartData = bundle.top.map(t => ({ name: t.label, value: t.value, color: getColorForArea(t.value) }));
 
   const ctx = document.getElementById('irrigationChart').getContext('2d');
   
@@ -359,30 +355,23 @@ function initTrendCharts() {
 
 // Update statistics with real data
 async function updateStatistics() {
-  const irrigationAreas = await fetchIrrigationAreas();
-  if (!irrigationAreas.length) return;
-
-  // Calculate totals
-  const totalArea = irrigationAreas.reduce((sum, area) => sum + (area.total_area || 0), 0);
-  const kharifArea = irrigationAreas.reduce((sum, area) => sum + (area.kharif_area || 0), 0);
-  const rabiArea = irrigationAreas.reduce((sum, area) => sum + (area.rabi_area || 0), 0);
-  const perennialArea = irrigationAreas.reduce((sum, area) => sum + (area.perennial_area || 0), 0);
-  const othersArea = irrigationAreas.reduce((sum, area) => sum + (area.others_area || 0), 0);
-  const statesCount = new Set(irrigationAreas.map(area => area.state)).size;
+  const bundle = await fetchBundle();
+  if (!bundle || !bundle.cards.count) return;
+  const cards = bundle.cards;
 
   // Update summary statistics
-  document.getElementById('total-irrigated-area').textContent = totalArea.toLocaleString();
-  document.getElementById('kharif-area').textContent = kharifArea.toLocaleString();
-  document.getElementById('rabi-area').textContent = rabiArea.toLocaleString();
-  document.getElementById('perennial-area').textContent = perennialArea.toLocaleString();
+  document.getElementById('total-irrigated-area').textContent = cards.total_area.toLocaleString();
+  document.getElementById('kharif-area').textContent = cards.kharif_area.toLocaleString();
+  document.getElementById('rabi-area').textContent = cards.rabi_area.toLocaleString();
+  document.getElementById('perennial-area').textContent = cards.perennial_area.toLocaleString();
 
   // Update KPI cards
-  document.getElementById('kpi-total-area').textContent = totalArea.toLocaleString() + ' Ha';
-  document.getElementById('kpi-kharif-area').textContent = kharifArea.toLocaleString() + ' Ha';
-  document.getElementById('kpi-rabi-area').textContent = rabiArea.toLocaleString() + ' Ha';
-  document.getElementById('kpi-perennial-area').textContent = perennialArea.toLocaleString() + ' Ha';
-  document.getElementById('kpi-others-area').textContent = othersArea.toLocaleString() + ' Ha';
-  document.getElementById('kpi-states-count').textContent = statesCount;
+  document.getElementById('kpi-total-area').textContent = cards.total_area.toLocaleString() + ' Ha';
+  document.getElementById('kpi-kharif-area').textContent = cards.kharif_area.toLocaleString() + ' Ha';
+  document.getElementById('kpi-rabi-area').textContent = cards.rabi_area.toLocaleString() + ' Ha';
+  document.getElementById('kpi-perennial-area').textContent = cards.perennial_area.toLocaleString() + ' Ha';
+  document.getElementById('kpi-others-area').textContent = cards.others_area.toLocaleString() + ' Ha';
+  document.getElementById('kpi-states-count').textContent = cards.states;
 }
 
 // 🚪 Logout functionality
@@ -0,0 +1,75 @@
+// tiles.js — clustered map markers loaded per visible tile from <resource>/tiles/{z}/{x}/{y}/
+
+function tileRange(map) {
+  const z = Math.max(0, Math.round(map.getZoom()));
+  const n = 2 ** z;
+  const bounds = map.getBounds();
+  const toX = (lon) => Math.floor((lon + 180) / 360 * n);
+  const toY = (lat) => {
+    const r = lat * Math.PI / 180;
+    return Math.floor((1 - Math.log(Math.tan(r) + 1 / Math.cos(r)) / Math.PI) / 2 * n);
+  };
+  const clamp = (v) => Math.min(n - 1, Math.max(0, v));
+  return {
+    z,
+    x0: clamp(toX(bounds.getWest())), x1: clamp(toX(bounds.getEast())),
+    y0: clamp(toY(Math.min(bounds.getNorth(), 85.0511))), y1: clamp(toY(Math.max(bounds.getSouth(), -85.0511))),
+  };
+}
+
+// options: params (extra query params), color(cluster), popup(cluster) -> html,
+// detail(cluster, marker) for single-row clusters that need more than the tile carries
+function addClusterTiles(map, baseUrl, options = {}) {
+  const layer = L.layerGroup().addTo(map);
+  const loaded = new Set();
+  let zoom = null;
+  const query = new URLSearchParams(options.params || {}).toString();
+
+  async function loadTile(z, x, y) {
+    const key = `${z}/${x}/${y}`;
+    if (loaded.has(key)) return;
+    loaded.add(key);
+    try {
+      const res = await fetch(`${baseUrl}tiles/${key}/${query ? '?' + query : ''}`, { headers: { 'Content-Type': 'application/json' } });
+      if (!res.ok || z !== zoom) return;
+      const tile = await res.json();
+      tile.clusters.forEach(c => {
+        const color = options.color ? options.color(c) : '#3b82f6';
+        const marker = L.circleMarker([c.lat, c.lon], {
+          radius: c.count > 1 ? Math.min(22, 7 + Math.log2(c.count) * 2) : 7,
+          color: color,
+          fillColor: color,
+          fillOpacity: 0.9,
+          weight: 1
+        }).addTo(layer);
+        if (c.count > 1) {
+          marker.bindTooltip(String(c.count), { permanent: true, direction: 'center', className: 'cluster-count' });
+        }
+        if (options.popup) marker.bindPopup(options.popup(c));
+        if (c.count === 1 && options.detail) {
+          marker.on('click', () => options.detail(c, marker));
+        }
+      });
+    } catch (e) {
+      loaded.delete(key);
+      console.error('Fetch tile failed', e);
+    }
+  }
+
+  function refresh() {
+    const r = tileRange(map);
+    if (r.z !== zoom) {
+      // Clusters are zoom specific; start over at the new zoom level
+      zoom = r.z;
+      layer.clearLayers();
+      loaded.clear();
+    }
+    for (let x = r.x0; x <= r.x1; x++) {
+      for (let y = r.y0; y <= r.y1; y++) loadTile(r.z, x, y);
+    }
+  }
+
+  map.on('moveend', refresh);
+  refresh();
+  return layer;
+}
@@ -0,0 +1,234 @@
+"""
+Incrementally maintained Region rollup backing /api/regions/summary/.
+
+RegionSummary holds one row per (state, irrigation_type) with counts, sums,
+mins and maxes plus crop frequencies. Region save/delete signals and the
+import commands refresh only the groups they touched; the summary endpoint
+then merges a handful of rollup rows instead of scanning Region.
+"""
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from django.db import transaction
+from django.db.models import Avg, Count, Max, Min, Q, Sum
+
+from . import states, versions
+from .models import Region, RegionCrop, RegionSummary
+
+GroupKey = Tuple[str, str]
+
+# Keep the OR-ed group filter well below SQLite's expression depth limit
+_GROUP_CHUNK = 200
+
+_local = threading.local()
+
+
+def _crop_counts(qs) -> Dict[GroupKey, Counter]:
+    counts: Dict[GroupKey, Counter] = {}
+    rows = (
+        RegionCrop.objects.filter(region__in=qs)
+        .values_list("region__state", "region__irrigation_type", "crop__name")
+        .annotate(c=Count("id"))
+        .order_by()
+    )
+    for state, irrigation_type, crop, c in rows:
+        counts.setdefault((state, irrigation_type), Counter())[crop] += c
+    return counts
+
+
+def _build_rows(qs):
+    grouped = qs.values("state", "irrigation_type").annotate(
+        count=Count("id"),
+        land_holding_count=Count("land_holding"),
+        land_holding_sum=Sum("land_holding"),
+        land_holding_min=Min("land_holding"),
+        land_holding_max=Max("land_holding"),
+        average_land_holding_sum=Sum("average_land_holding"),
+        rainfall_sum=Sum("rainfall"),
+        rainfall_min=Min("rainfall"),
+        rainfall_max=Max("rainfall"),
+        irrigation_area_count=Count("irrigation_area"),
+        irrigation_area_sum=Sum("irrigation_area"),
+        irrigation_area_min=Min("irrigation_area"),
+        irrigation_area_max=Max("irrigation_area"),
+    ).order_by()
+    crops = _crop_counts(qs)
+    return [
+        RegionSummary(crop_counts=dict(crops.get((g["state"], g["irrigation_type"]), {})), **g)
+        for g in grouped
+    ]
+
+
+def _group_filter(keys: Iterable[GroupKey]) -> Q:
+    q = Q(pk__in=[])
+    for state, irrigation_type in keys:
+        q |= Q(state=state, irrigation_type=irrigation_type)
+    return q
+
+
+def refresh_groups(keys: Iterable[GroupKey]) -> None:
+    """Recompute the rollup rows for the given (state, irrigation_type) groups."""
+    keys = list(set(keys))
+    with transaction.atomic():
+        for i in range(0, len(keys), _GROUP_CHUNK):
+            chunk = keys[i:i + _GROUP_CHUNK]
+            q = _group_filter(chunk)
+            RegionSummary.objects.filter(q).delete()
+            RegionSummary.objects.bulk_create(_build_rows(Region.objects.filter(q)))
+        # Responses cached between the Region write and this refresh hold the old rollup
+        versions.bump(Region)
+
+
+def rebuild() -> int:
+    """Recompute the whole rollup from Region. Returns the number of groups."""
+    with transaction.atomic():
+        RegionSummary.objects.all().delete()
+        rows = RegionSummary.objects.bulk_create(_build_rows(Region.objects.all()))
+        versions.bump(Region)
+    return len(rows)
+
+
+def mark_dirty(*keys: Optional[GroupKey]) -> None:
+    """Refresh groups now, or once at the end of an enclosing deferred_refresh() block."""
+    keys = {k for k in keys if k is not None}
+    if not keys:
+        return
+    pending: Optional[Set[GroupKey]] = getattr(_local, "pending", None)
+    if pending is not None:
+        pending.update(keys)
+    else:
+        refresh_groups(keys)
+
+
+@contextmanager
+def deferred_refresh():
+    """Collect dirty groups while importing and refresh each of them once on exit."""
+    if getattr(_local, "pending", None) is not None:
+        # Nested block: the outermost one does the refresh
+        yield
+        return
+    _local.pending = set()
+    try:
+        yield
+        pending = _local.pending
+    finally:
+        _local.pending = None
+    if pending:
+        refresh_groups(pending)
+
+
+def summarize(state: Optional[str] = None, irrigation_type: Optional[str] = None) -> dict:
+    """Build the /summary/ payload from rollup rows filtered by state/irrigation type."""
+    rows = RegionSummary.objects.all()
+    if irrigation_type:
+        rows = rows.filter(irrigation_type__iexact=irrigation_type)
+    if state:
+        resolver = states.resolver()
+        state_id = resolver.resolve(state)
+        if state_id is None:
+            rows = rows.filter(state__iexact=state)
+        else:
+            # Rollup groups keep the source spelling; match every spelling of the state, as the list filter does
+            rows = [row for row in rows if resolver.resolve(row.state) == state_id]
+
+    count = 0
+    lh_count, lh_sum, legacy_sum = 0, 0.0, 0.0
+    lh_min = lh_max = None
+    rain_sum = 0.0
+    ia_count, ia_sum = 0, 0.0
+    type_counts: Counter = Counter()
+    crop_counts: Counter = Counter()
+    for row in rows:
+        count += row.count
+        lh_count += row.land_holding_count
+        lh_sum += row.land_holding_sum or 0.0
+        legacy_sum += row.average_land_holding_sum or 0.0
+        if row.land_holding_min is not None:
+            lh_min = row.land_holding_min if lh_min is None else min(lh_min, row.land_holding_min)
+        if row.land_holding_max is not None:
+            lh_max = row.land_holding_max if lh_max is None else max(lh_max, row.land_holding_max)
+        rain_sum += row.rainfall_sum or 0.0
+        ia_count += row.irrigation_area_count
+        ia_sum += row.irrigation_area_sum or 0.0
+        type_counts[row.irrigation_type] += row.count
+        crop_counts.update(row.crop_counts)
+
+    if lh_count:
+        avg_land_holding = lh_sum / lh_count
+    else:
+        # Use legacy average if new is null
+        avg_land_holding = legacy_sum / count if count else None
+
+    # Ties go to the first name, as in the live queries and the column snapshot
+    top_irrigation = sorted(type_counts.items(), key=lambda x: (-x[1], x[0]))[:1]
+    top_crops = sorted(crop_counts.items(), key=lambda x: (-x[1], x[0]))[:5]
+
+    return {
+        "count": count,
+        "avg_land_holding": avg_land_holding,
+        "min_land_holding": lh_min,
+        "max_land_holding": lh_max,
+        "avg_rainfall": rain_sum / count if count else None,
+        "total_irrigation_area": ia_sum / ia_count if ia_count else None,
+        "top_irrigation_type": top_irrigation[0][0] if top_irrigation else None,
+        "top_crops": [c for c, _ in top_crops],
+    }
+
+
+# Live summary over a filtered Region queryset, for filters the rollup cannot answer
+
+LIVE_AGGREGATES = {
+    "count": Count("id"),
+    "avg_land_holding": Avg("land_holding"),
+    "avg_land_holding_legacy": Avg("average_land_holding"),
+    "min_land_holding": Min("land_holding"),
+    "max_land_holding": Max("land_holding"),
+    "total_irrigation_area": Avg("irrigation_area"),
+    "avg_rainfall": Avg("rainfall"),
+}
+
+
+def _top_irrigation(qs):
+    # Most common irrigation type, ties to the first name
+    return qs.values("irrigation_type").annotate(c=Count("id")).order_by("-c", "irrigation_type")
+
+
+def _top_crops(qs):
+    # Top crops from the normalized RegionCrop index
+    return (
+        RegionCrop.objects.filter(region__in=qs)
+        .values("crop__name").annotate(c=Count("id")).order_by("-c", "crop__name")[:5]
+    )
+
+
+def _live_payload(aggregates: dict, top_irrigation: Optional[dict], top_crops: list) -> dict:
+    avg_land_holding = aggregates["avg_land_holding"]
+    if avg_land_holding is None:
+        # Use legacy average if new is null
+        avg_land_holding = aggregates["avg_land_holding_legacy"]
+    return {
+        "count": aggregates["count"] or 0,
+        "avg_land_holding": avg_land_holding,
+        "min_land_holding": aggregates["min_land_holding"],
+        "max_land_holding": aggregates["max_land_holding"],
+        "avg_rainfall": aggregates["avg_rainfall"],
+        "total_irrigation_area": aggregates["total_irrigation_area"],
+        "top_irrigation_type": top_irrigation["irrigation_type"] if top_irrigation else None,
+        "top_crops": [c["crop__name"] for c in top_crops],
+    }
+
+
+def summarize_queryset(qs) -> dict:
+    """The /summary/ payload computed from the Region rows of `qs`."""
+    return _live_payload(qs.aggregate(**LIVE_AGGREGATES), _top_irrigation(qs).first(), list(_top_crops(qs)))
+
+
+async def asummarize_queryset(qs) -> dict:
+    """summarize_queryset() through the async ORM (core.async_views)."""
+    return _live_payload(
+        await qs.aaggregate(**LIVE_AGGREGATES),
+        await _top_irrigation(qs).afirst(),
+        [c async for c in _top_crops(qs)],
+    )
@@ -1,3 +1,921 @@
-from django.test import TestCase
+import io
+import json
+import math
+import os
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from urllib.parse import parse_qs, urlsplit
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.http import QueryDict
+from django.test import TestCase, override_settings
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional
+    Image = None
+
+from core import caching, columnar, gallery, metrics, scorecard, states, summary, thumbnails
+from core.importing import BulkUpserter, JSONTableReader, region_upserter, table_reader
+from core.management.commands import import_cropping_stats
+from core.models import CroppingStat, GalleryItem, IrrigationArea, ProfileCapture, Region, State
+from core.views import GALLERY_PAGE_SIZE, CroppingStatViewSet, IrrigationAreaViewSet, RegionViewSet
+
+
+class StandInDataGov:
+    """Local stand-in for the data.gov.in resource, serving `records` in pages."""
+
+    def __init__(self, records, fail_once=()):
+        self.records = records
+        self.fail_once = set(fail_once)
+        self.requested = []
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                query = parse_qs(urlsplit(self.path).query)
+                offset, limit = int(query["offset"][0]), int(query["limit"][0])
+                stand_in.requested.append(offset)
+                if offset in stand_in.fail_once:
+                    stand_in.fail_once.discard(offset)
+                    self.reply(503, b"{}")
+                    return
+                page = {"total": len(stand_in.records), "records": stand_in.records[offset:offset + limit]}
+                self.reply(200, json.dumps(page).encode())
+
+            def reply(self, status, body):
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/resource/landholdings"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def landholding_records(n):
+    return [{"state_uts": f"State {i}", "_2021_22": str(1 + i / 10)} for i in range(n)]
+
+
+def make_region(name, **fields):
+    """Region.objects.create() with the required fields defaulted, so signals run."""
+    defaults = dict(state="Punjab", irrigation_type="Canal", average_land_holding=1.0,
+                    dominant_crops="Rice", rainfall=500, yield_per_hectare=2.0)
+    return Region.objects.create(name=name, **{**defaults, **fields})
+
+
+def list_names(response):
+    return sorted(row["name"] for row in json.loads(b"".join(response.streaming_content)
+                                                    if response.streaming else response.content))
+
+
+class ImportGovLandholdingsTests(TestCase):
+    def run_import(self, url, **options):
+        call_command("import_gov_landholdings", api_key="test", base_url=url, limit=5,
+                     workers=3, backoff=0, stdout=io.StringIO(), **options)
+
+    def test_fetches_every_page_and_retries_transient_errors(self):
+        with StandInDataGov(landholding_records(23), fail_once={10}) as api:
+            self.run_import(api.url)
+        self.assertEqual(Region.objects.count(), 23)
+        self.assertEqual(Region.objects.get(name="State 12").land_holding, 2.2)
+        self.assertEqual(api.requested.count(10), 2)
+
+    def test_resumes_from_checkpoint(self):
+        with tempfile.TemporaryDirectory() as tmp, StandInDataGov(landholding_records(23)) as api:
+            path = os.path.join(tmp, "landholdings.json")
+            with open(path, "w") as f:
+                json.dump({"base_url": api.url, "limit": 5, "total": 23, "done": [0, 5]}, f)
+            self.run_import(api.url, checkpoint=path)
+            self.assertFalse(os.path.exists(path))
+        self.assertEqual(sorted(api.requested), [10, 15, 20])
+        self.assertEqual(Region.objects.count(), 13)
+
+
+class ImportAllTests(TestCase):
+    def test_matches_individual_imports(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            manifest = os.path.join(tmp, "manifest.json")
+            with open(manifest, "w") as f:
+                json.dump([
+                    {"kind": "cropping_stats", "path": str(settings.BASE_DIR / "cropping_data.json")},
+                    {"kind": "irrigation_areas", "path": str(settings.BASE_DIR / "irrigation_data.json")},
+                ], f)
+            out = io.StringIO()
+            call_command("import_all", manifest, workers=2, stdout=out)
+        self.assertIn("cropping_data.json", out.getvalue())
+        counts = (CroppingStat.objects.count(), IrrigationArea.objects.count())
+        self.assertTrue(all(counts))
+
+        # Re-running the single-file commands finds every row already imported
+        call_command("import_cropping_stats", path=str(settings.BASE_DIR / "cropping_data.json"), stdout=out)
+        call_command("import_irrigation_areas", path=str(settings.BASE_DIR / "irrigation_data.json"), stdout=out)
+        self.assertEqual((CroppingStat.objects.count(), IrrigationArea.objects.count()), counts)
+
+
+    def test_regions_in_several_files_share_one_upserter(self):
+        header = "name,state,average_land_holding,irrigation_type,dominant_crops,rainfall,yield_per_hectare\n"
+        make_region("Ludhiana", rainfall=100)
+        make_region("Amritsar", rainfall=100)
+        with tempfile.TemporaryDirectory() as tmp:
+            files = {
+                "a.csv": "Amritsar,Punjab,1.0,Canal,Wheat,200,2.0\nKollam,Kerala,0.3,Canal,Coconut,2800,1.5\n",
+                "b.csv": "Kollam,Kerala,0.3,Canal,Coconut,2900,1.5\nLudhiana,Punjab,1.0,Canal,Wheat,300,2.0\n",
+            }
+            for name, rows in files.items():
+                with open(os.path.join(tmp, name), "w") as f:
+                    f.write(header + rows)
+            manifest = os.path.join(tmp, "manifest.json")
+            with open(manifest, "w") as f:
+                json.dump([{"kind": "regions", "path": "a.csv"}, {"kind": "regions", "path": "b.csv", "update": True}], f)
+            call_command("import_all", manifest, workers=1, stdout=io.StringIO())
+        # a.csv leaves existing rows alone by default; b.csv updates the Kollam row a.csv inserted
+        self.assertEqual(sorted(Region.objects.values_list("name", "rainfall")),
+                         [("Amritsar", 100), ("Kollam", 2900), ("Ludhiana", 300)])
+
+class GalleryViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        GalleryItem.objects.bulk_create(
+            GalleryItem(category="holding", image=f"gallery/{i}.jpg", description=f"item {i}") for i in range(10_000)
+        )
+        # Identical timestamps make the id tie-breaker carry the ordering
+        GalleryItem.objects.update(created_at=GalleryItem.objects.first().created_at)
+
+    def test_page_is_bounded_for_a_large_gallery(self):
+        with self.assertNumQueries(1):
+            response = self.client.get("/holding/gallery/")
+        self.assertEqual(len(response.context["items"]), GALLERY_PAGE_SIZE)
+        self.assertLess(len(response.content), 64 * 1024)
+        self.assertContains(response, 'loading="lazy"')
+
+        with self.assertNumQueries(1):
+            more = self.client.get("/holding/gallery/", {"after": response.context["next_cursor"], "partial": "1"})
+        self.assertLess(len(more.content), 64 * 1024)
+        first = [item.id for item in response.context["items"]]
+        second = [item.id for item in more.context["items"]]
+        self.assertEqual(second, list(range(first[-1] - 1, first[-1] - 1 - GALLERY_PAGE_SIZE, -1)))
+        self.assertNotContains(more, "<html")
+
+
+class AsyncReadViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # save() rather than bulk_create, so the signals link states and refresh the rollup
+        for i in range(30):
+            Region.objects.create(
+                name=f"District {i}", state=("Punjab", "Orissa")[i % 2], irrigation_type=("Canal", "Tube well")[i % 3 == 0],
+                average_land_holding=1.0 + i / 10, land_holding=1.0 + i / 10, dominant_crops="Rice, Wheat",
+                rainfall=400 + 25 * i, yield_per_hectare=2.5, irrigation_area=100.0 * i,
+            )
+
+    async def _body(self, response) -> bytes:
+        if response.streaming:
+            return b"".join([chunk async for chunk in response.streaming_content])
+        return response.content
+
+    async def assertSameAsSync(self, sync_path: str, async_path: str):
+        def sync_get():
+            response = self.client.get(sync_path)
+            return response, b"".join(response.streaming_content) if response.streaming else response.content
+
+        expected, expected_body = await sync_to_async(sync_get)()
+        response = await self.async_client.get(async_path)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(await self._body(response), expected_body)
+        self.assertEqual(response["ETag"], expected["ETag"])
+
+    async def test_lists_match_the_sync_api(self):
+        await self.assertSameAsSync("/api/regions/?state=orissa&rainfall_min=500",
+                                    "/api/async/regions/?state=orissa&rainfall_min=500")
+        await self.assertSameAsSync("/api/irrigation-areas/", "/api/async/irrigation-areas/")
+
+    @override_settings(COLUMNAR_ANALYTICS=False)
+    async def test_live_summary_matches_the_sync_api(self):
+        await self.assertSameAsSync("/api/regions/summary/?rainfall_min=600&state=Punjab",
+                                    "/api/async/regions/summary/?rainfall_min=600&state=Punjab")
+
+
+class RequestMetricsTests(TestCase):
+    @override_settings(REQUEST_METRICS=True)
+    def test_routes_are_timed_and_exported(self):
+        metrics.registry.reset()
+        response = self.client.get("/api/cropping-stats/", HTTP_ACCEPT="application/json")
+        b"".join(response.streaming_content)
+        self.assertRegex(response["Server-Timing"], r'^db;dur=[\d.]+;desc="\d+ queries", app;dur=[\d.]+, total;dur=[\d.]+$')
+
+        exported = self.client.get("/metrics").content.decode()
+        labels = 'route="croppingstat-list",method="GET",status="200"'
+        self.assertIn(f'land_insights_request_duration_seconds_bucket{{{labels},le="+Inf"}} 1', exported)
+        self.assertRegex(exported, rf"land_insights_db_queries_total{{{labels}}} [1-9]")
+        self.assertIn(f"land_insights_response_bytes_total{{{labels}}} {len(b'[]')}", exported)
+
+    def test_disabled_by_default(self):
+        response = self.client.get("/api/cropping-stats/", HTTP_ACCEPT="application/json")
+        self.assertNotIn("Server-Timing", response)
+        self.assertEqual(self.client.get("/metrics").status_code, 404)
+
+
+class ProfilingTests(TestCase):
+    def setUp(self):
+        self.profile_dir = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(REQUEST_PROFILING=True, PROFILE_DIR=self.profile_dir, PROFILE_KEEP=2))
+        self.staff = User.objects.create_user("staff", password="pw", is_staff=True, is_superuser=True)
+
+    def test_only_staff_requests_are_profiled(self):
+        self.client.get("/api/regions/summary/", {"profile": "1"})
+        self.assertFalse(ProfileCapture.objects.exists())
+
+        self.client.force_login(self.staff)
+        for _ in range(3):
+            self.client.get("/api/regions/summary/", HTTP_X_PROFILE="1")
+        self.client.get("/api/regions/summary/")
+
+        captures = list(ProfileCapture.objects.all())
+        self.assertEqual(len(captures), 2)
+        self.assertEqual(sorted(os.listdir(self.profile_dir)), sorted(c.file_name for c in captures))
+        self.assertEqual((captures[0].view_name, captures[0].trigger, captures[0].kind), ("region-summary", "request", "cprofile"))
+
+        response = self.client.get(f"/admin/core/profilecapture/{captures[0].pk}/download/")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(b"".join(response.streaming_content))
+
+
+class RegionSummaryTests(TestCase):
+    def test_rollup_and_live_summaries_break_ties_on_the_name(self):
+        for i, (irrigation_type, crops) in enumerate([
+            ("Tube well", "Wheat, Rice"), ("Tube well", "wheat"), ("Canal", "Rice"), ("Canal", "Maize, rice"),
+        ]):
+            Region.objects.create(
+                name=f"District {i}", state="Punjab", irrigation_type=irrigation_type, average_land_holding=1.0,
+                dominant_crops=crops, rainfall=500, yield_per_hectare=2.0,
+            )
+        rollup = summary.summarize(state="Punjab")
+        live = summary.summarize_queryset(Region.objects.all())
+        self.assertEqual(rollup, live)
+        self.assertEqual(rollup["top_irrigation_type"], "Canal")
+        self.assertEqual(rollup["top_crops"], ["Rice", "Wheat", "Maize"])
+
+
+class CropIndexTests(TestCase):
+    def test_crop_filter_matches_whole_crop_names_and_follows_edits(self):
+        crops = {"A": "Rice, Wheat", "B": " rice ", "C": "Licorice", "D": "Wheat,Maize", "E": "RICE, rice"}
+        for name, value in crops.items():
+            make_region(name, dominant_crops=value)
+
+        def expected(crop):
+            return sorted(n for n, v in crops.items() if crop.lower() in [c.strip().lower() for c in v.split(",")])
+
+        for crop in ("Rice", "WHEAT", "maize", "corice"):
+            response = self.client.get("/api/regions/", {"crop": crop}, HTTP_ACCEPT="application/json")
+            self.assertEqual(list_names(response), expected(crop), crop)
+
+        region = Region.objects.get(name="D")
+        region.dominant_crops = "Rice"
+        region.save()
+        crops["D"] = "Rice"
+        response = self.client.get("/api/regions/", {"crop": "rice"}, HTTP_ACCEPT="application/json")
+        self.assertEqual(list_names(response), expected("rice"))
+        self.assertEqual(Region.objects.filter(crops__key="rice").count(), 4)
+
+
+class FilterIndexTests(TestCase):
+    def test_lower_lookups_match_iexact(self):
+        for i, (state, irrigation_type) in enumerate([("Punjab", "Canal"), ("PUNJAB", "canal"), ("Kerala", "Tube Well")]):
+            make_region(f"District {i}", state=state, irrigation_type=irrigation_type)
+        for value in ("canal", "CANAL", "tube well"):
+            self.assertQuerySetEqual(
+                Region.objects.filter(irrigation_type__lower=value.lower()).order_by("pk"),
+                Region.objects.filter(irrigation_type__iexact=value).order_by("pk"),
+            )
+
+    def test_every_list_filter_uses_an_index(self):
+        out = io.StringIO()
+        call_command("benchmark_filters", rows=2000, repeat=1, fail_on_scan=True, stdout=out)
+        self.assertIn("All filters use an index.", out.getvalue())
+        self.assertFalse(Region.objects.exists())
+
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(25):
+            make_region(f"District {i:02}", rainfall=(500, 700, 900)[i % 3], state=("Punjab", "Kerala")[i % 2])
+
+    def walk(self, url, params=None, link="next"):
+        """Follow `link` from url to the end; returns every page's results and the last page's body."""
+        pages = []
+        while url:
+            response = self.client.get(url, params, HTTP_ACCEPT="application/json")
+            self.assertEqual(response.status_code, 200)
+            body = response.json()
+            pages.append(body["results"])
+            url, params = body[link], None
+        return pages, body
+
+    def test_tied_sorts_return_every_row_once_in_order(self):
+        ids = sorted(Region.objects.values_list("pk", flat=True))
+        for sort in ("rainfall", "-rainfall", "state", "-state"):
+            pages, last = self.walk("/api/regions/", {"sort": sort, "page_size": 4})
+            self.assertEqual([len(p) for p in pages], [4] * 6 + [1], sort)
+            rows = [row for page in pages for row in page]
+            self.assertEqual(sorted(row["id"] for row in rows), ids, sort)
+            field = sort.lstrip("-")
+            keys = [(row[field], row["id"]) for row in rows]
+            self.assertEqual(keys, sorted(keys, reverse=sort.startswith("-")), sort)
+
+            # Previous links from the last page retrace the same pages
+            back, first = self.walk(last["previous"], link="previous")
+            self.assertEqual(back, pages[-2::-1], sort)
+            self.assertIsNone(first["previous"])
+
+    def test_malformed_cursor_is_rejected(self):
+        response = self.client.get("/api/regions/", {"cursor": "bm9wZQ=="}, HTTP_ACCEPT="application/json")
+        self.assertEqual(response.status_code, 404)
+
+
+class FastListTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        make_region("Ludhiana", land_holding=None, average_land_holding=1.25, irrigation_area=None,
+                    latitude=30.9, longitude=75.85, dominant_crops="Wheat, Rice")
+        make_region("Idukki \"hills\" \u00e9", state="Kerala", land_holding=0.1, rainfall=3000.5, yield_per_hectare=1e-7)
+        CroppingStat.objects.create(state="Punjab", category="Area", net_area_sown=4100.0, forests=None)
+        CroppingStat.objects.create(state="Kerala", category="Percentage to Geographical Area", net_area_sown=None)
+        IrrigationArea.objects.create(state="Punjab", kharif_area=1.5, total_area=None)
+        IrrigationArea.objects.create(state="Kerala", total_area=2.0e6)
+
+    def assertFastListMatchesSerializer(self, viewset, url, params=None):
+        def get(fast):
+            with mock.patch.object(viewset, "fast_list", fast), mock.patch.object(viewset, "cache_responses", False):
+                response = self.client.get(url, params, HTTP_ACCEPT="application/json")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.streaming, fast)
+            return b"".join(response.streaming_content) if response.streaming else response.content
+
+        self.assertEqual(get(True), get(False), (url, params))
+
+    def test_fast_list_is_byte_identical_to_the_serializer(self):
+        for viewset, url, fields in (
+            (RegionViewSet, "/api/regions/", "name,land_holding,irrigation_area"),
+            (CroppingStatViewSet, "/api/cropping-stats/", "state,forests,net_area_sown"),
+            (IrrigationAreaViewSet, "/api/irrigation-areas/", "total_area,state"),
+        ):
+            self.assertFastListMatchesSerializer(viewset, url)
+            self.assertFastListMatchesSerializer(viewset, url, {"fields": fields})
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(7):
+            make_region(f"District {i}", land_holding=None if i % 2 else 1.5 + i, state=("Punjab", "Kerala")[i % 2])
+        CroppingStat.objects.create(state="Punjab", category="Area", net_area_sown=4100.0)
+
+    def export(self, url, params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content).decode()
+
+    def test_json_and_ndjson_exports_round_trip_to_the_list(self):
+        for url, params in (
+            ("/api/regions/", {"state": "kerala"}),
+            ("/api/regions/", {"fields": "name,land_holding"}),
+            ("/api/cropping-stats/", {}),
+        ):
+            listed = json.loads(b"".join(self.client.get(url, params, HTTP_ACCEPT="application/json").streaming_content))
+            # chunk_size=2 splits the rows over several batches
+            as_json = self.export(url + "export/", {**params, "format": "json", "chunk_size": 2})
+            as_ndjson = self.export(url + "export/", {**params, "format": "ndjson", "chunk_size": 2})
+            self.assertTrue(listed)
+            self.assertEqual(json.loads(as_json), listed)
+            self.assertTrue(as_ndjson.endswith("\n"))
+            self.assertEqual([json.loads(line) for line in as_ndjson.splitlines()], listed)
+
+
+class BulkUpserterTests(TestCase):
+    def test_creates_updates_and_skips(self):
+        IrrigationArea.objects.create(state="Punjab", kharif_area=1.0, total_area=10.0, latitude=30.9, longitude=75.8)
+        upserter = BulkUpserter(IrrigationArea, ("state",), batch_size=10)
+        upserter.add_many([
+            {"state": "Punjab", "total_area": 20.0},
+            {"state": "Kerala", "total_area": 5.0},
+            {"state": "Kerala", "total_area": 6.0},  # same key in one batch: the later row wins
+            {"state": "Goa", "kharif_area": 0.5},
+        ])
+        stats = upserter.finish()
+        self.assertEqual((stats.created, stats.updated, stats.skipped), (2, 1, 1))
+
+        punjab = IrrigationArea.objects.get(state="Punjab")
+        # Fields a row does not carry keep their stored values
+        self.assertEqual((punjab.total_area, punjab.kharif_area, punjab.latitude), (20.0, 1.0, 30.9))
+        self.assertEqual(IrrigationArea.objects.get(state="Kerala").total_area, 6.0)
+        self.assertEqual(IrrigationArea.objects.count(), 3)
+
+        keep = BulkUpserter(IrrigationArea, ("state",), update_existing=False)
+        keep.add_many([{"state": "Punjab", "total_area": 99.0}, {"state": "Bihar", "total_area": 1.0}])
+        stats = keep.finish()
+        self.assertEqual((stats.created, stats.updated, stats.skipped), (1, 0, 1))
+        self.assertEqual(IrrigationArea.objects.get(state="Punjab").total_area, 20.0)
+
+    def test_region_imports_keep_the_crop_index_and_rollup_in_step(self):
+        make_region("Ludhiana", dominant_crops="Wheat")
+        with summary.deferred_refresh():
+            upserter = region_upserter(batch_size=10)
+            upserter.add_many([
+                {"name": "Ludhiana", "state": "Punjab", "dominant_crops": "Rice, Maize"},
+                {"name": "Kollam", "state": "Kerala", "irrigation_type": "Canal", "average_land_holding": 0.3,
+                 "dominant_crops": "Coconut", "rainfall": 2800, "yield_per_hectare": 1.5},
+            ])
+            upserter.finish()
+        self.assertEqual(sorted(Region.objects.filter(crops__key="rice").values_list("name", flat=True)), ["Ludhiana"])
+        self.assertFalse(Region.objects.filter(crops__key="wheat").exists())
+        self.assertEqual(summary.summarize(state="Kerala")["top_crops"], ["Coconut"])
+
+
+class TableReaderTests(TestCase):
+    def test_streamed_rows_match_a_buffered_parse(self):
+        path = settings.BASE_DIR / "cropping_data.json"
+        with open(path, encoding="utf-8") as f:
+            payload = json.load(f)
+        # Tiny chunks put value boundaries, numbers and escapes across reads
+        for chunk_size in (1, 7, 4096):
+            with open(path, encoding="utf-8") as f:
+                reader = JSONTableReader(f, chunk_size=chunk_size)
+                self.assertEqual(reader.read_fields(), payload["fields"])
+                self.assertEqual(list(reader.rows()), payload["data"])
+
+        ndjson = "\n".join([json.dumps({"fields": payload["fields"]})] + [json.dumps(r) for r in payload["data"]])
+        reader = table_reader(io.StringIO(ndjson), "ndjson")
+        self.assertEqual((reader.read_fields(), list(reader.rows())), (payload["fields"], payload["data"]))
+
+    def test_streamed_import_matches_a_buffered_import(self):
+        path = str(settings.BASE_DIR / "cropping_data.json")
+        call_command("import_cropping_stats", path=path, batch_size=7, stdout=io.StringIO())
+        streamed = list(CroppingStat.objects.order_by("state", "category").values())
+        CroppingStat.objects.all().delete()
+
+        # The whole document in one read buffer, written as a single batch
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+        upserter = BulkUpserter(CroppingStat, import_cropping_stats.KEY_FIELDS, batch_size=len(text), state_centroids=True)
+        upserter.add_many(import_cropping_stats.parse_table(JSONTableReader(io.StringIO(text), chunk_size=len(text))))
+        upserter.finish()
+        buffered = list(CroppingStat.objects.order_by("state", "category").values())
+
+        def without_ids(rows):
+            return [{k: v for k, v in row.items() if k != "id"} for row in rows]
+
+        self.assertTrue(buffered)
+        self.assertEqual(without_ids(streamed), without_ids(buffered))
+
+    def test_malformed_json_fails_fast_with_the_byte_offset(self):
+        head = '{"fields": [{"label": "\u00e9"}], "data": [[1], '
+        with self.assertRaisesRegex(ValueError, rf"^Invalid JSON at byte {len(head.encode())}: "):
+            list(JSONTableReader(io.StringIO(head + '["never closed' + "x" * 100_000), chunk_size=64,
+                                 max_value_size=1000).rows())
+        with self.assertRaisesRegex(ValueError, r"^Invalid JSON at byte \d+: Expecting"):
+            list(JSONTableReader(io.StringIO(head + "[2,]]}")).rows())
+
+
+
+class DistributionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.rainfall = [350.0, 420.5, 500.0, 500.0, 610.0, 800.0, 950.0, 1200.0, 1800.0, 2400.0]
+        for i, rainfall in enumerate(cls.rainfall):
+            make_region(f"District {i}", rainfall=rainfall, state=("Punjab", "Kerala")[i % 2])
+
+    def test_quantiles_histogram_and_top_match_the_rows(self):
+        response = self.client.get("/api/regions/distribution/", {
+            "metric": "rainfall", "quantiles": "0,0.25,0.5,0.9,1", "bins": 4, "top": 3,
+        }, HTTP_ACCEPT="application/json")
+        data = response.json()
+        values = sorted(self.rainfall)
+        n = len(values)
+        self.assertEqual((data["count"], data["min"], data["max"]), (n, values[0], values[-1]))
+        self.assertEqual([b["value"] for b in data["quantiles"]],
+                         [values[int((n - 1) * q)] for q in (0, 0.25, 0.5, 0.9, 1)])
+
+        width = (values[-1] - values[0]) / 4
+        expected = [0] * 4
+        for v in values:
+            expected[min(int((v - values[0]) // width), 3)] += 1
+        self.assertEqual([b["count"] for b in data["histogram"]], expected)
+        self.assertEqual(data["histogram"][-1]["end"], values[-1])
+
+        self.assertEqual([t["value"] for t in data["top"]], values[::-1][:3])
+        self.assertEqual(data["top"][0]["label"], "District 9")
+
+    def test_filters_apply_and_bad_params_are_rejected(self):
+        data = self.client.get("/api/regions/distribution/", {"metric": "rainfall", "state": "kerala"},
+                               HTTP_ACCEPT="application/json").json()
+        self.assertEqual(data["count"], 5)
+        self.assertEqual(data["max"], 2400.0)
+        for params in ({"metric": "nope"}, {"quantiles": "0.5,2"}, {"bins": "x"}):
+            response = self.client.get("/api/regions/distribution/", params, HTTP_ACCEPT="application/json")
+            self.assertEqual(response.status_code, 400, params)
+
+
+class TileTests(TestCase):
+    @staticmethod
+    def tile_of(lat, lon, z):
+        n = 2 ** z
+        y = (1 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2 * n
+        return int((lon + 180) / 360 * n), int(y)
+
+    def test_clusters_cover_the_tile_and_follow_writes(self):
+        for i, (lat, lon) in enumerate([(30.9, 75.8), (30.95, 75.85), (31.6, 74.9)]):
+            make_region(f"District {i}", latitude=lat, longitude=lon, rainfall=500 + 100 * i)
+        make_region("Kollam", state="Kerala", latitude=8.9, longitude=76.6)
+        x, y = self.tile_of(30.9, 75.8, 5)
+        url = f"/api/regions/tiles/5/{x}/{y}/"
+
+        clusters = self.client.get(url, {"metric": "rainfall", "grid": 1}, HTTP_ACCEPT="application/json").json()["clusters"]
+        self.assertEqual(len(clusters), 1)
+        self.assertEqual((clusters[0]["count"], clusters[0]["sum"], clusters[0]["max"]), (3, 1800.0, 700.0))
+
+        single = self.client.get(url, {"metric": "rainfall", "grid": 32}, HTTP_ACCEPT="application/json").json()["clusters"]
+        self.assertEqual(sum(c["count"] for c in single), 3)
+        self.assertIn("District 2", [c.get("label") for c in single])
+
+        # A write bumps the data version, so the cached tile is not served again
+        make_region("District 3", latitude=31.0, longitude=75.9, rainfall=100)
+        clusters = self.client.get(url, {"metric": "rainfall", "grid": 1}, HTTP_ACCEPT="application/json").json()["clusters"]
+        self.assertEqual((clusters[0]["count"], clusters[0]["min"]), (4, 100.0))
+
+
+class SpatialFilterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # Spread north-east of Ludhiana, so the distance order differs from the id order
+        cls.points = [(30.9 + 0.05 * ((i * 7) % 12), 75.85 + 0.04 * ((i * 5) % 12)) for i in range(12)]
+        for i, (lat, lon) in enumerate(cls.points):
+            make_region(f"District {i}", latitude=lat, longitude=lon, rainfall=400 + 10 * i,
+                        irrigation_type=("Canal", "Tube well")[i % 2])
+        make_region("Kollam", state="Kerala", latitude=8.9, longitude=76.6, irrigation_type="Tank")
+
+    def test_paged_near_results_stay_nearest_first(self):
+        params = {"near": "30.9,75.85", "radius_km": 200}
+        full = self.client.get("/api/regions/", params, HTTP_ACCEPT="application/json")
+        expected = [row["name"] for row in json.loads(b"".join(full.streaming_content))]
+        self.assertEqual(len(expected), 12)
+        self.assertEqual(expected[0], "District 0")
+
+        names, url, query = [], "/api/regions/", {**params, "page_size": 5}
+        while url:
+            body = self.client.get(url, query, HTTP_ACCEPT="application/json").json()
+            names += [row["name"] for row in body["results"]]
+            url, query = body["next"], None
+        self.assertEqual(names, expected)
+
+    @override_settings(COLUMNAR_ANALYTICS=False)
+    def test_summaries_apply_bbox_and_near(self):
+        box = self.client.get("/api/regions/summary/", {"bbox": "75,30,77,32"}, HTTP_ACCEPT="application/json").json()
+        self.assertEqual(box["count"], 12)
+        self.assertEqual(box["top_irrigation_type"], "Canal")
+        near = self.client.get("/api/regions/summary/", {"near": "8.9,76.6", "radius_km": 10},
+                               HTTP_ACCEPT="application/json").json()
+        self.assertEqual((near["count"], near["top_irrigation_type"]), (1, "Tank"))
+
+
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        caching.get_cache().clear()
+        IrrigationArea.objects.create(state="Punjab", total_area=10.0)
+
+    def get(self, url, params=None):
+        response = self.client.get(url, params, HTTP_ACCEPT="application/json")
+        self.assertEqual(response.status_code, 200)
+        return json.loads(b"".join(response.streaming_content) if response.streaming else response.content)
+
+    def stats(self):
+        return self.client.get("/api/cache-stats/", HTTP_ACCEPT="application/json").json()
+
+    def test_hits_until_the_data_version_changes(self):
+        first = self.get("/api/irrigation-areas/")
+        with self.assertNumQueries(1):  # the version lookup only
+            self.assertEqual(self.get("/api/irrigation-areas/"), first)
+        self.assertEqual((self.stats()["hits"], self.stats()["misses"]), (1, 1))
+
+        # Bulk writes send no signals; BulkUpserter bumps the version itself
+        upserter = BulkUpserter(IrrigationArea, ("state",))
+        upserter.add({"state": "Punjab", "total_area": 20.0})
+        upserter.finish()
+        self.assertEqual([row["total_area"] for row in self.get("/api/irrigation-areas/")], [20.0])
+
+        IrrigationArea.objects.create(state="Kerala", total_area=5.0)
+        self.assertEqual(len(self.get("/api/irrigation-areas/")), 2)
+        self.assertEqual((self.stats()["hits"], self.stats()["misses"]), (1, 3))
+
+    def test_query_strings_are_normalized(self):
+        self.get("/api/irrigation-areas/?state=punjab&fields=state,total_area")
+        self.get("/api/irrigation-areas/?fields=state,total_area&state=punjab")
+        self.assertEqual(self.stats()["hits"], 1)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        caching.get_cache().clear()
+        make_region("Ludhiana")
+
+    def test_validators_304_and_a_new_etag_after_a_write(self):
+        for url in ("/api/regions/", "/api/regions/summary/", f"/api/regions/{Region.objects.get().pk}/"):
+            response = self.client.get(url, HTTP_ACCEPT="application/json")
+            self.assertEqual(response.status_code, 200, url)
+            etag, last_modified = response["ETag"], response["Last-Modified"]
+            self.assertIn("no-cache", response["Cache-Control"])
+
+            with self.assertNumQueries(1):
+                not_modified = self.client.get(url, HTTP_ACCEPT="application/json", HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(not_modified.status_code, 304, url)
+            self.assertEqual(not_modified["ETag"], etag)
+            self.assertEqual(not_modified.content, b"")
+            since = self.client.get(url, HTTP_ACCEPT="application/json", HTTP_IF_MODIFIED_SINCE=last_modified)
+            self.assertEqual(since.status_code, 304, url)
+
+            # Another query over the same data has its own ETag
+            other = self.client.get(url, {"state": "punjab"}, HTTP_ACCEPT="application/json", HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(other.status_code, 200, url)
+
+        region = Region.objects.get()
+        region.rainfall = 650
+        region.save()
+        response = self.client.get("/api/regions/summary/", HTTP_ACCEPT="application/json", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.json()["avg_rainfall"], 650)
+
+
+class PageBundleTests(TestCase):
+    def test_bundles_match_the_rows(self):
+        for i, (state, holding, irrigated) in enumerate([("Punjab", 2.0, 50.0), ("Punjab", None, None), ("Kerala", 0.5, 0.0)]):
+            make_region(f"District {i}", state=state, land_holding=holding, average_land_holding=1.0,
+                        irrigation_area=irrigated, rainfall=500 + 100 * i)
+        CroppingStat.objects.create(state="Punjab", category="Area", net_area_sown=4000.0, forests=10.0)
+        CroppingStat.objects.create(state="Kerala", category="Area", net_area_sown=2000.0)
+        CroppingStat.objects.create(state="Kerala", category="Percentage to Geographical Area", net_area_sown=55.0)
+
+        holding = self.client.get("/api/bundle/holding/", HTTP_ACCEPT="application/json").json()
+        self.assertEqual(holding["cards"]["count"], 3)
+        self.assertEqual(holding["cards"]["states"], 2)
+        self.assertAlmostEqual(holding["cards"]["avg_land_holding"], (2.0 + 1.0 + 0.5) / 3)
+        self.assertAlmostEqual(holding["cards"]["irrigation_coverage"], 100 / 3)
+        self.assertEqual([t["label"] for t in holding["top"]], ["District 0", "District 1", "District 2"])
+
+        punjab = self.client.get("/api/bundle/holding/", {"state": "punjab"}, HTTP_ACCEPT="application/json").json()
+        self.assertEqual(punjab["cards"]["count"], 2)
+
+        # The cropping page defaults to the "Area" category
+        cropping = self.client.get("/api/bundle/cropping/", HTTP_ACCEPT="application/json").json()
+        self.assertEqual(cropping["cards"]["net_area_sown"], 6000.0)
+        self.assertEqual(cropping["trends"]["avg_forests"], 5.0)
+        self.assertEqual(cropping["table"]["columns"][:2], ["state", "category"])
+        self.assertEqual([row[0] for row in cropping["table"]["rows"]], ["Kerala", "Punjab"])
+
+        self.assertEqual(self.client.get("/api/bundle/nope/", HTTP_ACCEPT="application/json").status_code, 404)
+        self.assertEqual(self.client.get("/api/bundle/", HTTP_ACCEPT="application/json").json(),
+                         ["cropping", "holding", "irrigation"])
+
+
+def image_upload(name, size, fmt="PNG"):
+    buf = io.BytesIO()
+    Image.new("RGB", size, (40, 120, 60)).save(buf, format=fmt)
+    return SimpleUploadedFile(name, buf.getvalue(), content_type=f"image/{fmt.lower()}")
+
+
+class GalleryFilesTestCase(TestCase):
+    """Media in a temporary directory, with background gallery work run inline."""
+
+    def setUp(self):
+        self.enterContext(override_settings(MEDIA_ROOT=self.enterContext(tempfile.TemporaryDirectory())))
+        inline = lambda fn, *args: fn(*args)
+        self.enterContext(mock.patch.object(gallery, "in_background", inline))
+        self.enterContext(mock.patch.object(thumbnails, "in_background", inline))
+        self.staff = User.objects.create_user("staff", password="pw", is_staff=True)
+
+
+@unittest.skipIf(Image is None, "Pillow is not installed")
+class GalleryVariantTests(GalleryFilesTestCase):
+    def test_uploads_get_a_thumbnail_and_resized_copies(self):
+        item, = gallery.create_items("holding", [image_upload("field.png", (1600, 900))])
+        item.refresh_from_db()
+        variants = item.variants
+        self.assertEqual((variants["source"], variants["width"], variants["height"]), (item.image.name, 1600, 900))
+        with default_storage.open(variants["thumbnail"]) as f:
+            self.assertEqual(Image.open(f).size, (498, 280))
+        self.assertEqual([w for w, _ in variants["webp"]], [320, 640, 1280])
+        for fmt in thumbnails.formats():
+            for width, name in variants[fmt]:
+                with default_storage.open(name) as f:
+                    image = Image.open(f)
+                    self.assertEqual((image.format.lower(), image.width), (fmt, width))
+
+        small, = gallery.create_items("holding", [image_upload("small.jpg", (200, 100), "JPEG")])
+        small.refresh_from_db()
+        self.assertEqual([w for w, _ in small.variants["webp"]], [200])
+
+        response = self.client.get("/holding/gallery/")
+        self.assertContains(response, f'srcset="{default_storage.url(variants["webp"][0][1])} 320w')
+        self.assertContains(response, default_storage.url(variants["thumbnail"]))
+
+    def test_replacing_an_image_rebuilds_its_variants(self):
+        item, = gallery.create_items("holding", [image_upload("a.png", (800, 600))])
+        item.refresh_from_db()
+        old = [item.image.name] + thumbnails.variant_files(item.variants)
+
+        self.client.force_login(self.staff)
+        self.client.post(f"/holding/gallery/{item.pk}/edit/", {"description": "new", "image": image_upload("b.png", (700, 700))})
+        item.refresh_from_db()
+        self.assertEqual(item.variants["width"], 700)
+        self.assertFalse(any(default_storage.exists(name) for name in old))
+        self.assertTrue(all(default_storage.exists(name) for name in thumbnails.variant_files(item.variants)))
+
+    def test_unreadable_files_get_no_variants(self):
+        with self.assertLogs("core.thumbnails", "WARNING"):
+            item, = gallery.create_items("holding", [SimpleUploadedFile("broken.png", b"not an image")])
+        item.refresh_from_db()
+        self.assertEqual(item.variants, {})
+
+
+@unittest.skipIf(Image is None, "Pillow is not installed")
+class GalleryBulkTests(GalleryFilesTestCase):
+    def test_bulk_upload_and_deletes_remove_every_file(self):
+        self.client.force_login(self.staff)
+        uploads = [image_upload(f"{i}.png", (400, 300)) for i in range(3)]
+        self.client.post("/irrigation/gallery/upload/", {"image": uploads, "description": "batch"})
+        items = list(GalleryItem.objects.filter(category="irrigation").order_by("pk"))
+        self.assertEqual([i.description for i in items], ["batch"] * 3)
+        files = {i.pk: [i.image.name] + thumbnails.variant_files(i.variants) for i in items}
+        self.assertTrue(all(default_storage.exists(n) for names in files.values() for n in names))
+        self.assertEqual(len(set(n for names in files.values() for n in names)), sum(map(len, files.values())))
+
+        self.client.post(f"/irrigation/gallery/{items[0].pk}/delete/")
+        self.client.post("/irrigation/gallery/bulk-delete/", {"ids": [items[1].pk]})
+        self.assertEqual(list(GalleryItem.objects.values_list("pk", flat=True)), [items[2].pk])
+        for pk, names in files.items():
+            self.assertEqual([default_storage.exists(n) for n in names], [pk == items[2].pk] * len(names))
+
+    def test_sweep_removes_old_orphans_and_reports_missing_files(self):
+        kept, gone = gallery.create_items("holding", [image_upload("kept.png", (400, 300)), image_upload("gone.png", (400, 300))])
+        default_storage.delete(GalleryItem.objects.get(pk=gone.pk).image.name)
+        old_orphan = default_storage.save("gallery/old-orphan.png", io.BytesIO(b"x"))
+        new_orphan = default_storage.save("gallery/new-orphan.png", io.BytesIO(b"x"))
+        two_hours_ago = default_storage.get_modified_time(old_orphan).timestamp() - 7200
+        os.utime(default_storage.path(old_orphan), (two_hours_ago, two_hours_ago))
+
+        out = io.StringIO()
+        call_command("sweep_gallery_orphans", stdout=out)
+        self.assertIn(f"orphan  {old_orphan}", out.getvalue())
+        self.assertIn(f"missing {gone.image.name}", out.getvalue())
+        self.assertNotIn(new_orphan, out.getvalue())
+        self.assertTrue(default_storage.exists(old_orphan))
+
+        call_command("sweep_gallery_orphans", delete=True, stdout=io.StringIO())
+        self.assertFalse(default_storage.exists(old_orphan))
+        self.assertTrue(default_storage.exists(new_orphan))
+        kept.refresh_from_db()
+        self.assertTrue(all(default_storage.exists(n) for n in [kept.image.name] + thumbnails.variant_files(kept.variants)))
+
+
+class ColumnarSummaryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(20):
+            make_region(f"District {i}", latitude=29.5 + 0.2 * i, longitude=74.5 + 0.15 * i,
+                        land_holding=None if i % 4 == 0 else 0.5 + i / 10, irrigation_area=None if i % 5 == 0 else 10.0 * i,
+                        irrigation_type=("Canal", "Tube well", "Tank")[i % 3], dominant_crops=("Rice, Wheat", "Maize")[i % 2])
+        make_region("No coordinates", rainfall=900)
+
+    async def summaries(self, params):
+        """The summary payload from the column snapshot, the ORM and the async view."""
+        def sync_get(columnar):
+            caching.get_cache().clear()
+            with override_settings(COLUMNAR_ANALYTICS=columnar):
+                return self.client.get("/api/regions/summary/", params, HTTP_ACCEPT="application/json").json()
+
+        snapshot = await sync_to_async(sync_get)(True)
+        orm = await sync_to_async(sync_get)(False)
+        await sync_to_async(caching.get_cache().clear)()
+        with override_settings(COLUMNAR_ANALYTICS=False):
+            response = await self.async_client.get("/api/async/regions/summary/", params, headers={"Accept": "application/json"})
+        return snapshot, orm, json.loads(response.content)
+
+    @unittest.skipUnless(columnar.np is not None, "NumPy is not installed")
+    async def test_spatial_summaries_agree_on_every_path(self):
+        for params in (
+            {"bbox": "75,30,77,32"},
+            {"bbox": "75,30,77,32", "irrigation_type": "canal"},
+            {"near": "31.1,75.7", "radius_km": "60"},
+            {"near": "31.1,75.7", "rainfall_min": "400"},
+        ):
+            snapshot, orm, async_ = await self.summaries(params)
+            self.assertEqual(snapshot["count"], orm["count"], params)
+            self.assertLess(orm["count"], 20, params)
+            for key in snapshot:
+                if isinstance(snapshot[key], float):
+                    self.assertAlmostEqual(snapshot[key], orm[key], msg=(params, key))
+                else:
+                    self.assertEqual(snapshot[key], orm[key], (params, key))
+            self.assertEqual(async_, orm, params)
+
+
+class StateResolutionTests(TestCase):
+    def test_spellings_and_aliases_resolve_to_one_state(self):
+        odisha = State.objects.get(name="Odisha")
+        for i, spelling in enumerate(["Odisha", "ORISSA", " orissa ", "Punjab"]):
+            make_region(f"District {i}", state=spelling)
+        IrrigationArea.objects.create(state="Orissa", total_area=1.0)
+        upserter = BulkUpserter(CroppingStat, ("state", "category"))
+        upserter.add_many([{"state": "ODISHA", "category": "Area"}, {"state": "All India", "category": "Area"}])
+        upserter.finish()
+
+        self.assertEqual(Region.objects.filter(state_ref=odisha).count(), 3)
+        self.assertEqual(IrrigationArea.objects.get().state_ref, odisha)
+        self.assertEqual(CroppingStat.objects.get(state="ODISHA").state_ref, odisha)
+        self.assertIsNone(CroppingStat.objects.get(state="All India").state_ref)
+        self.assertEqual(State.objects.get(name="Jammu and Kashmir").pk,
+                         states.resolver().resolve("JAMMU & KASHMIR"))
+
+        for spelling in ("orissa", "Odisha"):
+            names = list_names(self.client.get("/api/regions/", {"state": spelling}, HTTP_ACCEPT="application/json"))
+            self.assertEqual(names, ["District 0", "District 1", "District 2"], spelling)
+        # Names outside the dimension still match their stored text
+        response = self.client.get("/api/cropping-stats/", {"state": "all india"}, HTTP_ACCEPT="application/json")
+        self.assertEqual([row["state"] for row in json.loads(b"".join(response.streaming_content))], ["All India"])
+
+    def test_saving_a_state_relinks_rows_to_new_aliases(self):
+        make_region("Gurugram", state="Hariyana")
+        haryana = State.objects.get(name="Haryana")
+        self.assertIsNone(Region.objects.get().state_ref)
+        haryana.aliases = ["Hariyana"]
+        haryana.save()
+        self.assertEqual(Region.objects.get().state_ref, haryana)
+
+
+class ScorecardTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        make_region("Ludhiana", state="Punjab", land_holding=1.0, rainfall=600)
+        make_region("Amritsar", state="PUNJAB", land_holding=None, average_land_holding=2.0, rainfall=700)
+        make_region("Kollam", state="Kerala", land_holding=0.5, rainfall=2800)
+        CroppingStat.objects.create(state="Punjab", category="Area", total_geographical_area=5000.0,
+                                    net_area_sown=4000.0, forests=250.0)
+        CroppingStat.objects.create(state="Punjab", category="Percentage to Geographical Area",
+                                    total_geographical_area=100.0, net_area_sown=80.0, forests=5.0)
+        CroppingStat.objects.create(state="Bihar", category="Area", total_geographical_area=9400.0, net_area_sown=5300.0)
+        IrrigationArea.objects.create(state="Punjab", total_area=3_000_000.0)
+        IrrigationArea.objects.create(state="Bihar", total_area=3_180_000.0)
+
+    def test_ratios_sort_and_top_on_both_paths(self):
+        for use_snapshot in (True, False):
+            card = scorecard.build(QueryDict(), use_snapshot=use_snapshot)
+            rows = {row["state"]: row for row in card["results"]}
+            self.assertEqual(list(rows), ["Bihar", "Kerala", "Punjab"], use_snapshot)
+            punjab = rows["Punjab"]
+            self.assertEqual((punjab["region_count"], punjab["avg_land_holding"], punjab["avg_rainfall"]), (2, 1.5, 650.0))
+            self.assertEqual((punjab["net_area_sown"], punjab["irrigated_area"]), (4000.0, 3_000_000.0))
+            # Irrigated hectares over sown thousand hectares
+            self.assertAlmostEqual(punjab["irrigated_pct"], 75.0)
+            self.assertAlmostEqual(punjab["sown_pct"], 80.0)
+            self.assertAlmostEqual(punjab["forest_pct"], 5.0)
+            self.assertAlmostEqual(rows["Bihar"]["irrigated_pct"], 60.0)
+            self.assertIsNone(rows["Bihar"]["forest_pct"])
+            self.assertEqual((rows["Kerala"]["region_count"], rows["Kerala"]["irrigated_pct"]), (1, None))
+            self.assertEqual(rows["Bihar"]["region_count"], 0)
+
+            ranked = scorecard.build(QueryDict("sort=-irrigated_pct&top=2"), use_snapshot=use_snapshot)
+            self.assertEqual([r["state"] for r in ranked["results"]], ["Punjab", "Bihar"])
+            # Missing values go last in both directions
+            ranked = scorecard.build(QueryDict("sort=irrigated_pct"), use_snapshot=use_snapshot)
+            self.assertEqual([r["state"] for r in ranked["results"]], ["Bihar", "Punjab", "Kerala"])
+
+    def test_endpoint_validates_its_parameters(self):
+        response = self.client.get("/api/states/scorecard/", {"sort": "-region_count", "top": 1}, HTTP_ACCEPT="application/json")
+        self.assertEqual([r["state"] for r in response.json()["results"]], ["Punjab"])
+        for params in ({"sort": "nope"}, {"top": "0"}, {"top": "x"}):
+            response = self.client.get("/api/states/scorecard/", params, HTTP_ACCEPT="application/json")
+            self.assertEqual(response.status_code, 400, params)
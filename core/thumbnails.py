@@ -0,0 +1,139 @@
+"""
+Resized derivatives of gallery images.
+
+Every GalleryItem image gets a JPEG thumbnail for the gallery tile plus WebP
+(and AVIF, when the installed Pillow can encode it) copies at the widths in
+settings.GALLERY_VARIANT_WIDTHS. They are stored beside the original as
+<original>.<width>w.<ext> and their storage names kept in
+GalleryItem.variants, which the gallery template turns into <picture>
+sources with srcset.
+
+Uploads and edits hand the work to the gallery thread pool (core.gallery)
+once their transaction commits; Pillow releases the GIL while decoding,
+resizing and encoding. build_gallery_variants backfills existing items.
+Pillow is optional: without it no derivatives are made and the pages keep
+serving the original file.
+"""
+import logging
+from io import BytesIO
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from .gallery import in_background
+from .models import GalleryItem
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is optional
+    Image = ImageOps = None
+
+logger = logging.getLogger(__name__)
+
+# Twice the 140px gallery tile, so it stays sharp on high-density screens
+THUMBNAIL_SIZE = 280
+QUALITY = {"jpeg": 82, "webp": 80, "avif": 60}
+
+
+def available() -> bool:
+    return Image is not None
+
+
+def formats() -> List[str]:
+    """Modern formats this Pillow can write, best first."""
+    if Image is None:
+        return []
+    Image.init()
+    return [fmt for fmt in ("avif", "webp") if fmt.upper() in Image.SAVE]
+
+
+def variant_name(name: str, label: str, ext: str) -> str:
+    return f"{name}.{label}.{ext}"
+
+
+def _save(storage, name: str, img, fmt: str) -> str:
+    buf = BytesIO()
+    img.save(buf, format=fmt.upper(), quality=QUALITY[fmt])
+    if storage.exists(name):
+        storage.delete(name)
+    return storage.save(name, ContentFile(buf.getvalue()))
+
+
+def generate(name: str, storage=default_storage) -> Dict:
+    """
+    Build the thumbnail and resized copies of the image stored as `name` and
+    return the GalleryItem.variants mapping for them, or {} when Pillow is
+    missing or the file is not a readable image. Does not touch the database.
+    """
+    if Image is None:
+        return {}
+    try:
+        with storage.open(name, "rb") as f:
+            img = ImageOps.exif_transpose(Image.open(f))
+            img.load()
+    except (OSError, ValueError) as exc:
+        logger.warning("Cannot read gallery image %s: %s", name, exc)
+        return {}
+    if img.mode not in ("RGB", "RGBA"):
+        img = img.convert("RGBA" if "transparency" in img.info or img.mode in ("LA", "PA") else "RGB")
+
+    variants: Dict = {"source": name, "width": img.width, "height": img.height}
+
+    # Thumbnail: shorter side THUMBNAIL_SIZE, as the tile crops with object-fit: cover
+    scale = min(1.0, THUMBNAIL_SIZE / min(img.width, img.height))
+    thumb = img.resize((max(1, round(img.width * scale)), max(1, round(img.height * scale))), Image.LANCZOS)
+    variants["thumbnail"] = _save(storage, variant_name(name, "thumb", "jpg"), thumb.convert("RGB"), "jpeg")
+
+    widths = sorted({w for w in settings.GALLERY_VARIANT_WIDTHS if w < img.width} or {img.width})
+    for fmt in formats():
+        variants[fmt] = []
+        for width in widths:
+            resized = img if width == img.width else img.resize((width, max(1, round(img.height * width / img.width))), Image.LANCZOS)
+            variants[fmt].append([width, _save(storage, variant_name(name, f"{width}w", fmt), resized, fmt)])
+    return variants
+
+
+def variant_files(variants: Dict) -> List[str]:
+    names = [variants["thumbnail"]] if variants.get("thumbnail") else []
+    for fmt in ("avif", "webp"):
+        names.extend(name for _, name in variants.get(fmt, []))
+    return names
+
+
+def delete_variants(variants: Dict, storage=default_storage) -> None:
+    for name in variant_files(variants):
+        try:
+            storage.delete(name)
+        except OSError as exc:
+            logger.warning("Cannot delete gallery variant %s: %s", name, exc)
+
+
+def store(pk: int, name: str, variants: Dict) -> bool:
+    """
+    Record `variants` on the item if it still shows the image they were built
+    from; otherwise (replaced or deleted meanwhile) discard the files.
+    """
+    if GalleryItem.objects.filter(pk=pk, image=name).update(variants=variants):
+        return True
+    delete_variants(variants)
+    return False
+
+
+def _build(pk: int, name: str, stale: Dict) -> None:
+    delete_variants(stale)
+    variants = generate(name)
+    if variants:
+        store(pk, name, variants)
+
+
+def schedule(item, stale: Optional[Dict] = None) -> None:
+    """
+    Build `item`'s variants in the background once the current transaction
+    commits. `stale` is a variants mapping of a replaced image to delete.
+    """
+    if Image is None or not item.image:
+        return
+    pk, name, stale = item.pk, item.image.name, dict(stale or {})
+    in_background(_build, pk, name, stale)
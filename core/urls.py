@@ -1,5 +1,6 @@
 from django.urls import path
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from .metrics import metrics_view
 from .views import index, login_view, holding_view, irrigation_view, cropping_view, signup_view, gallery_view, gallery_upload, gallery_delete, gallery_bulk_delete, gallery_edit, gallery_bulk_edit_redirect, logout_view
 
 urlpatterns = [
@@ -23,4 +24,7 @@ urlpatterns = [
     # ✅ JWT Authentication endpoints still under /api/
     path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+
+    # Prometheus scrape target, when REQUEST_METRICS is on
+    path('metrics', metrics_view, name='metrics'),
 ]
@@ -0,0 +1,63 @@
+"""
+Per-table data versions.
+
+Every write to Region, CroppingStat, IrrigationArea or State bumps a
+DataVersion row (model save/delete signals in core.signals, bulk writes in
+core.importing).
+Anything derived from those tables, such as cached map tiles, can include
+the current version in its cache key instead of being invalidated by hand.
+"""
+from datetime import datetime
+from typing import Optional, Tuple
+
+from django.db.models import F
+from django.utils import timezone
+
+from .models import DataVersion
+
+
+def key_for(model) -> str:
+    return model._meta.label_lower
+
+
+def bump(*models) -> None:
+    now = timezone.now()
+    for model in models:
+        key = key_for(model)
+        if not DataVersion.objects.filter(key=key).update(version=F("version") + 1, updated_at=now):
+            _, created = DataVersion.objects.get_or_create(key=key, defaults={"version": 1, "updated_at": now})
+            if not created:
+                # Another writer created the row first
+                DataVersion.objects.filter(key=key).update(version=F("version") + 1, updated_at=now)
+
+
+def current(model) -> Tuple[int, Optional[datetime]]:
+    """(version, updated_at) for `model`; (0, None) until its first tracked write."""
+    row = DataVersion.objects.filter(key=key_for(model)).values_list("version", "updated_at").first()
+    return row or (0, None)
+
+
+def token(model) -> str:
+    """
+    Cache-key fragment for the current data of `model`. Includes the bump
+    time so a counter restarting from zero (e.g. a flushed database) never
+    reuses an old key.
+    """
+    return make_token(*current(model))
+
+
+def current_token(*models) -> Tuple[str, Optional[datetime]]:
+    """
+    (token, latest updated_at) over several models, in one query. For one
+    model the token equals token(model); for more it joins their tokens.
+    """
+    keys = [key_for(model) for model in models]
+    rows = {key: (version, updated_at) for key, version, updated_at in
+            DataVersion.objects.filter(key__in=keys).values_list("key", "version", "updated_at")}
+    parts = [rows.get(key, (0, None)) for key in keys]
+    stamps = [updated_at for _, updated_at in parts if updated_at]
+    return "-".join(make_token(*part) for part in parts), max(stamps) if stamps else None
+
+
+def make_token(version: int, updated_at: Optional[datetime]) -> str:
+    return f"{version}.{int(updated_at.timestamp() * 1_000_000)}" if updated_at else "0"
@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from django.shortcuts import render, redirect
 from django.contrib.admin.views.decorators import staff_member_required
 from django.views.decorators.http import require_http_methods
@@ -5,20 +7,63 @@ from .models import Region, CroppingStat, IrrigationArea, GalleryItem
 from django.contrib.auth.models import User
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
 from rest_framework.response import Response
-from django.db.models import Avg, Min, Max, Count, F
+from django.db.models import F, Q
 from django.db.models.functions import Coalesce
-from .models import Region, CroppingStat, IrrigationArea
+from .models import Region, CroppingStat, IrrigationArea, State
 from .serializers import RegionSerializer, CroppingStatSerializer, IrrigationAreaSerializer
+from . import bundles
+from . import columnar
+from . import gallery
+from . import scorecard
+from . import states
+from . import summary as region_summary
+from . import thumbnails
+from .crops import crop_key
+from . import caching
+from .caching import ResponseCacheMixin, cache_response
+from .mixins import (
+    DistributionMixin, ExportMixin, FastListMixin, FieldProjectionMixin, SpatialFilterMixin, TileMixin,
+)
+from .pagination import KeysetPagination
 from django.contrib.auth import logout
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import authenticate, login
 
-class RegionViewSet(viewsets.ModelViewSet):
+class RegionViewSet(
+    ResponseCacheMixin, FieldProjectionMixin, SpatialFilterMixin, FastListMixin,
+    ExportMixin, DistributionMixin, TileMixin,
+    viewsets.ModelViewSet
+):
     queryset = Region.objects.all()
     serializer_class = RegionSerializer
     permission_classes = [permissions.AllowAny]
     authentication_classes = []  # Explicitly disable auth for this viewset
+    pagination_class = KeysetPagination
+    keyset_sort_fields = ("name", "state", "effective_land_holding", "rainfall", "yield_per_hectare")
+    projection_columns = {"land_holding": ("land_holding", "average_land_holding")}
+    fast_list_columns = {"land_holding": "effective_land_holding"}
+    distribution_metrics = {
+        "land_holding": "effective_land_holding",
+        "rainfall": "rainfall",
+        "yield_per_hectare": "yield_per_hectare",
+        "irrigation_area": "irrigation_area",
+    }
+    distribution_label = "name"
+    tile_label = "name"
+
+    # Answer live summaries from the in-memory column snapshot (core.columnar) when NumPy is installed
+    columnar_summary = True
+
+    # Filters the RegionSummary rollup cannot answer; summary() runs live when any is present
+    LIVE_SUMMARY_PARAMS = (
+        "crop",
+        "land_holding_min", "land_holding_max",
+        "irrigation_area_min", "irrigation_area_max",
+        "rainfall_min", "rainfall_max",
+        "bbox", "near",
+    )
 
     def get_queryset(self):
         qs = super().get_queryset()
@@ -26,7 +71,7 @@ class RegionViewSet(viewsets.ModelViewSet):
 
         state = params.get("state")
         irrigation_type = params.get("irrigation_type")
-        crop = params.get("crop")  # matches against dominant_crops icontains
+        crop = params.get("crop")  # exact crop name, case-insensitive
         lh_min = params.get("land_holding_min")
         lh_max = params.get("land_holding_max")
         ia_min = params.get("irrigation_area_min")
@@ -35,11 +80,11 @@ class RegionViewSet(viewsets.ModelViewSet):
         rain_max = params.get("rainfall_max")
 
         if state:
-            qs = qs.filter(state__iexact=state)
+            qs = states.filter_state(qs, state)
         if irrigation_type:
-            qs = qs.filter(irrigation_type__iexact=irrigation_type)
+            qs = qs.filter(irrigation_type__lower=irrigation_type.lower())
         if crop:
-            qs = qs.filter(dominant_crops__icontains=crop)
+            qs = qs.filter(crops__key=crop_key(crop))
 
         # Effective land holding fallback
         qs = qs.annotate(effective_land_holding=Coalesce(F("land_holding"), F("average_land_holding")))
@@ -61,48 +106,74 @@ class RegionViewSet(viewsets.ModelViewSet):
         return qs
 
     @action(detail=False, methods=["get"], url_path="summary", permission_classes=[permissions.AllowAny])
+    @cache_response
     def summary(self, request):
-        qs = self.get_queryset()
-
-        aggregates = qs.aggregate(
-            count=Count("id"),
-            avg_land_holding=Avg("land_holding"),
-            avg_land_holding_legacy=Avg("average_land_holding"),
-            min_land_holding=Min("land_holding"),
-            max_land_holding=Max("land_holding"),
-            total_irrigation_area=Avg("irrigation_area"),
-            avg_rainfall=Avg("rainfall"),
-        )
+        params = request.query_params
+        if not any(params.get(p) for p in self.LIVE_SUMMARY_PARAMS):
+            return Response(region_summary.summarize(
+                state=params.get("state"),
+                irrigation_type=params.get("irrigation_type"),
+            ))
 
-        # Use legacy average if new is null
-        if aggregates["avg_land_holding"] is None:
-            aggregates["avg_land_holding"] = aggregates["avg_land_holding_legacy"]
-        aggregates.pop("avg_land_holding_legacy", None)
+        if self.columnar_summary and columnar.available():
+            table = columnar.snapshot(Region)
+            return Response(columnar.summarize_regions(table, columnar.region_mask(table, params)))
 
-        # Most common irrigation type
-        top_irrigation = (
-            qs.values("irrigation_type").annotate(c=Count("id")).order_by("-c").first()
-        )
+        return Response(region_summary.summarize_queryset(self.get_queryset()))
 
-        # Top crops from comma-separated dominant_crops
-        crop_counts = {}
-        for item in qs.values_list("dominant_crops", flat=True):
-            if not item:
-                continue
-            for c in [x.strip() for x in item.split(",") if x.strip()]:
-                crop_counts[c] = crop_counts.get(c, 0) + 1
-        top_crops = sorted(crop_counts.items(), key=lambda x: x[1], reverse=True)[:5]
-
-        return Response({
-            "count": aggregates.get("count") or 0,
-            "avg_land_holding": aggregates.get("avg_land_holding"),
-            "min_land_holding": aggregates.get("min_land_holding"),
-            "max_land_holding": aggregates.get("max_land_holding"),
-            "avg_rainfall": aggregates.get("avg_rainfall"),
-            "total_irrigation_area": aggregates.get("total_irrigation_area"),
-            "top_irrigation_type": top_irrigation["irrigation_type"] if top_irrigation else None,
-            "top_crops": [c for c, _ in top_crops],
-        })
+
+class CacheStatsView(viewsets.ViewSet):
+    """Hit/miss counters of the read-API response cache (core.caching)."""
+    permission_classes = [permissions.AllowAny]
+    authentication_classes = []
+
+    def list(self, request):
+        return Response(caching.stats())
+
+
+class PageBundleView(ResponseCacheMixin, viewsets.ViewSet):
+    """GET /api/bundle/<page>/: the cards, chart series and legend of one dashboard page (core.bundles)."""
+    permission_classes = [permissions.AllowAny]
+    authentication_classes = []
+
+    def get_version_model(self):
+        page = bundles.PAGES.get(self.kwargs.get("pk"))
+        if page is None:
+            raise NotFound("No such page.")
+        return page.model
+
+    def list(self, request):
+        return Response(sorted(bundles.PAGES))
+
+    @cache_response
+    def retrieve(self, request, pk=None):
+        return Response(bundles.build(pk, request.query_params))
+
+
+class StateViewSet(ResponseCacheMixin, viewsets.ViewSet):
+    """
+    GET /api/states/: the canonical states (core.states).
+    GET /api/states/scorecard/: per-state metrics joined across the datasets (core.scorecard).
+    """
+    permission_classes = [permissions.AllowAny]
+    authentication_classes = []
+
+    def get_version_model(self):
+        return State
+
+    def get_version_models(self):
+        if self.action == "scorecard":
+            return (State, Region, CroppingStat, IrrigationArea)
+        return super().get_version_models()
+
+    @cache_response
+    def list(self, request):
+        return Response(list(State.objects.values("id", "name", "aliases", "latitude", "longitude")))
+
+    @action(detail=False, methods=["get"], url_path="scorecard")
+    @cache_response
+    def scorecard(self, request):
+        return Response(scorecard.build(request.query_params))
 
 
 class UserRegistrationView(viewsets.ViewSet):
@@ -176,11 +247,22 @@ def logout_view(request):
     return redirect('login')
 
 
-class CroppingStatViewSet(viewsets.ReadOnlyModelViewSet):
+class CroppingStatViewSet(
+    ResponseCacheMixin, FieldProjectionMixin, SpatialFilterMixin, FastListMixin,
+    ExportMixin, DistributionMixin, TileMixin,
+    viewsets.ReadOnlyModelViewSet
+):
     queryset = CroppingStat.objects.all()
     serializer_class = CroppingStatSerializer
     permission_classes = [permissions.AllowAny]
     authentication_classes = []
+    pagination_class = KeysetPagination
+    keyset_sort_fields = ("state", "category")
+    distribution_metrics = {f: f for f in (
+        "net_area_sown", "total_geographical_area", "reporting_area", "forests",
+        "not_available_for_cultivation", "permanent_pastures", "tree_crops_and_groves",
+        "culturable_wasteland", "fallow_other_than_current", "current_fallows",
+    )}
 
     def get_queryset(self):
         qs = super().get_queryset()
@@ -188,24 +270,31 @@ class CroppingStatViewSet(viewsets.ReadOnlyModelViewSet):
         state = params.get('state')
         category = params.get('category')
         if state:
-            qs = qs.filter(state__iexact=state)
+            qs = states.filter_state(qs, state)
         if category:
-            qs = qs.filter(category__iexact=category)
+            qs = qs.filter(category__lower=category.lower())
         return qs
 
 
-class IrrigationAreaViewSet(viewsets.ReadOnlyModelViewSet):
+class IrrigationAreaViewSet(
+    ResponseCacheMixin, FieldProjectionMixin, SpatialFilterMixin, FastListMixin,
+    ExportMixin, DistributionMixin, TileMixin,
+    viewsets.ReadOnlyModelViewSet
+):
     queryset = IrrigationArea.objects.all()
     serializer_class = IrrigationAreaSerializer
     permission_classes = [permissions.AllowAny]
     authentication_classes = []
+    pagination_class = KeysetPagination
+    keyset_sort_fields = ("state",)
+    distribution_metrics = {f: f for f in ("total_area", "kharif_area", "rabi_area", "perennial_area", "others_area")}
 
     def get_queryset(self):
         qs = super().get_queryset()
         params = self.request.query_params
         state = params.get('state')
         if state:
-            qs = qs.filter(state__iexact=state)
+            qs = states.filter_state(qs, state)
         return qs
 
 
@@ -217,17 +306,47 @@ CATEGORY_TO_TITLE = {
 }
 
 
+GALLERY_PAGE_SIZE = 24
+
+
+def _gallery_cursor(item: GalleryItem) -> str:
+    return f"{item.created_at.isoformat()}_{item.id}"
+
+
+def _parse_gallery_cursor(raw: str):
+    """(created_at, id) of the last item on the previous page, or None if malformed."""
+    created_at, _, item_id = raw.rpartition('_')
+    try:
+        return datetime.fromisoformat(created_at), int(item_id)
+    except ValueError:
+        return None
+
+
 def gallery_view(request, category: str):
     if category not in CATEGORY_TO_TITLE:
         return redirect('index')
-    items = GalleryItem.objects.filter(category=category).order_by('-created_at')
+    # Keyset pagination, newest first: ?after=<cursor> continues below the given item
+    items = GalleryItem.objects.filter(category=category).order_by('-created_at', '-id')
+    cursor = _parse_gallery_cursor(request.GET.get('after', ''))
+    if cursor:
+        created_at, item_id = cursor
+        items = items.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=item_id))
+    page = list(items[:GALLERY_PAGE_SIZE + 1])
+    items, has_more = page[:GALLERY_PAGE_SIZE], len(page) > GALLERY_PAGE_SIZE
     select_mode = request.GET.get('select') == '1'
-    return render(request, 'gallery.html', {
+    context = {
         'title': CATEGORY_TO_TITLE[category],
         'items': items,
+        'next_cursor': _gallery_cursor(items[-1]) if has_more else None,
+        # Only the first rows of the first page load eagerly; the rest wait for the viewport
+        'continued': cursor is not None,
         'category': category,
         'select_mode': select_mode,
-    })
+    }
+    # Infinite scroll fetches only the next batch of rows
+    if request.GET.get('partial') == '1':
+        return render(request, 'gallery_items.html', context)
+    return render(request, 'gallery.html', context)
 
 
 @staff_member_required
@@ -236,10 +355,10 @@ def gallery_upload(request, category: str):
     if category not in CATEGORY_TO_TITLE:
         return redirect('index')
     if request.method == 'POST':
-        image = request.FILES.get('image')
+        images = request.FILES.getlist('image')
         description = request.POST.get('description', '')
-        if image:
-            GalleryItem.objects.create(category=category, image=image, description=description)
+        if images:
+            gallery.create_items(category, images, description)
             return redirect('gallery', category=category)
         # No image provided — re-render with an error message
         return render(request, 'gallery_upload.html', {
@@ -258,11 +377,7 @@ def gallery_upload(request, category: str):
 def gallery_delete(request, category: str, item_id: int):
     if category not in CATEGORY_TO_TITLE:
         return redirect('index')
-    try:
-        item = GalleryItem.objects.get(id=item_id, category=category)
-        item.delete()
-    except GalleryItem.DoesNotExist:
-        pass
+    gallery.delete_items(GalleryItem.objects.filter(id=item_id, category=category))
     return redirect('gallery', category=category)
 
 
@@ -273,7 +388,7 @@ def gallery_bulk_delete(request, category: str):
         return redirect('index')
     ids = request.POST.getlist('ids')
     if ids:
-        GalleryItem.objects.filter(category=category, id__in=ids).delete()
+        gallery.delete_items(GalleryItem.objects.filter(category=category, id__in=ids))
     return redirect('gallery', category=category)
 
 
@@ -291,9 +406,17 @@ def gallery_edit(request, category: str, item_id: int):
         description = request.POST.get('description', '')
         image = request.FILES.get('image')
         item.description = description
+        stale = None
         if image:
+            old_image = item.image.name
             item.image = image
+            # Serve the new original until its own variants are built
+            stale, item.variants = item.variants, {}
         item.save()
+        if image:
+            thumbnails.schedule(item, stale=stale)
+            if old_image:
+                gallery.in_background(gallery.delete_files, [old_image])
         return redirect('gallery', category=category)
 
     return render(request, 'gallery_edit.html', {
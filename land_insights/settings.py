@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -51,11 +52,15 @@ REST_FRAMEWORK = {
 CORS_ALLOW_ALL_ORIGINS = True 
 
 MIDDLEWARE = [
+    # First, so its timings cover the whole chain; removes itself unless REQUEST_METRICS is on
+    'core.metrics.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # After auth, to tell staff apart; removes itself unless REQUEST_PROFILING is on
+    'core.profiling.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -91,6 +96,59 @@ DATABASES = {
 }
 
 
+# Caches
+# "api" holds cached read-API responses and map tiles (core.caching). Keys embed
+# the table's data version, so writes never need explicit invalidation. Swap the
+# backend with API_CACHE_BACKEND / API_CACHE_LOCATION, e.g.
+# django.core.cache.backends.filebased.FileBasedCache + a directory, or
+# django.core.cache.backends.redis.RedisCache + redis://host:6379 (set
+# maxmemory-policy allkeys-lru there). Local memory evicts least recently used
+# entries one at a time once MAX_ENTRIES is reached.
+
+API_CACHE_BACKEND = os.environ.get('API_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache')
+API_CACHE_MAX_ENTRIES = int(os.environ.get('API_CACHE_MAX_ENTRIES', 1000))
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'api': {
+        'BACKEND': API_CACHE_BACKEND,
+        'LOCATION': os.environ.get('API_CACHE_LOCATION', 'api-responses'),
+        'TIMEOUT': 24 * 60 * 60,
+        # Redis handles eviction itself and rejects these options
+        'OPTIONS': {} if 'redis' in API_CACHE_BACKEND.lower() else {
+            'MAX_ENTRIES': API_CACHE_MAX_ENTRIES,
+            'CULL_FREQUENCY': API_CACHE_MAX_ENTRIES,
+        },
+    },
+}
+
+# Responses larger than this are streamed to the client but not cached
+API_CACHE_MAX_BYTES = int(os.environ.get('API_CACHE_MAX_BYTES', 8 * 1024 * 1024))
+
+# Serve live region summaries from NumPy column snapshots (core.columnar) when NumPy is installed
+COLUMNAR_ANALYTICS = os.environ.get('COLUMNAR_ANALYTICS', '1') == '1'
+
+
+# Threads encoding JSON for the async read views (core.async_views) under ASGI
+ASYNC_SERIALIZE_WORKERS = int(os.environ.get('ASYNC_SERIALIZE_WORKERS', 4))
+
+
+# Per-route latency, query and payload metrics at /metrics plus Server-Timing headers (core.metrics)
+REQUEST_METRICS = os.environ.get('REQUEST_METRICS', '0') == '1'
+
+
+# On-demand profiling (core.profiling): staff send `X-Profile: 1` or ?profile=1, and requests
+# slower than PROFILE_SLOW_MS (0 = off) are stack-sampled. The newest PROFILE_KEEP profiles are
+# kept in PROFILE_DIR and listed in the admin.
+REQUEST_PROFILING = os.environ.get('REQUEST_PROFILING', '0') == '1'
+PROFILE_SLOW_MS = float(os.environ.get('PROFILE_SLOW_MS', 0))
+PROFILE_SAMPLE_INTERVAL_MS = float(os.environ.get('PROFILE_SAMPLE_INTERVAL_MS', 5))
+PROFILE_KEEP = int(os.environ.get('PROFILE_KEEP', 50))
+PROFILE_DIR = os.environ.get('PROFILE_DIR', BASE_DIR / 'profiles')
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -133,6 +191,11 @@ TEMPLATES[0]['DIRS'] = [BASE_DIR / 'core/templates']
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Resized WebP/AVIF copies of gallery images (core.thumbnails); needs Pillow
+GALLERY_VARIANT_WIDTHS = (320, 640, 1280)
+# Threads for gallery file work: concurrent uploads, variant builds, deferred deletes
+GALLERY_WORKERS = int(os.environ.get('GALLERY_WORKERS', 4))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 